@@ -0,0 +1,96 @@
+from collections import defaultdict
+from storage import store
+
+# Sinal de cada tipo de registro no saldo
+SINAIS = {"despesas": -1, "entradas": 1}
+
+def mes_registro(registro) -> str:
+    # "dd/mm/yyyy" -> "yyyy-mm"
+    data = registro.data or ""
+    if len(data) != 10:
+        return None
+    return f"{data[6:10]}-{data[3:5]}"
+
+# Totais e contagens por mês -> categoria de um usuário, mantidos incrementalmente
+class AgregadosUsuario:
+    def __init__(self):
+        self.totais = {tipo: defaultdict(dict) for tipo in SINAIS}
+        self.contagens = {tipo: defaultdict(dict) for tipo in SINAIS}
+
+    def aplicar(self, tipo: str, registro, sinal: int = 1):
+        mes = mes_registro(registro)
+        cat = registro.categoria_norm
+        totais = self.totais[tipo][mes]
+        contagens = self.contagens[tipo][mes]
+        totais[cat] = totais.get(cat, 0) + sinal * registro.centavos
+        contagens[cat] = contagens.get(cat, 0) + sinal
+        if contagens[cat] == 0:
+            del totais[cat]
+            del contagens[cat]
+
+class Agregados:
+    def __init__(self, repositorio):
+        self.repositorio = repositorio
+        self._usuarios = {}
+
+    def _usuario(self, user_id: str) -> AgregadosUsuario:
+        agregado = self._usuarios.get(user_id)
+        if agregado is None:
+            agregado = AgregadosUsuario()
+            for registro in self.repositorio.listar_despesas(user_id):
+                agregado.aplicar("despesas", registro)
+            for registro in self.repositorio.listar_entradas(user_id):
+                agregado.aplicar("entradas", registro)
+            self._usuarios[user_id] = agregado
+        return agregado
+
+    def registrar(self, user_id: str, tipo: str, registros: list, sinal: int = 1):
+        # Inclusão (sinal=1) ou remoção (sinal=-1): ajusta saldo e totais na mesma operação
+        return self.registrar_lote(user_id, {tipo: registros}, sinal)
+
+    def registrar_lote(self, user_id: str, por_tipo: dict, sinal: int = 1):
+        # Vários tipos de uma vez ({"despesas": [...], "entradas": [...]}) com um único ajuste de saldo
+        if not any(por_tipo.values()):
+            return self.repositorio.get_saldo(user_id)
+        delta = sum(
+            sum(r.centavos for r in registros) * SINAIS[tipo] * sinal
+            for tipo, registros in por_tipo.items()
+        )
+        agregado = self._usuarios.get(user_id)
+        if agregado is not None:
+            for tipo, registros in por_tipo.items():
+                for registro in registros:
+                    agregado.aplicar(tipo, registro, sinal)
+        return self.repositorio.ajustar_saldo(user_id, delta)
+
+    def totais_mes(self, user_id: str, tipo: str, mes: str) -> dict:
+        return dict(self._usuario(user_id).totais[tipo].get(mes, {}))
+
+    def total_mes(self, user_id: str, tipo: str, mes: str) -> int:
+        return sum(self._usuario(user_id).totais[tipo].get(mes, {}).values())
+
+    def invalidar(self, user_id: str = None):
+        if user_id is None:
+            self._usuarios.clear()
+        else:
+            self._usuarios.pop(user_id, None)
+
+    # Verificação/reconstrução a partir dos registros brutos
+    def calcular_saldo(self, user_id: str) -> int:
+        entradas = sum(r.centavos for r in self.repositorio.listar_entradas(user_id))
+        despesas = sum(r.centavos for r in self.repositorio.listar_despesas(user_id))
+        return entradas - despesas
+
+    def verificar(self, corrigir: bool = False) -> list:
+        divergencias = []
+        for user_id in self.repositorio.listar_usuarios():
+            armazenado = self.repositorio.get_saldo(user_id)
+            calculado = self.calcular_saldo(user_id)
+            if armazenado != calculado:
+                divergencias.append((user_id, armazenado, calculado))
+                if corrigir:
+                    self.repositorio.ajustar_saldo(user_id, calculado - armazenado)
+        self.invalidar()
+        return divergencias
+
+agregados = Agregados(store)
@@ -0,0 +1,22 @@
+import os
+import time
+
+# Início explícito do processo. Os pontos de entrada (bot.py, shards.py e scripts) chamam carregar()
+# antes de importar config, e config.preparar_diretorios() antes de usar os dados: importar qualquer
+# módulo do bot não lê .env nem cria pastas.
+
+# Marco zero do cold start: este é o primeiro módulo importado pelos pontos de entrada
+INICIO = time.perf_counter()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Pasta onde está o .env
+ENV_PATH = os.path.join(BASE_DIR, "config", ".env")
+
+def carregar(caminho: str = ENV_PATH):
+    # Variáveis já definidas no ambiente têm prioridade sobre o .env
+    if os.path.exists(caminho):
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path=caminho)
+
+def tempo_inicio() -> float:
+    return time.perf_counter() - INICIO
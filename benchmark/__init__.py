@@ -0,0 +1,2 @@
+# Benchmarks do bot: dados sintéticos (dados.py), Update/CallbackContext falsos (falsos.py)
+# e o executor dos cenários (executar.py). Uso: python -m benchmark --help
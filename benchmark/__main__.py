@@ -0,0 +1,77 @@
+import argparse
+from benchmark.dados import gerar
+from benchmark.executar import CENARIOS, executar, imprimir, salvar
+from benchmark.envio import executar_envio, imprimir_envio
+from benchmark.inicio import medir_inicio, imprimir_inicio
+
+# python -m benchmark gerar --usuarios 100000 --destino /tmp/bench-100k
+# python -m benchmark executar --dados /tmp/bench-100k --iteracoes 5000 --json base.json
+# python -m benchmark envio --chats 50 --produtores 2 [--sem-fila]
+# python -m benchmark inicio --execucoes 10   # sai com código 1 se o p50 passar de LIMITE_INICIO
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Benchmarks dos handlers do FinFácil.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_gerar = comandos.add_parser("gerar", help="Gera data/*.json sintéticos")
+    p_gerar.add_argument("--destino", required=True, help="Pasta de saída")
+    p_gerar.add_argument("--usuarios", type=int, default=1000, help="Número de usuários (1k a 1M)")
+    p_gerar.add_argument("--media-despesas", type=float, default=30, help="Escala da cauda de despesas por usuário")
+    p_gerar.add_argument("--media-entradas", type=float, default=6, help="Escala da cauda de entradas por usuário")
+    p_gerar.add_argument("--maximo", type=int, default=20000, help="Máximo de registros de um usuário")
+    p_gerar.add_argument("--comprovantes", type=float, default=0.3, help="Fração de despesas com comprovante")
+    p_gerar.add_argument("--semente", type=int, default=42)
+
+    p_exec = comandos.add_parser("executar", help="Mede os handlers sobre um conjunto gerado")
+    p_exec.add_argument("--dados", required=True, help="Pasta gerada com 'gerar' (não é alterada)")
+    p_exec.add_argument("--cenarios", nargs="+", choices=CENARIOS, default=list(CENARIOS))
+    p_exec.add_argument("--iteracoes", type=int, default=1000, help="Chamadas por cenário")
+    p_exec.add_argument("--concorrencia", type=int, default=1, help="Chamadas simultâneas no event loop")
+    p_exec.add_argument("--semente", type=int, default=42)
+    p_exec.add_argument("--json", help="Grava o resultado neste arquivo (para comparar execuções)")
+    p_exec.add_argument("--manter", action="store_true", help="Não apaga a cópia de trabalho dos dados")
+
+    p_envio = comandos.add_parser("envio", help="Mede a fila de envio contra uma Bot API local")
+    p_envio.add_argument("--chats", type=int, default=50, help="Chats recebendo respostas ao mesmo tempo")
+    p_envio.add_argument("--produtores", type=int, default=2, help="Tarefas enviando para o mesmo chat")
+    p_envio.add_argument("--respostas", type=int, default=4, help="Mensagens seguidas de cada tarefa")
+    p_envio.add_argument("--limite-global", type=int, default=30, help="Envios por segundo aceitos pela API local")
+    p_envio.add_argument("--sem-fila", action="store_true", help="Envia direto, sem a fila (para comparação)")
+    p_envio.add_argument("--json", help="Grava o resultado neste arquivo")
+
+    p_inicio = comandos.add_parser("inicio", help="Mede o cold start em processos novos")
+    p_inicio.add_argument("--execucoes", type=int, default=10)
+    p_inicio.add_argument("--dados", help="Pasta de dados a carregar (padrão: vazia)")
+    p_inicio.add_argument("--orcamento", type=float, help="Orçamento em ms (padrão: LIMITE_INICIO)")
+    p_inicio.add_argument("--json", help="Grava o resultado neste arquivo")
+
+    args = parser.parse_args()
+    if args.comando == "inicio":
+        # config só aqui: importado no topo, fixaria DATA_DIR antes de executar() apontá-lo para a cópia
+        from config import LIMITE_INICIO
+        orcamento = args.orcamento if args.orcamento is not None else LIMITE_INICIO * 1000
+        resultado = medir_inicio(args.execucoes, args.dados)
+        imprimir_inicio(resultado, orcamento)
+        if args.json:
+            salvar(resultado, args.json)
+        if resultado["p50_ms"] > orcamento:
+            raise SystemExit(1)
+        return
+    if args.comando == "envio":
+        resultado = executar_envio(args.chats, args.produtores, args.respostas, not args.sem_fila, args.limite_global)
+        imprimir_envio(resultado)
+        if args.json:
+            salvar(resultado, args.json)
+        return
+    if args.comando == "gerar":
+        totais = gerar(args.destino, args.usuarios, args.media_despesas, args.media_entradas,
+                       args.maximo, args.comprovantes, args.semente)
+        print(f"{totais['usuarios']} usuários, {totais['despesas']} despesas e {totais['entradas']} entradas em {args.destino}")
+        return
+    resultado = executar(args.dados, args.cenarios, args.iteracoes, args.concorrencia, args.semente, args.manter)
+    imprimir(resultado)
+    if args.json:
+        salvar(resultado, args.json)
+
+if __name__ == "__main__":
+    main()
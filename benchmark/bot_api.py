@@ -0,0 +1,95 @@
+import time
+import asyncio
+from collections import deque
+from aiohttp import web
+
+# Bot API local para testar a fila de envio sem rede: responde aos métodos de envio com mensagens
+# falsas e devolve 429 (retry_after) quando um chat ou o bot inteiro passa dos limites do Telegram.
+# Use com BOT_API_URL=http://127.0.0.1:<porta> ou pelo cenário "python -m benchmark envio".
+
+ENVIOS = frozenset((
+    "sendMessage", "sendPhoto", "sendMediaGroup", "sendDocument", "editMessageText", "editMessageReplyMarkup",
+))
+
+class BotAPILocal:
+    def __init__(self, limite_chat: float = 1, rajada_chat: int = 3, limite_global: int = 30, retry_after: int = 1):
+        # Por chat: rajada de até rajada_chat envios e depois limite_chat por segundo;
+        # no total: limite_global envios em qualquer janela de 1 s
+        self.limite_chat = limite_chat
+        self.rajada_chat = rajada_chat
+        self.limite_global = limite_global
+        self.retry_after = retry_after
+        self.chamadas = []
+        self.rejeitadas = 0
+        self._por_chat = {}
+        self._global = deque()
+        self._mensagem_id = 0
+
+    @staticmethod
+    def _janela(envios: deque, agora: float) -> deque:
+        while envios and agora - envios[0] >= 1:
+            envios.popleft()
+        return envios
+
+    def _excedeu(self, chat_id) -> bool:
+        agora = time.monotonic()
+        fichas, atualizado = self._por_chat.get(chat_id, (self.rajada_chat, agora))
+        fichas = min(self.rajada_chat, fichas + (agora - atualizado) * self.limite_chat)
+        total = self._janela(self._global, agora)
+        if fichas < 1 or len(total) >= self.limite_global:
+            self._por_chat[chat_id] = (fichas, agora)
+            return True
+        self._por_chat[chat_id] = (fichas - 1, agora)
+        total.append(agora)
+        return False
+
+    def _mensagem(self, chat_id, parametros: dict) -> dict:
+        self._mensagem_id += 1
+        return {
+            "message_id": self._mensagem_id,
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id), "type": "private"},
+            "text": parametros.get("text", ""),
+        }
+
+    async def _metodo(self, request: web.Request) -> web.Response:
+        metodo = request.match_info["metodo"]
+        parametros = dict(await request.post()) if request.can_read_body else {}
+        parametros.update(request.query)
+        self.chamadas.append((metodo, parametros))
+        if metodo == "getMe":
+            return web.json_response({"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot",
+            }})
+        if metodo == "getUpdates":
+            await asyncio.sleep(float(parametros.get("timeout", 0) or 0))
+            return web.json_response({"ok": True, "result": []})
+        if metodo in ENVIOS:
+            chat_id = parametros.get("chat_id", "0")
+            if self._excedeu(chat_id):
+                self.rejeitadas += 1
+                return web.json_response({
+                    "ok": False, "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                }, status=429)
+            mensagem = self._mensagem(chat_id, parametros)
+            return web.json_response({"ok": True, "result": [mensagem] if metodo == "sendMediaGroup" else mensagem})
+        return web.json_response({"ok": True, "result": True})
+
+    def aplicacao(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{metodo}", self._metodo)
+        return app
+
+    async def iniciar(self, host: str = "127.0.0.1", porta: int = 0) -> str:
+        # Devolve a URL base para BOT_API_URL (porta 0 = escolhida pelo sistema)
+        self._runner = web.AppRunner(self.aplicacao())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, porta)
+        await site.start()
+        porta = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{porta}"
+
+    async def parar(self):
+        await self._runner.cleanup()
@@ -0,0 +1,80 @@
+import os
+import json
+import random
+from datetime import date, timedelta
+
+# Gera data/*.json sintéticos no formato do LedgerStore, escrevendo usuário a usuário para
+# não montar o conjunto inteiro em memória (1M de usuários cabe em disco, não em um dict)
+
+CATEGORIAS_DESPESA = ["TRANSPORTE", "MERCADO", "ROUPAS", "LAZER", "SAUDE", "CONTAS"]
+CATEGORIAS_ENTRADA = ["SALARIO", "EXTRAS"]
+INICIO = date(2022, 1, 1)
+DIAS = 3 * 365
+
+def quantidade_registros(rng: random.Random, media: float, maximo: int) -> int:
+    # Pareto: a maioria dos usuários tem poucos registros e uns poucos têm milhares
+    return min(maximo, int(rng.paretovariate(1.5) * media / 3))
+
+def _registro(rng: random.Random, n: int, categorias: list, comprovantes: float) -> dict:
+    dia = INICIO + timedelta(days=rng.randrange(DIAS))
+    data = dia.strftime("%d/%m/%Y")
+    registro = {
+        "id": n,
+        "centavos": rng.randrange(100, 50000),
+        "categoria": rng.choice(categorias),
+        "data": data,
+    }
+    if comprovantes is not None:
+        registro["comprovante"] = f"BENCH-{n}-{rng.getrandbits(32):08x}" if rng.random() < comprovantes else None
+        registro["comprovante_local"] = None
+    registro["observacao"] = "" if rng.random() < 0.7 else "obs"
+    registro["data_ord"] = dia.toordinal()
+    return registro
+
+class _EscritorJSON:
+    # {"user": valor, ...} escrito incrementalmente
+    def __init__(self, caminho: str):
+        self.file = open(caminho, "w", encoding="utf-8")
+        self.file.write("{")
+        self.primeiro = True
+
+    def escrever(self, chave: str, valor):
+        self.file.write(("" if self.primeiro else ",\n") + json.dumps(chave) + ":" + json.dumps(valor))
+        self.primeiro = False
+
+    def fechar(self):
+        self.file.write("}\n")
+        self.file.close()
+
+def gerar(destino: str, usuarios: int, media_despesas: float = 30, media_entradas: float = 6,
+          maximo: int = 20000, comprovantes: float = 0.3, semente: int = 42) -> dict:
+    os.makedirs(destino, exist_ok=True)
+    rng = random.Random(semente)
+    arquivos = {
+        secao: _EscritorJSON(os.path.join(destino, f"{secao}.json"))
+        for secao in ("dados", "despesas", "entradas", "categorias_despesas", "categorias_entrada")
+    }
+    totais = {"usuarios": usuarios, "despesas": 0, "entradas": 0}
+    for n in range(usuarios):
+        user_id = str(100000 + n)
+        despesas = [
+            _registro(rng, i + 1, CATEGORIAS_DESPESA, comprovantes)
+            for i in range(quantidade_registros(rng, media_despesas, maximo))
+        ]
+        entradas = [
+            _registro(rng, i + 1, CATEGORIAS_ENTRADA, None)
+            for i in range(quantidade_registros(rng, media_entradas, maximo))
+        ]
+        saldo = sum(r["centavos"] for r in entradas) - sum(r["centavos"] for r in despesas)
+        arquivos["dados"].escrever(user_id, saldo)
+        if despesas:
+            arquivos["despesas"].escrever(user_id, despesas)
+        if entradas:
+            arquivos["entradas"].escrever(user_id, entradas)
+        arquivos["categorias_despesas"].escrever(user_id, CATEGORIAS_DESPESA)
+        arquivos["categorias_entrada"].escrever(user_id, CATEGORIAS_ENTRADA)
+        totais["despesas"] += len(despesas)
+        totais["entradas"] += len(entradas)
+    for arquivo in arquivos.values():
+        arquivo.fechar()
+    return totais
@@ -0,0 +1,68 @@
+import time
+import asyncio
+from telegram.error import RetryAfter
+from telegram.ext import ExtBot
+from telegram.request import HTTPXRequest
+from benchmark.bot_api import BotAPILocal
+from benchmark.executar import percentil, pico_rss_mb
+
+# Envia mensagens como os handlers fazem (uma resposta após a outra, aguardando cada uma) para vários
+# chats ao mesmo tempo, contra a Bot API local, com e sem a fila de envio
+
+async def _medir(chats: int, produtores: int, respostas: int, com_fila: bool, api: BotAPILocal) -> dict:
+    from envio import FilaEnvio
+
+    url = await api.iniciar()
+    bot = ExtBot(
+        "1:bench",
+        base_url=f"{url}/bot",
+        request=HTTPXRequest(connection_pool_size=256),
+        rate_limiter=FilaEnvio() if com_fila else None,
+    )
+    latencias = []
+    falhas = 0
+
+    async def produtor(chat_id: int, indice: int):
+        nonlocal falhas
+        for n in range(respostas):
+            inicio = time.perf_counter()
+            try:
+                await bot.send_message(chat_id, f"Resposta {n + 1} do produtor {indice + 1}", parse_mode="HTML")
+            except RetryAfter:
+                falhas += 1
+            latencias.append(time.perf_counter() - inicio)
+
+    try:
+        async with bot:
+            inicio = time.perf_counter()
+            await asyncio.gather(*(
+                produtor(1000 + chat, indice) for chat in range(chats) for indice in range(produtores)
+            ))
+            duracao = time.perf_counter() - inicio
+    finally:
+        await api.parar()
+    latencias.sort()
+    enviadas = sum(1 for metodo, _ in api.chamadas if metodo == "sendMessage")
+    return {
+        "fila": com_fila,
+        "mensagens": len(latencias),
+        "segundos": duracao,
+        "chamadas_http": enviadas,
+        "respostas_429": api.rejeitadas,
+        "falhas": falhas,
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+    }
+
+def executar_envio(chats: int = 50, produtores: int = 2, respostas: int = 4, com_fila: bool = True,
+                   limite_global: int = 30) -> dict:
+    resultado = asyncio.run(_medir(chats, produtores, respostas, com_fila, BotAPILocal(limite_global=limite_global)))
+    resultado["pico_rss_mb"] = pico_rss_mb()
+    return resultado
+
+def imprimir_envio(resultado: dict):
+    print(f"Fila de envio: {'ligada' if resultado['fila'] else 'desligada'}")
+    print(f"Mensagens: {resultado['mensagens']}  chamadas HTTP: {resultado['chamadas_http'] + resultado['respostas_429']}"
+          f"  entregues: {resultado['chamadas_http']}  429: {resultado['respostas_429']}  falhas: {resultado['falhas']}")
+    print(f"Tempo: {resultado['segundos']:.2f} s  p50: {resultado['p50_ms']:.1f} ms  p99: {resultado['p99_ms']:.1f} ms")
+    print(f"Pico de RSS: {resultado['pico_rss_mb']:.1f} MB")
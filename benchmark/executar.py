@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import resource
+import tempfile
+from datetime import datetime, timedelta
+from benchmark.dados import INICIO, DIAS, CATEGORIAS_DESPESA
+from benchmark.falsos import Aplicacao, Contexto, criar_update
+
+# Executa os handlers reais sobre uma cópia dos dados sintéticos e mede vazão, p50/p99 e pico de RSS.
+# Os módulos do bot só são importados depois de DATA_DIR apontar para a cópia (config lê no import).
+
+CENARIOS = ("expense_value", "expense_date", "expense_obs", "gerar_relatorio", "get_user_categories", "report_prov")
+
+def _ambiente(pasta: str):
+    os.environ["DATA_DIR"] = pasta
+    os.environ["STORAGE_BACKEND"] = "json"
+    os.environ["METRICAS_PORTA"] = "0"
+    os.environ["ARQUIVAR_COMPROVANTES"] = "0"
+
+def _data_aleatoria(rng: random.Random) -> datetime:
+    return datetime.combine(INICIO + timedelta(days=rng.randrange(DIAS)), datetime.min.time())
+
+def _montar_cenarios() -> dict:
+    from fluxos import FLUXOS
+    from handlers.reports import gerar_relatorio, report_prov
+    from data_manager import get_user_categories, query_user_despesas
+    from config import EXPENSE_VALUE, EXPENSE_DATE, EXPENSE_OBS
+
+    # Passos do fluxo de despesa como o ConversationHandler os chama (validação + pergunta seguinte)
+    despesa = FLUXOS["expense_conv_handler"]
+
+    # Cada cenário: preparar(user_id, rng) -> (texto, user_data) fora da medição, e o handler medido
+    def preparar_valor(user_id: str, rng: random.Random):
+        # Valores digitados se repetem muito: o cache do validador é o caso comum
+        return f"{rng.randrange(1, 500)},{rng.choice(('00', '50', '90'))}", {}
+
+    def preparar_data(user_id: str, rng: random.Random):
+        return _data_aleatoria(rng).strftime("%d/%m/%Y"), {}
+
+    def preparar_despesa(user_id: str, rng: random.Random):
+        return "NADA", {
+            "expense_value": rng.randrange(100, 50000),
+            "expense_category": rng.choice(CATEGORIAS_DESPESA),
+            "expense_date": _data_aleatoria(rng).strftime("%d/%m/%Y"),
+            "comprovante": None,
+        }
+
+    def preparar_relatorio(user_id: str, rng: random.Random):
+        inicio = _data_aleatoria(rng) if rng.random() < 0.5 else None
+        fim = inicio + timedelta(days=rng.randrange(30, 365)) if inicio is not None else None
+        categoria = "GERAL" if rng.random() < 0.5 else rng.choice(CATEGORIAS_DESPESA)
+        return "", {"report_category": categoria, "report_date_start": inicio, "report_date_end": fim}
+
+    def preparar_comprovantes(user_id: str, rng: random.Random):
+        ids = [str(d.id) for d in query_user_despesas(user_id) if d.comprovante]
+        if not ids:
+            return "NÃO", {"ids_comprovantes": []}
+        pedidos = rng.sample(ids, min(len(ids), rng.randint(1, 12)))
+        return ",".join(pedidos), {"ids_comprovantes": ids}
+
+    async def categorias(update, context):
+        return get_user_categories(str(update.message.from_user.id))
+
+    return {
+        "expense_value": (preparar_valor, despesa.callback(EXPENSE_VALUE)),
+        "expense_date": (preparar_data, despesa.callback(EXPENSE_DATE)),
+        "expense_obs": (preparar_despesa, despesa.callback(EXPENSE_OBS)),
+        "gerar_relatorio": (preparar_relatorio, gerar_relatorio),
+        "get_user_categories": (lambda user_id, rng: ("", {}), categorias),
+        "report_prov": (preparar_comprovantes, report_prov),
+    }
+
+def percentil(valores: list, p: float) -> float:
+    # Nearest-rank sobre a lista já ordenada
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, max(0, int(round(p / 100 * len(valores))) - 1))]
+
+def pico_rss_mb() -> float:
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+def _escolher_usuario(rng: random.Random, usuarios: list) -> str:
+    # Distribuição log-uniforme: poucos usuários concentram a maior parte do tráfego
+    return usuarios[int(len(usuarios) ** rng.random()) - 1]
+
+async def _medir(nome: str, preparar, handler, usuarios: list, iteracoes: int, concorrencia: int, semente: int) -> dict:
+    rng = random.Random(semente)
+    aplicacao = Aplicacao()
+    latencias = []
+    envios = []
+    restantes = iteracoes
+
+    async def trabalhador():
+        nonlocal restantes
+        while restantes > 0:
+            restantes -= 1
+            user_id = _escolher_usuario(rng, usuarios)
+            texto, user_data = preparar(user_id, rng)
+            update = criar_update(int(user_id), texto, envios)
+            context = Contexto(aplicacao, envios, user_data)
+            inicio = time.perf_counter()
+            await handler(update, context)
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    await aplicacao.aguardar()
+    duracao = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        "cenario": nome,
+        "chamadas": len(latencias),
+        "segundos": duracao,
+        "vazao": len(latencias) / duracao if duracao else 0.0,
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+        "envios": len(envios),
+    }
+
+async def _executar(cenarios: list, iteracoes: int, concorrencia: int, semente: int) -> dict:
+    from storage import store
+    from data_manager import reparar_categorias
+    from executor_io import executor
+
+    inicio = time.perf_counter()
+    store.carregar()
+    reparar_categorias()
+    carga = time.perf_counter() - inicio
+    usuarios = sorted(store.listar_usuarios(), key=int)
+    if not usuarios:
+        raise SystemExit("Nenhum usuário nos dados. Gere-os antes com: python -m benchmark gerar")
+    disponiveis = _montar_cenarios()
+    resultados = []
+    try:
+        for indice, nome in enumerate(cenarios):
+            preparar, handler = disponiveis[nome]
+            resultados.append(await _medir(nome, preparar, handler, usuarios, iteracoes, concorrencia, semente + indice))
+    finally:
+        for journal in store.journais.values():
+            journal.fechar()
+        executor.encerrar()
+    return {
+        "usuarios": len(usuarios),
+        "carga_segundos": carga,
+        "concorrencia": concorrencia,
+        "cenarios": resultados,
+        "pico_rss_mb": pico_rss_mb(),
+    }
+
+def executar(dados: str, cenarios: list = CENARIOS, iteracoes: int = 1000, concorrencia: int = 1,
+             semente: int = 42, manter: bool = False) -> dict:
+    # Os handlers gravam (expense_obs): trabalha sempre sobre uma cópia para o conjunto poder ser reutilizado
+    trabalho = tempfile.mkdtemp(prefix="finfacil-bench-")
+    try:
+        pasta = os.path.join(trabalho, "data")
+        shutil.copytree(dados, pasta)
+        _ambiente(pasta)
+        return asyncio.run(_executar(list(cenarios), iteracoes, concorrencia, semente))
+    finally:
+        if not manter:
+            shutil.rmtree(trabalho, ignore_errors=True)
+
+def imprimir(resultado: dict):
+    print(f"Usuários: {resultado['usuarios']}  carga: {resultado['carga_segundos']:.2f} s  "
+          f"concorrência: {resultado['concorrencia']}")
+    print(f"{'cenário':<22}{'chamadas':>10}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'envios':>10}")
+    for c in resultado["cenarios"]:
+        print(f"{c['cenario']:<22}{c['chamadas']:>10}{c['vazao']:>12.1f}{c['p50_ms']:>10.3f}{c['p99_ms']:>10.3f}{c['envios']:>10}")
+    print(f"Pico de RSS: {resultado['pico_rss_mb']:.1f} MB")
+
+def salvar(resultado: dict, caminho: str):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=4)
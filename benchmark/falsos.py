@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+
+# Update/CallbackContext falsos: os handlers reais rodam sem rede e cada reply_* fica registrado
+
+class Mensagem:
+    def __init__(self, user_id: int, texto: str = "", envios: list = None):
+        self.from_user = SimpleNamespace(id=user_id, first_name="Bench", is_bot=False)
+        self.chat = SimpleNamespace(id=user_id, type="private")
+        self.chat_id = user_id
+        self.text = texto
+        self.photo = []
+        self.document = None
+        self.envios = envios if envios is not None else []
+
+    def _registrar(self, metodo: str, *args, **kwargs):
+        self.envios.append((metodo, args, kwargs))
+        return SimpleNamespace(message_id=len(self.envios), chat=self.chat)
+
+    async def reply_text(self, *args, **kwargs):
+        return self._registrar("reply_text", *args, **kwargs)
+
+    async def reply_photo(self, *args, **kwargs):
+        return self._registrar("reply_photo", *args, **kwargs)
+
+    async def reply_media_group(self, *args, **kwargs):
+        return [self._registrar("reply_media_group", *args, **kwargs)]
+
+    async def reply_document(self, *args, **kwargs):
+        return self._registrar("reply_document", *args, **kwargs)
+
+def criar_update(user_id: int, texto: str = "", envios: list = None):
+    mensagem = Mensagem(user_id, texto, envios)
+    return SimpleNamespace(
+        message=mensagem,
+        effective_message=mensagem,
+        effective_user=mensagem.from_user,
+        effective_chat=mensagem.chat,
+        callback_query=None,
+    )
+
+class Aplicacao:
+    # create_task sem o Application: as tarefas ficam guardadas para serem aguardadas no fim
+    def __init__(self):
+        self.tarefas = set()
+
+    def create_task(self, coroutine, update=None, name=None):
+        tarefa = asyncio.get_running_loop().create_task(coroutine, name=name)
+        self.tarefas.add(tarefa)
+        tarefa.add_done_callback(self.tarefas.discard)
+        return tarefa
+
+    async def aguardar(self):
+        if self.tarefas:
+            await asyncio.gather(*self.tarefas, return_exceptions=True)
+
+class Bot:
+    # Qualquer chamada à Bot API é registrada e devolve um objeto vazio
+    def __init__(self, envios: list):
+        self.envios = envios
+
+    def __getattr__(self, metodo: str):
+        async def chamada(*args, **kwargs):
+            self.envios.append((metodo, args, kwargs))
+            return SimpleNamespace()
+        return chamada
+
+class Contexto:
+    def __init__(self, aplicacao: Aplicacao, envios: list, user_data: dict = None):
+        self.application = aplicacao
+        self.bot = Bot(envios)
+        self.user_data = user_data if user_data is not None else {}
+        self.chat_data = {}
+        self.bot_data = {}
+        self.args = []
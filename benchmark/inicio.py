@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from benchmark.executar import percentil
+
+# Cold start medido em processos novos: o mesmo caminho de bot.main até o Application montado
+# (imports, carga dos dados, reparo de categorias e criar_app), sem nenhuma chamada de rede
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODIGO = """
+import ambiente
+ambiente.carregar()
+import json, sys
+import bot
+from config import preparar_diretorios
+from storage import store
+from data_manager import reparar_categorias
+preparar_diretorios()
+store.carregar()
+reparar_categorias()
+bot.criar_app()
+print(json.dumps({"segundos": ambiente.tempo_inicio(), "modulos": len(sys.modules)}))
+"""
+
+def _executar_uma(ambiente_processo: dict) -> dict:
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, "-c", CODIGO], cwd=RAIZ, env=ambiente_processo, capture_output=True, text=True, check=True
+    ).stdout
+    resultado = json.loads(saida.strip().splitlines()[-1])
+    resultado["processo"] = time.perf_counter() - inicio
+    return resultado
+
+def medir_inicio(execucoes: int = 10, dados: str = None) -> dict:
+    with tempfile.TemporaryDirectory(prefix="finfacil-inicio-") as temporario:
+        # A carga pode reparar categorias e criar diários: mede sempre sobre uma cópia dos dados
+        pasta = os.path.join(temporario, "dados")
+        if dados:
+            shutil.copytree(dados, pasta)
+        ambiente_processo = dict(os.environ)
+        ambiente_processo.setdefault("BOT_TOKEN", "1:bench")
+        ambiente_processo["DATA_DIR"] = pasta
+        ambiente_processo["METRICAS_PORTA"] = "0"
+        # A primeira execução aquece o cache de disco e os .pyc; não entra na conta
+        _executar_uma(ambiente_processo)
+        medidas = [_executar_uma(ambiente_processo) for _ in range(execucoes)]
+    segundos = sorted(m["segundos"] for m in medidas)
+    processo = sorted(m["processo"] for m in medidas)
+    return {
+        "execucoes": execucoes,
+        "p50_ms": percentil(segundos, 50) * 1000,
+        "max_ms": segundos[-1] * 1000,
+        "processo_p50_ms": percentil(processo, 50) * 1000,
+        "modulos": medidas[-1]["modulos"],
+    }
+
+def imprimir_inicio(resultado: dict, orcamento_ms: float):
+    print(f"Cold start ({resultado['execucoes']} execuções): p50 {resultado['p50_ms']:.0f} ms, "
+          f"máx {resultado['max_ms']:.0f} ms, processo inteiro p50 {resultado['processo_p50_ms']:.0f} ms, "
+          f"{resultado['modulos']} módulos carregados")
+    situacao = "dentro do" if resultado["p50_ms"] <= orcamento_ms else "ACIMA do"
+    print(f"p50 {situacao} orçamento de {orcamento_ms:.0f} ms")
@@ -0,0 +1,25 @@
+import asyncio
+import signal
+from telegram.ext import Application
+
+# Ciclo de vida usado quando os updates não vêm do run_polling (webhook, workers de shards):
+# mesmos ganchos post_init/post_shutdown, que carregam e gravam o store
+async def iniciar_app(app: Application):
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.start()
+
+async def encerrar_app(app: Application):
+    await app.stop()
+    await app.shutdown()
+    if app.post_shutdown:
+        await app.post_shutdown(app)
+
+def sinal_de_parada() -> asyncio.Event:
+    # Evento disparado por SIGINT/SIGTERM, para encerrar com calma fora do run_polling
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sinal, parar.set)
+    return parar
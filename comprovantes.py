@@ -0,0 +1,75 @@
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+from executor_io import executor
+from config import ARQUIVAR_COMPROVANTES, COMPROVANTES_DIR
+
+logger = logging.getLogger(__name__)
+
+# Downloads lembrados por file_unique_id antes de descartar os já concluídos
+LIMITE_DOWNLOADS = 1024
+
+# Fotos gravadas como <aa>/<bb>/<sha256>.jpg dentro de COMPROVANTES_DIR; conteúdo idêntico é gravado uma vez só
+class ArquivoComprovantes:
+    def __init__(self, diretorio: str = COMPROVANTES_DIR, ativo: bool = ARQUIVAR_COMPROVANTES):
+        self.diretorio = diretorio
+        self.ativo = ativo
+        self._downloads = {}
+
+    def relativo(self, digest: str) -> str:
+        return os.path.join(digest[:2], digest[2:4], digest + ".jpg")
+
+    def caminho(self, relativo: str) -> str:
+        return os.path.join(self.diretorio, relativo)
+
+    def salvar(self, conteudo: bytes) -> str:
+        relativo = self.relativo(hashlib.sha256(conteudo).hexdigest())
+        destino = self.caminho(relativo)
+        if os.path.exists(destino):
+            return relativo
+        pasta = os.path.dirname(destino)
+        os.makedirs(pasta, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(conteudo)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, destino)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return relativo
+
+    async def _baixar(self, bot, file_id: str) -> str:
+        arquivo = await bot.get_file(file_id)
+        conteudo = bytes(await arquivo.download_as_bytearray())
+        return await executor.executar(self.salvar, conteudo)
+
+    def _tarefa(self, bot, file_id: str, file_unique_id: str):
+        # A mesma foto reenviada (mesmo file_unique_id) reaproveita o download já feito ou em curso
+        tarefa = self._downloads.get(file_unique_id)
+        if tarefa is None or (tarefa.done() and (tarefa.cancelled() or tarefa.exception() is not None)):
+            if len(self._downloads) >= LIMITE_DOWNLOADS:
+                self._downloads = {k: t for k, t in self._downloads.items() if not t.done()}
+            tarefa = asyncio.get_running_loop().create_task(self._baixar(bot, file_id))
+            self._downloads[file_unique_id] = tarefa
+        return tarefa
+
+    def iniciar(self, bot, file_id: str, file_unique_id: str):
+        # Começa o download assim que a foto chega, enquanto o usuário preenche o resto da despesa
+        if self.ativo:
+            self._tarefa(bot, file_id, file_unique_id)
+
+    async def obter(self, bot, file_id: str, file_unique_id: str):
+        # Caminho relativo do arquivo local, ou None se o download falhar
+        try:
+            return await asyncio.shield(self._tarefa(bot, file_id, file_unique_id))
+        except Exception:
+            logger.exception("Falha ao arquivar o comprovante %s", file_id)
+            return None
+
+arquivo = ArquivoComprovantes()
@@ -1,22 +1,15 @@
 import os
-from dotenv import load_dotenv
 
 # Define a pasta base do projeto (raiz onde está o bot.py)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Pasta onde está o .env
-CONFIG_DIR = os.path.join(BASE_DIR, "config")
-ENV_PATH = os.path.join(CONFIG_DIR, ".env")
-
-# Carrega as variáveis do .env que está na pasta 'config'
-load_dotenv(dotenv_path=ENV_PATH)
-
+# Só lê o ambiente: o .env de config/ é carregado antes, por ambiente.carregar() no ponto de entrada
 TOKEN = os.getenv("BOT_TOKEN")
+# Endereço da Bot API (troque por um servidor local para testes, ex.: http://127.0.0.1:8081)
+BOT_API_URL = os.getenv("BOT_API_URL", "https://api.telegram.org").rstrip("/")
 
-# Criação da pasta 'data' para os arquivos JSON
-DATA_DIR = os.path.join(BASE_DIR, "data")
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+# Pasta 'data' para os arquivos JSON (cada shard usa a sua, ver shards.py); criada por preparar_diretorios()
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
 
 # Caminhos para os arquivos JSON (dentro da pasta 'data')
 DADOS_PATH = os.path.join(DATA_DIR, "dados.json")
@@ -25,16 +18,34 @@ CATEGORIAS_DESPESAS_PATH = os.path.join(DATA_DIR, "categorias_despesas.json")
 CATEGORIAS_ENTRADA_PATH = os.path.join(DATA_DIR, "categorias_entrada.json")
 ENTRADAS_PATH = os.path.join(DATA_DIR, "entradas.json")
 
+def preparar_diretorios():
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+# Limite de caracteres de uma mensagem do Telegram
+LIMITE_MENSAGEM = 4096
+# Máximo de fotos por álbum (sendMediaGroup)
+LIMITE_ALBUM = 10
+
 # Categorias padrão
 DEFAULT_CAT_ENTRADA = ["SALARIO", "EXTRAS"]
 DEFAULT_CATEGORIES = ["TRANSPORTE", "MERCADO", "ROUPAS"]
 
+# Tamanho do cache LRU de nomes de categoria normalizados
+CATEGORIA_CACHE_SIZE = int(os.getenv("CATEGORIA_CACHE_SIZE", "4096"))
+# Tamanho do cache dos validadores de valor e data dos fluxos de conversa
+VALIDACAO_CACHE_SIZE = int(os.getenv("VALIDACAO_CACHE_SIZE", "4096"))
+# Quantos pares (tipo, usuário) do /resumo mantêm as colunas NumPy em memória
+RESUMO_CACHE_SIZE = int(os.getenv("RESUMO_CACHE_SIZE", "256"))
+
 # Estados para fluxo de entradas
 (ASK_VALOR, ASK_CAT_ENTRADA, ASK_OBS_ENTRADA, ASK_DATA_ENTRADA) = range(50, 54)
 
 # Estados para relatório de entradas
 (REPORT_CAT_ENTRADA, REPORT_DATE_START_ENTRADA, REPORT_DATE_END_ENTRADA) = range(80, 83)
 
+# Estados para o resumo agregado
+(RESUMO_TIPO, RESUMO_DATE_START, RESUMO_DATE_END) = range(90, 93)
+
 # Estados para fluxo de despesas
 (EXPENSE_VALUE, ASK_COMPROVANTE, WAIT_FOR_PHOTO, EXPENSE_CATEGORY, EXPENSE_DATE, EXPENSE_OBS) = range(1, 7)
 # Estados para relatório de despesas
@@ -45,4 +56,80 @@ DEFAULT_CATEGORIES = ["TRANSPORTE", "MERCADO", "ROUPAS"]
 ADD_SALDO_VALUE = 14
 
 # Estados para gerenciamento de categorias de entrada
-(ADD_CAT_ENTRADA, REMOVE_CAT_ENTRADA, CONFIRM_REMOVE_ENTRADA) = range(60, 63)
+(ADD_CAT_ENTRADA, REMOVE_CAT_ENTRADA) = range(60, 62)
+
+# Estado da importação de extratos
+IMPORTAR_ARQUIVO = 100
+
+# Intervalo (segundos) entre gravações em lote dos dados em memória
+FLUSH_INTERVALO = float(os.getenv("FLUSH_INTERVALO", "2"))
+
+# Snapshots rotativos dos arquivos JSON em data/backups (recuperação automática em caso de corrupção)
+BACKUP_COUNT = int(os.getenv("BACKUP_COUNT", "5"))
+BACKUP_INTERVALO = float(os.getenv("BACKUP_INTERVALO", "300"))
+
+# Diário append-only (registros, saldos e categorias) e sua compactação no snapshot JSON
+JOURNAL_FSYNC = os.getenv("JOURNAL_FSYNC", "1") == "1"
+JOURNAL_MAX_BYTES = int(os.getenv("JOURNAL_MAX_BYTES", str(1024 * 1024)))
+COMPACTACAO_INTERVALO = float(os.getenv("COMPACTACAO_INTERVALO", "3600"))
+
+# Backend de armazenamento: "json" (arquivos em data/) ou "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
+SQLITE_PATH = os.path.join(DATA_DIR, "finfacil.db")
+
+# Máximo de updates processados em paralelo (os de um mesmo usuário seguem em ordem)
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "64"))
+
+# Arquivo local de comprovantes (opcional): fotos baixadas em segundo plano, endereçadas pelo hash do conteúdo
+ARQUIVAR_COMPROVANTES = os.getenv("ARQUIVAR_COMPROVANTES", "0") == "1"
+COMPROVANTES_DIR = os.path.join(DATA_DIR, "comprovantes")
+
+# Importação de extratos (/importar): tamanho máximo do arquivo e erros listados na resposta
+LIMITE_IMPORTACAO = int(os.getenv("LIMITE_IMPORTACAO", str(5 * 1024 * 1024)))
+MAX_ERROS_IMPORTACAO = 10
+
+# Exportação de relatórios: bytes mantidos em memória antes de o arquivo temporário ir para o disco
+EXPORTACAO_MEMORIA = int(os.getenv("EXPORTACAO_MEMORIA", str(1024 * 1024)))
+
+# Modo de recebimento de updates: "polling" (padrão) ou "webhook" (servidor aiohttp próprio)
+BOT_MODO = os.getenv("BOT_MODO", "polling")
+# URL pública registrada no Telegram (vazia = não registra, útil para testes locais com POST manual)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+# Conferido no cabeçalho X-Telegram-Bot-Api-Secret-Token de cada POST; obrigatório para ouvir fora do localhost
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0" if WEBHOOK_SECRET else "127.0.0.1")
+WEBHOOK_PORTA = int(os.getenv("WEBHOOK_PORTA", "8080"))
+
+# Estado das conversas em disco (PicklePersistence); sempre ligado nos workers de shards.py
+PERSISTIR_CONVERSAS = os.getenv("PERSISTIR_CONVERSAS", "0") == "1"
+CONVERSAS_PATH = os.path.join(DATA_DIR, "conversas.pickle")
+PERSISTENCIA_INTERVALO = float(os.getenv("PERSISTENCIA_INTERVALO", "5"))
+
+# Processos worker do roteador de shards (cada um com sua partição de usuários em data/shard_<n>)
+SHARDS = int(os.getenv("SHARDS", "2"))
+
+# I/O bloqueante fora do event loop: threads do pool e tarefas aceitas antes de quem chama ter de esperar
+IO_WORKERS = int(os.getenv("IO_WORKERS", "4"))
+IO_PENDENTES = int(os.getenv("IO_PENDENTES", "32"))
+
+# Fila de envio: limites por segundo (global e por chat privado), por minuto em grupos,
+# rajada tolerada por chat e novas tentativas após um 429 (retry_after)
+ENVIO_GLOBAL = float(os.getenv("ENVIO_GLOBAL", "30"))
+ENVIO_POR_CHAT = float(os.getenv("ENVIO_POR_CHAT", "1"))
+ENVIO_RAJADA_CHAT = int(os.getenv("ENVIO_RAJADA_CHAT", "3"))
+ENVIO_GRUPO_POR_MINUTO = float(os.getenv("ENVIO_GRUPO_POR_MINUTO", "20"))
+ENVIO_TENTATIVAS = int(os.getenv("ENVIO_TENTATIVAS", "3"))
+# Textos seguidos para o mesmo chat que ainda estão na fila viram uma só mensagem
+ENVIO_AGRUPAR = os.getenv("ENVIO_AGRUPAR", "1") == "1"
+
+# Métricas no formato Prometheus em http://METRICAS_HOST:METRICAS_PORTA/metrics (porta 0 desliga o servidor)
+METRICAS_HOST = os.getenv("METRICAS_HOST", "127.0.0.1")
+METRICAS_PORTA = int(os.getenv("METRICAS_PORTA", "9108"))
+# Handlers mais lentos que isso (segundos) geram um aviso no log; 0 desliga
+LIMITE_HANDLER_LENTO = float(os.getenv("LIMITE_HANDLER_LENTO", "1.0"))
+LAG_INTERVALO = 0.5
+
+# Orçamento de cold start (segundos): imports, carga dos dados e montagem do Application.
+# Acima disso a inicialização gera um aviso no log; ver também "python -m benchmark inicio"
+LIMITE_INICIO = float(os.getenv("LIMITE_INICIO", "1.0"))
@@ -1,43 +1,143 @@
-from utils import carregar_json, salvar_json, normalize_category, is_valid_category
-from config import CATEGORIAS_DESPESAS_PATH, DEFAULT_CATEGORIES, CATEGORIAS_ENTRADA_PATH, DEFAULT_CAT_ENTRADA
+from utils import normalize_category, is_valid_category
+from config import DEFAULT_CATEGORIES, DEFAULT_CAT_ENTRADA
+from storage import store
+from agregados import agregados
+from resumo import resumos
+from modelos import Despesa, Entrada
 
+_DEFAULT_NORM = frozenset(normalize_category(c) for c in DEFAULT_CATEGORIES)
+
+# Visões em cache das categorias: {(secao, user_id): (lista, {nome normalizado: nome original})}
+_categorias = {}
+
+def _merge_categories(existing) -> list:
+    # Padrões sempre presentes, seguidos das extras do usuário
+    extras = [cat for cat in existing or [] if normalize_category(cat) not in _DEFAULT_NORM]
+    extras.sort(reverse=True)
+    return [c for c in DEFAULT_CATEGORIES + extras if is_valid_category(c)]
+
+def _visao(secao: str, user_id: str) -> tuple:
+    visao = _categorias.get((secao, user_id))
+    if visao is None:
+        stored = store.get_categorias(secao, user_id)
+        if secao == "categorias_despesas":
+            cat_list = _merge_categories(stored)
+        else:
+            cat_list = stored if stored is not None else DEFAULT_CAT_ENTRADA[:]
+        mapa = {}
+        for c in cat_list:
+            mapa.setdefault(normalize_category(c), c)
+        visao = (cat_list, mapa)
+        _categorias[(secao, user_id)] = visao
+    return visao
+
+# Leitura pura: não grava nada, o reparo acontece na carga ou em update_user_categories
 def get_user_categories(user_id: str) -> list:
-    categorias = carregar_json(CATEGORIAS_DESPESAS_PATH)
-    if user_id not in categorias:
-        categorias[user_id] = DEFAULT_CATEGORIES[:]
-        salvar_json(CATEGORIAS_DESPESAS_PATH, categorias)
-    else:
-        existing = categorias[user_id]
-        # Garante que os padrões estejam presentes
-        for default_cat in DEFAULT_CATEGORIES:
-            if normalize_category(default_cat) not in [normalize_category(c) for c in existing]:
-                existing.append(default_cat)
-        # Separa padrões e extras
-        extras = [cat for cat in existing if normalize_category(cat) not in 
-                  [normalize_category(x) for x in DEFAULT_CATEGORIES]]
-        extras.sort(reverse=True)
-        merged = DEFAULT_CATEGORIES[:] + extras
-        categorias[user_id] = merged
-        salvar_json(CATEGORIAS_DESPESAS_PATH, categorias)
-    cat_list = [c for c in categorias[user_id] if is_valid_category(c)]
-    if len(cat_list) != len(categorias[user_id]):
-        categorias[user_id] = cat_list
-        salvar_json(CATEGORIAS_DESPESAS_PATH, categorias)
-    return categorias[user_id]
+    return _visao("categorias_despesas", user_id)[0]
 
 def update_user_categories(user_id: str, new_list: list):
-    categorias = carregar_json(CATEGORIAS_DESPESAS_PATH)
-    categorias[user_id] = new_list
-    salvar_json(CATEGORIAS_DESPESAS_PATH, categorias)
+    store.set_categorias("categorias_despesas", user_id, _merge_categories(new_list))
+    _categorias.pop(("categorias_despesas", user_id), None)
+
+def user_has_category(user_id: str, cat_norm: str) -> bool:
+    return cat_norm in _visao("categorias_despesas", user_id)[1]
 
 def get_user_cat_entrada(user_id: str) -> list:
-    cat_entrada = carregar_json(CATEGORIAS_ENTRADA_PATH)
-    if user_id not in cat_entrada:
-        cat_entrada[user_id] = DEFAULT_CAT_ENTRADA[:]
-        salvar_json(CATEGORIAS_ENTRADA_PATH, cat_entrada)
-    return cat_entrada[user_id]
+    return _visao("categorias_entrada", user_id)[0]
 
 def update_user_cat_entrada(user_id: str, new_list: list):
-    cat_entrada = carregar_json(CATEGORIAS_ENTRADA_PATH)
-    cat_entrada[user_id] = new_list
-    salvar_json(CATEGORIAS_ENTRADA_PATH, cat_entrada)
+    store.set_categorias("categorias_entrada", user_id, new_list)
+    _categorias.pop(("categorias_entrada", user_id), None)
+
+def find_user_cat_entrada(user_id: str, cat_norm: str):
+    return _visao("categorias_entrada", user_id)[1].get(cat_norm)
+
+def get_user_mapas_categorias(user_id: str) -> tuple:
+    # Cópias de {nome normalizado: nome gravado} de despesas e de entradas, para consultas fora do
+    # event loop (o store e o cache de visões só podem ser lidos na thread do loop)
+    return dict(_visao("categorias_despesas", user_id)[1]), dict(_visao("categorias_entrada", user_id)[1])
+
+def reparar_categorias() -> int:
+    # Executado uma vez na inicialização: grava padrões e remove nomes inválidos
+    reparados = 0
+    for user_id, existing in list(store.todas_categorias("categorias_despesas").items()):
+        merged = _merge_categories(existing)
+        if merged != existing:
+            store.set_categorias("categorias_despesas", user_id, merged)
+            reparados += 1
+    _categorias.clear()
+    return reparados
+
+# Durabilidade: aguarda o fsync (agrupado) das gravações feitas até aqui
+async def persistir():
+    await store.sincronizar()
+
+# Saldo
+def user_exists(user_id: str) -> bool:
+    return store.usuario_existe(user_id)
+
+def get_user_saldo(user_id: str):
+    return store.get_saldo(user_id)
+
+def get_user_totais_mes(user_id: str, tipo: str, mes: str) -> dict:
+    return agregados.totais_mes(user_id, tipo, mes)
+
+def get_user_total_mes(user_id: str, tipo: str, mes: str) -> int:
+    return agregados.total_mes(user_id, tipo, mes)
+
+# Despesas
+def get_user_despesas(user_id: str) -> list:
+    return store.listar_despesas(user_id)
+
+def get_user_despesas_por_id(user_id: str, ids) -> dict:
+    return store.obter_despesas(user_id, ids)
+
+# Inclusões e remoções passam pelos agregados, que mantêm saldo e totais mensais em dia
+def add_user_despesa(user_id: str, despesa: Despesa) -> Despesa:
+    despesa = store.adicionar_despesa(user_id, despesa)
+    agregados.registrar(user_id, "despesas", [despesa])
+    resumos.acrescentar("despesas", user_id, [despesa])
+    return despesa
+
+def remove_user_despesas_categoria(user_id: str, cat_norm: str) -> list:
+    removidas = store.remover_despesas_categoria(user_id, cat_norm)
+    agregados.registrar(user_id, "despesas", removidas, sinal=-1)
+    resumos.invalidar("despesas", user_id)
+    return removidas
+
+def query_user_despesas(user_id: str, inicio=None, fim=None, categoria=None) -> list:
+    return store.consultar_despesas(user_id, inicio, fim, categoria)
+
+def set_user_comprovante_local(user_id: str, despesa_id: int, caminho: str):
+    store.definir_comprovante_local(user_id, despesa_id, caminho)
+
+# Entradas
+def get_user_entradas(user_id: str) -> list:
+    return store.listar_entradas(user_id)
+
+def query_user_entradas(user_id: str, inicio=None, fim=None, categoria=None) -> list:
+    return store.consultar_entradas(user_id, inicio, fim, categoria)
+
+def add_user_entrada(user_id: str, entrada: Entrada) -> Entrada:
+    entrada = store.adicionar_entrada(user_id, entrada)
+    agregados.registrar(user_id, "entradas", [entrada])
+    resumos.acrescentar("entradas", user_id, [entrada])
+    return entrada
+
+# Importação em lote: uma gravação por seção e um único ajuste de saldo
+def import_user_registros(user_id: str, despesas: list, entradas: list):
+    despesas = store.adicionar_despesas(user_id, despesas)
+    entradas = store.adicionar_entradas(user_id, entradas)
+    saldo = agregados.registrar_lote(user_id, {"despesas": despesas, "entradas": entradas})
+    resumos.acrescentar("despesas", user_id, despesas)
+    resumos.acrescentar("entradas", user_id, entradas)
+    return saldo
+
+# Resumo agregado (totais, médias e contagens por categoria e mês)
+def get_user_resumo(user_id: str, tipo: str, inicio=None, fim=None) -> dict:
+    carregar = store.listar_despesas if tipo == "despesas" else store.listar_entradas
+    colunas = resumos.colunas(tipo, user_id, carregar)
+    return colunas.resumir(
+        inicio.toordinal() if inicio is not None else None,
+        fim.toordinal() if fim is not None else None,
+    )
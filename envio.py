@@ -0,0 +1,228 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from metricas import envio_retry_after, envio_agrupadas, envio_espera
+from config import (
+    ENVIO_GLOBAL, ENVIO_POR_CHAT, ENVIO_RAJADA_CHAT, ENVIO_GRUPO_POR_MINUTO, ENVIO_TENTATIVAS, ENVIO_AGRUPAR,
+    LIMITE_MENSAGEM
+)
+
+logger = logging.getLogger(__name__)
+
+# Fila de saída para a Bot API: cada chat tem a sua fila (ordem preservada) e o seu balde de fichas,
+# e todo envio a um chat também consome do balde global. Um 429 pausa todos os envios pelo
+# retry_after informado e a chamada é repetida. Textos que se acumulam na fila de um chat enquanto
+# ele espera ficha são unidos em uma única mensagem quando isso não muda o que o usuário vê.
+# Pedidos sem chat_id (answerCallbackQuery, getFile...) só passam pelo tratamento de 429.
+# Por chamada: reply_text(..., rate_limit_args={"agrupar": False}) impede a junção.
+
+# Só textos com estes campos podem ser unidos (entidades, respostas, silenciosas etc. não)
+CAMPOS_AGRUPAVEIS = frozenset(("chat_id", "text", "parse_mode", "reply_markup"))
+SEPARADOR = "\n\n"
+
+class Balde:
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.fichas = capacidade
+        self.atualizado = time.monotonic()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+
+    def espera(self) -> float:
+        # Segundos até haver uma ficha inteira
+        self._repor()
+        return 0.0 if self.fichas >= 1 else (1 - self.fichas) / self.taxa
+
+    async def adquirir(self):
+        while (espera := self.espera()) > 0:
+            await asyncio.sleep(espera)
+        self.fichas -= 1
+
+    def cheio(self) -> bool:
+        self._repor()
+        return self.fichas >= self.capacidade
+
+class _Envio:
+    __slots__ = ("callback", "args", "kwargs", "endpoint", "data", "opcoes", "futuro", "criado")
+
+    def __init__(self, callback, args, kwargs, endpoint, data, opcoes, futuro):
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.endpoint = endpoint
+        self.data = data
+        self.opcoes = opcoes
+        self.futuro = futuro
+        self.criado = time.monotonic()
+
+class _Chat:
+    __slots__ = ("balde", "fila", "tarefa")
+
+    def __init__(self, balde: Balde):
+        self.balde = balde
+        self.fila = deque()
+        self.tarefa = None
+
+def _chave_chat(chat_id):
+    try:
+        return int(chat_id)
+    except (TypeError, ValueError):
+        # @canal: só canais e supergrupos aceitam chat_id em texto
+        return str(chat_id)
+
+def _grupo(chave) -> bool:
+    return isinstance(chave, str) or chave < 0
+
+def _agrupavel(ultimo: _Envio, proximo: _Envio, tamanho: int) -> bool:
+    # O teclado fica sempre na última mensagem: só une se a anterior não tiver um
+    return (
+        ENVIO_AGRUPAR
+        and ultimo.endpoint == proximo.endpoint == "sendMessage"
+        and ultimo.opcoes.get("agrupar", True) and proximo.opcoes.get("agrupar", True)
+        and CAMPOS_AGRUPAVEIS.issuperset(ultimo.data) and CAMPOS_AGRUPAVEIS.issuperset(proximo.data)
+        and "reply_markup" not in ultimo.data
+        and ultimo.data.get("parse_mode") == proximo.data.get("parse_mode")
+        and tamanho + len(SEPARADOR) + len(proximo.data.get("text", "")) <= LIMITE_MENSAGEM
+    )
+
+def _unir(grupo: list):
+    # Mesmos callback e timeouts do último pedido, com o texto de todos
+    ultimo = grupo[-1]
+    data = dict(ultimo.data)
+    data["text"] = SEPARADOR.join(envio.data["text"] for envio in grupo)
+    return ultimo.callback, (ultimo.endpoint, data) + tuple(ultimo.args[2:]), ultimo.kwargs
+
+class FilaEnvio(BaseRateLimiter):
+    def __init__(self, global_por_segundo: float = ENVIO_GLOBAL, por_chat: float = ENVIO_POR_CHAT,
+                 rajada_chat: int = ENVIO_RAJADA_CHAT, grupo_por_minuto: float = ENVIO_GRUPO_POR_MINUTO,
+                 tentativas: int = ENVIO_TENTATIVAS):
+        self.global_por_segundo = global_por_segundo
+        self.por_chat = por_chat
+        self.rajada_chat = rajada_chat
+        self.grupo_por_minuto = grupo_por_minuto
+        self.tentativas = tentativas
+        self._global = None
+        self._trava_global = None
+        self._pausa_ate = 0.0
+        self._chats = {}
+
+    async def initialize(self):
+        # Sem rajada no global: o limite do Telegram vale para qualquer janela de 1 s
+        self._global = Balde(self.global_por_segundo, 1)
+        self._trava_global = asyncio.Lock()
+
+    async def shutdown(self):
+        tarefas = [chat.tarefa for chat in self._chats.values() if chat.tarefa is not None]
+        if tarefas:
+            await asyncio.gather(*tarefas, return_exceptions=True)
+        self._chats.clear()
+
+    def _chat(self, chave) -> _Chat:
+        chat = self._chats.get(chave)
+        if chat is None:
+            if _grupo(chave):
+                balde = Balde(self.grupo_por_minuto / 60, self.rajada_chat)
+            else:
+                balde = Balde(self.por_chat, self.rajada_chat)
+            chat = self._chats[chave] = _Chat(balde)
+        return chat
+
+    async def _aguardar_pausa(self):
+        while (espera := self._pausa_ate - time.monotonic()) > 0:
+            await asyncio.sleep(espera)
+
+    async def _chamar(self, callback, args, kwargs, endpoint: str, limitar: bool, tentativas: int):
+        for tentativa in range(tentativas + 1):
+            await self._aguardar_pausa()
+            if limitar:
+                # Fila justa no balde global: quem chegou antes envia antes
+                async with self._trava_global:
+                    await self._global.adquirir()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as erro:
+                envio_retry_after.inc(metodo=endpoint)
+                if tentativa == tentativas:
+                    logger.error("Flood control persistente em %s após %d tentativa(s)", endpoint, tentativas)
+                    raise
+                espera = erro.retry_after
+                espera = espera.total_seconds() if hasattr(espera, "total_seconds") else float(espera)
+                logger.warning("Flood control em %s: pausando envios por %.1f s", endpoint, espera)
+                self._pausa_ate = max(self._pausa_ate, time.monotonic() + espera + 0.1)
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        opcoes = rate_limit_args or {}
+        tentativas = opcoes.get("tentativas", self.tentativas)
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            return await self._chamar(callback, args, kwargs, endpoint, False, tentativas)
+        chave = _chave_chat(chat_id)
+        chat = self._chat(chave)
+        futuro = asyncio.get_running_loop().create_future()
+        chat.fila.append(_Envio(callback, args, kwargs, endpoint, data, opcoes, futuro))
+        if chat.tarefa is None:
+            chat.tarefa = asyncio.get_running_loop().create_task(self._esvaziar(chave, chat))
+        return await futuro
+
+    async def _esvaziar(self, chave, chat: _Chat):
+        try:
+            while chat.fila:
+                await chat.balde.adquirir()
+                # Pedidos cujo chamador desistiu (cancelado) não são enviados
+                while chat.fila and chat.fila[0].futuro.done():
+                    chat.fila.popleft()
+                if not chat.fila:
+                    break
+                grupo = [chat.fila.popleft()]
+                tamanho = len(grupo[0].data.get("text", ""))
+                while chat.fila and (chat.fila[0].futuro.done() or _agrupavel(grupo[-1], chat.fila[0], tamanho)):
+                    proximo = chat.fila.popleft()
+                    if not proximo.futuro.done():
+                        grupo.append(proximo)
+                        tamanho += len(SEPARADOR) + len(proximo.data["text"])
+                await self._enviar(grupo)
+        finally:
+            chat.tarefa = None
+            if chat.fila:
+                chat.tarefa = asyncio.get_running_loop().create_task(self._esvaziar(chave, chat))
+            else:
+                self._descartar_ocioso(chave, chat)
+
+    async def _enviar(self, grupo: list):
+        if len(grupo) == 1:
+            envio = grupo[0]
+            callback, args, kwargs = envio.callback, envio.args, envio.kwargs
+        else:
+            envio_agrupadas.inc(len(grupo) - 1)
+            callback, args, kwargs = _unir(grupo)
+        agora = time.monotonic()
+        for envio in grupo:
+            envio_espera.observar(agora - envio.criado)
+        tentativas = min(envio.opcoes.get("tentativas", self.tentativas) for envio in grupo)
+        try:
+            resultado = await self._chamar(callback, args, kwargs, grupo[-1].endpoint, True, tentativas)
+        except Exception as erro:
+            for envio in grupo:
+                if not envio.futuro.done():
+                    envio.futuro.set_exception(erro)
+        else:
+            # Todos os chamadores de um grupo recebem a mesma mensagem enviada
+            for envio in grupo:
+                if not envio.futuro.done():
+                    envio.futuro.set_result(resultado)
+
+    def _descartar_ocioso(self, chave, chat: _Chat):
+        # O balde só pode ser esquecido depois de cheio de novo, senão a rajada seria liberada cedo
+        if chat.balde.cheio():
+            if chat.tarefa is None and not chat.fila and self._chats.get(chave) is chat:
+                del self._chats[chave]
+            return
+        espera = (chat.balde.capacidade - chat.balde.fichas) / chat.balde.taxa
+        asyncio.get_running_loop().call_later(espera, self._descartar_ocioso, chave, chat)
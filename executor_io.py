@@ -0,0 +1,34 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from config import IO_WORKERS, IO_PENDENTES
+
+# Pool limitado para leitura/gravação de arquivos e serialização. Com IO_PENDENTES tarefas em
+# andamento, novos pedidos aguardam uma vaga (back-pressure) em vez de acumular na fila do pool
+class ExecutorIO:
+    def __init__(self, workers: int = IO_WORKERS, pendentes: int = IO_PENDENTES):
+        self.workers = workers
+        self.pendentes = pendentes
+        self._pool = None
+        self._vagas = None
+
+    def _preparar(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="io")
+        if self._vagas is None:
+            self._vagas = asyncio.Semaphore(self.pendentes)
+
+    async def executar(self, func, *args, **kwargs):
+        self._preparar()
+        async with self._vagas:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool, functools.partial(func, *args, **kwargs)
+            )
+
+    def encerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self._vagas = None
+
+executor = ExecutorIO()
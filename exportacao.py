@@ -0,0 +1,49 @@
+import csv
+import codecs
+import tempfile
+from importlib.util import find_spec
+from utils import formatar_valor
+from config import EXPORTACAO_MEMORIA
+
+# XLSX é opcional; o openpyxl (~100 ms de import) só é carregado na primeira exportação
+XLSX_DISPONIVEL = find_spec("openpyxl") is not None
+
+COLUNAS = {
+    "despesas": ("ID", "Data", "Valor", "Categoria", "Observação", "Comprovante"),
+    "entradas": ("ID", "Data", "Valor", "Categoria", "Observação"),
+}
+
+FORMATOS = ("csv", "xlsx") if XLSX_DISPONIVEL else ("csv",)
+
+def linhas(tipo: str, registros):
+    # Uma linha por registro, gerada sob demanda
+    for r in registros:
+        linha = [r.id, r.data, formatar_valor(r.centavos), r.categoria, r.observacao]
+        if tipo == "despesas":
+            linha.append("Sim" if r.comprovante else "Não")
+        yield linha
+
+def _csv(tipo: str, registros, destino):
+    # StreamWriter em vez de TextIOWrapper: o SpooledTemporaryFile só ganhou readable/writable no 3.11
+    texto = codecs.getwriter("utf-8-sig")(destino)
+    escritor = csv.writer(texto, delimiter=";")
+    escritor.writerow(COLUNAS[tipo])
+    escritor.writerows(linhas(tipo, registros))
+
+def _xlsx(tipo: str, registros, destino):
+    # Modo write_only: as linhas vão direto para o arquivo, sem manter a planilha em memória
+    from openpyxl import Workbook
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet(tipo.capitalize())
+    planilha.append(COLUNAS[tipo])
+    for linha in linhas(tipo, registros):
+        linha[2] = float(linha[2])
+        planilha.append(linha)
+    livro.save(destino)
+
+def exportar(tipo: str, registros, formato: str = "csv"):
+    # Arquivo temporário que só vai para o disco acima de EXPORTACAO_MEMORIA bytes; quem chama fecha
+    destino = tempfile.SpooledTemporaryFile(max_size=EXPORTACAO_MEMORIA)
+    (_xlsx if formato == "xlsx" else _csv)(tipo, registros, destino)
+    destino.seek(0)
+    return destino
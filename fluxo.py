@@ -0,0 +1,173 @@
+import importlib
+from telegram import ReplyKeyboardMarkup, ReplyKeyboardRemove
+from telegram.ext import CommandHandler, ConversationHandler, MessageHandler, filters
+from validadores import Invalido
+
+# Motor de fluxos de conversa. Cada fluxo é uma especificação (fluxos.py): passos com a pergunta,
+# o teclado, o validador e a chave em user_data onde o valor fica. compilar() transforma a
+# especificação em um ConversationHandler uma única vez, na inicialização.
+#
+# Um passo validado segue para `proximo` (o passo seguinte da lista, se omitido) e o motor envia a
+# pergunta do destino; FIM chama a conclusão do fluxo. Quem precisa de regra própria usa `acao`
+# (chamada com o valor já validado; devolve o próximo estado como um handler comum, ou None para
+# seguir o caminho padrão) ou `tratar` (um handler comum no lugar do passo inteiro).
+# Alvos em texto ("módulo:função") só são importados no primeiro uso.
+
+TEXTO = filters.TEXT & ~filters.COMMAND
+FIM = "fim"
+REMOVER = "remover"
+# Todos os fluxos terminam com /cancelar
+CANCELAR = "handlers.basic:cancelar"
+
+def carregar_alvo(alvo: str):
+    modulo, nome = alvo.split(":")
+    return getattr(importlib.import_module(modulo), nome)
+
+def preguicoso(alvo, nome: str = None):
+    # Callback que importa o módulo do alvo na primeira chamada e depois só repassa
+    if callable(alvo):
+        return alvo
+    func = None
+
+    async def callback(*args):
+        nonlocal func
+        if func is None:
+            func = carregar_alvo(alvo)
+        return await func(*args)
+
+    callback.__name__ = callback.__qualname__ = nome or alvo.split(":")[1]
+    return callback
+
+def _ler_texto(message):
+    return message.text
+
+class Passo:
+    def __init__(self, estado, nome: str, pergunta=None, teclado=None, validar=None, erros=None, chave: str = None,
+                 guardar=None, proximo=None, acao=None, aviso: str = None, tratar=None, filtro=TEXTO,
+                 ler=_ler_texto, parse_mode: str = None):
+        self.estado = estado
+        self.nome = nome
+        # pergunta: texto ou função(user_id) -> texto; teclado: linhas, função(user_id) -> linhas ou REMOVER
+        self.pergunta = pergunta
+        self.teclado = teclado
+        # validar(texto, user_id) -> valor ou Invalido(motivo); erros: motivo -> texto ou função(user_id)
+        self.validar = validar
+        self.erros = erros or {}
+        # chave em user_data e conversão opcional antes de guardar (ex.: data em dd/mm/yyyy)
+        self.chave = chave
+        self.guardar = guardar
+        # proximo: estado, FIM ou função(valor) -> estado/FIM
+        self.proximo = proximo
+        self.acao = preguicoso(acao, nome) if acao is not None else None
+        # Enviado antes da conclusão quando este passo leva a FIM
+        self.aviso = aviso
+        self.tratar = preguicoso(tratar, nome) if tratar is not None else None
+        self.filtro = filtro
+        self.ler = ler
+        self.parse_mode = parse_mode
+
+def _markup(linhas):
+    return ReplyKeyboardMarkup(linhas, one_time_keyboard=True, resize_keyboard=True)
+
+class Fluxo:
+    def __init__(self, nome: str, entradas: dict, passos: list, concluir=None, limpar: tuple = ()):
+        # entradas: comando -> estado do primeiro passo (o motor pergunta) ou alvo de um handler próprio
+        self.nome = nome
+        self.entradas = entradas
+        self.passos = {passo.estado: passo for passo in passos}
+        self.concluir = preguicoso(concluir, f"{nome}_concluir") if concluir is not None else None
+        # Chaves de user_data zeradas a cada início, para não herdar valores de um fluxo anterior
+        self.limpar = tuple(passo.chave for passo in passos if passo.chave) + tuple(limpar)
+        self._seguinte = {}
+        for atual, seguinte in zip(passos, passos[1:] + [None]):
+            self._seguinte[atual.estado] = seguinte.estado if seguinte is not None else FIM
+        # Teclados fixos montados uma vez só
+        self._teclados = {
+            passo.estado: ReplyKeyboardRemove() if passo.teclado == REMOVER else _markup(passo.teclado)
+            for passo in passos if isinstance(passo.teclado, list) or passo.teclado == REMOVER
+        }
+        self.callbacks = {}
+
+    # Transições
+    async def _perguntar(self, passo: Passo, update, user_id: str):
+        texto = passo.pergunta(user_id) if callable(passo.pergunta) else passo.pergunta
+        markup = self._teclados.get(passo.estado)
+        if markup is None and callable(passo.teclado):
+            markup = _markup(passo.teclado(user_id))
+        await update.message.reply_text(texto, parse_mode=passo.parse_mode, reply_markup=markup)
+
+    async def ir(self, destino, update, context, origem: Passo = None):
+        if destino == FIM:
+            if origem is not None and origem.aviso:
+                await update.message.reply_text(origem.aviso, parse_mode=origem.parse_mode, reply_markup=ReplyKeyboardRemove())
+            return await self.concluir(update, context)
+        passo = self.passos.get(destino)
+        if passo is None:
+            return destino
+        if passo.pergunta is not None:
+            await self._perguntar(passo, update, str(update.message.from_user.id))
+        return destino
+
+    def _destino(self, passo: Passo, valor):
+        if passo.proximo is None:
+            return self._seguinte[passo.estado]
+        return passo.proximo(valor) if callable(passo.proximo) else passo.proximo
+
+    # Handlers compilados
+    def _entrada(self, comando: str, estado):
+        async def callback(update, context):
+            for chave in self.limpar:
+                context.user_data.pop(chave, None)
+            return await self.ir(estado, update, context)
+
+        callback.__name__ = callback.__qualname__ = comando
+        return callback
+
+    def _passo(self, passo: Passo):
+        if passo.tratar is not None:
+            return passo.tratar
+
+        async def callback(update, context):
+            user_id = str(update.message.from_user.id)
+            valor = passo.ler(update.message)
+            if passo.validar is not None:
+                try:
+                    valor = passo.validar(valor, user_id)
+                except Invalido as erro:
+                    mensagem = passo.erros.get(erro.motivo) or passo.erros["formato"]
+                    if callable(mensagem):
+                        mensagem = mensagem(user_id)
+                    await update.message.reply_text(mensagem, parse_mode=passo.parse_mode)
+                    return passo.estado
+            if passo.chave:
+                context.user_data[passo.chave] = passo.guardar(valor) if passo.guardar else valor
+            if passo.acao is not None:
+                destino = await passo.acao(update, context, valor)
+                if destino is not None:
+                    return destino
+            return await self.ir(self._destino(passo, valor), update, context, passo)
+
+        callback.__name__ = callback.__qualname__ = passo.nome
+        return callback
+
+    def callback(self, estado):
+        # Handler compilado de um passo (usado pelo ConversationHandler e pelos benchmarks)
+        if estado not in self.callbacks:
+            self.callbacks[estado] = self._passo(self.passos[estado])
+        return self.callbacks[estado]
+
+    def compilar(self, persistente: bool = False) -> ConversationHandler:
+        entradas = [
+            CommandHandler(comando, preguicoso(alvo) if isinstance(alvo, str) else self._entrada(comando, alvo))
+            for comando, alvo in self.entradas.items()
+        ]
+        return ConversationHandler(
+            entry_points=entradas,
+            states={
+                estado: [MessageHandler(passo.filtro, self.callback(estado))]
+                for estado, passo in self.passos.items()
+            },
+            fallbacks=[CommandHandler("cancelar", preguicoso(CANCELAR))],
+            name=self.nome,
+            persistent=persistente
+        )
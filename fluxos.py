@@ -0,0 +1,278 @@
+from telegram.ext import filters
+from data_manager import get_user_categories, get_user_cat_entrada
+from fluxo import Fluxo, Passo, FIM, REMOVER
+import validadores as v
+from config import (
+    ASK_VALOR, ASK_CAT_ENTRADA, ASK_OBS_ENTRADA, ASK_DATA_ENTRADA, ADD_CAT_ENTRADA, REMOVE_CAT_ENTRADA,
+    EXPENSE_VALUE, ASK_COMPROVANTE, WAIT_FOR_PHOTO, EXPENSE_CATEGORY, EXPENSE_DATE, EXPENSE_OBS,
+    REPORT_CATEGORY, REPORT_DATE_START, REPORT_DATE_END, REPORT_PROV,
+    REPORT_CAT_ENTRADA, REPORT_DATE_START_ENTRADA, REPORT_DATE_END_ENTRADA,
+    RESUMO_TIPO, RESUMO_DATE_START, RESUMO_DATE_END, ADD_CAT, REMOVE_CAT, CONFIRM_REMOVE, IMPORTAR_ARQUIVO
+)
+
+# Especificação de todos os fluxos de conversa: o nome é a chave da persistência e os estados são os
+# de config, então conversas gravadas antes continuam válidas. A regra de negócio fica nos handlers
+# (conclusões e ações); aqui só o roteiro de perguntas, validações e mensagens de erro.
+
+SEM_FILTROS = [[v.SEM_FILTROS], ["/cancelar"]]
+
+def _data_br(data_obj):
+    return data_obj.strftime("%d/%m/%Y")
+
+def _lista(cat_list) -> str:
+    return "\n".join(cat_list)
+
+def _ate_fim_ou(estado):
+    # Passos de data com "SEM FILTROS": None encerra o fluxo sem perguntar a data seguinte
+    return lambda data_obj: FIM if data_obj is None else estado
+
+def _teclado_categorias(consulta, geral: bool = False, ordenar: bool = False):
+    def teclado(user_id: str):
+        cat_list = consulta(user_id)
+        linhas = [[cat] for cat in (sorted(cat_list) if ordenar else cat_list)]
+        if geral:
+            linhas.append([v.GERAL])
+        linhas.append(["/cancelar"])
+        return linhas
+    return teclado
+
+# Entradas
+def _pergunta_cat_entrada(user_id: str) -> str:
+    return "Escolha a categoria desta entrada:\n" + "\n".join(sorted(get_user_cat_entrada(user_id)))
+
+def _pergunta_add_cat_entrada(user_id: str) -> str:
+    return (
+        "📥 <b>Digite o nome da categoria de entrada a adicionar:</b>\n\n"
+        "Suas categorias atuais:\n" + "\n".join(sorted(get_user_cat_entrada(user_id)))
+    )
+
+def _pergunta_remove_cat_entrada(user_id: str) -> str:
+    return (
+        "✂️ <b>Digite o nome da categoria de entrada a remover:</b>\n"
+        "Suas categorias:\n" + "\n".join(sorted(get_user_cat_entrada(user_id)))
+    )
+
+ADICIONAR_SALDO = Fluxo(
+    "add_saldo_conv",
+    entradas={"adicionar_saldo": ASK_VALOR},
+    passos=[
+        Passo(ASK_VALOR, "ask_valor_saldo", chave="valor_entrada", validar=v.valor,
+              pergunta="Qual valor deseja adicionar ao saldo? Ex: 300 ou 300,50",
+              erros={"formato": "❌ Valor inválido. Digite um número, ex: 300,00",
+                     "nao_positivo": "❌ O valor precisa ser maior que 0. Tente novamente:"}),
+        Passo(ASK_CAT_ENTRADA, "ask_cat_entrada", chave="cat_entrada", validar=v.categoria_entrada,
+              pergunta=_pergunta_cat_entrada, teclado=_teclado_categorias(get_user_cat_entrada),
+              erros={"formato": "Categoria inválida! Tente novamente ou /cancelar."}),
+        Passo(ASK_OBS_ENTRADA, "ask_obs_entrada", chave="obs_entrada", validar=v.observacao,
+              pergunta="Digite uma observação para esta entrada ou 'NADA' para pular:"),
+        Passo(ASK_DATA_ENTRADA, "ask_data_entrada", chave="data_entrada", validar=v.data, guardar=_data_br,
+              pergunta="Digite a data da entrada (dd/mm/yyyy) ou /cancelar:", parse_mode="HTML",
+              erros={"formato": "Data inválida! Use o formato dd/mm/yyyy ou /cancelar.",
+                     "futura": "⚠️ A data não pode ser futura. Informe uma data válida (dd/mm/yyyy):"}),
+    ],
+    concluir="handlers.entradas:registrar_entrada",
+)
+
+CATEGORIAS_ENTRADA = Fluxo(
+    "cat_entrada_conv",
+    entradas={"adicionar_cat_entrada": ADD_CAT_ENTRADA, "remover_cat_entrada": REMOVE_CAT_ENTRADA},
+    passos=[
+        Passo(ADD_CAT_ENTRADA, "process_add_cat_entrada", validar=v.texto,
+              pergunta=_pergunta_add_cat_entrada, parse_mode="HTML",
+              erros={"formato": "❌ Digite o nome da categoria ou /cancelar."},
+              acao="handlers.entradas:adicionar_cat_entrada"),
+        Passo(REMOVE_CAT_ENTRADA, "process_remove_cat_entrada", validar=v.categoria_entrada,
+              pergunta=_pergunta_remove_cat_entrada, parse_mode="HTML",
+              erros={"formato": "❌ Categoria não encontrada! Digite um nome válido ou /cancelar."},
+              acao="handlers.entradas:remover_cat_entrada"),
+    ],
+)
+
+# Despesas
+def _pergunta_categoria(user_id: str) -> str:
+    return (
+        "Em qual categoria essa despesa se encaixa? 🗃️\n" +
+        "\n".join(sorted(get_user_categories(user_id))) +
+        "\n\nPara adicionar uma nova categoria, utilize <b>/adicionar_cat_despesas</b>."
+    )
+
+def _pergunta_add_cat(user_id: str) -> str:
+    return (
+        "📥 <b>Digite o nome da categoria a adicionar:</b>\n\n"
+        "Suas categorias atuais:\n" + "\n".join(sorted(get_user_categories(user_id)))
+    )
+
+def _pergunta_remove_cat(user_id: str) -> str:
+    return (
+        "✂️ <b>Digite o nome da categoria a remover:</b>\n"
+        "Suas categorias:\n" + "\n".join(sorted(get_user_categories(user_id)))
+    )
+
+def _ler_foto(message):
+    return message.photo[-1]
+
+ADICIONAR_DESPESA = Fluxo(
+    "expense_conv_handler",
+    entradas={"adicionar_despesas": EXPENSE_VALUE},
+    passos=[
+        Passo(EXPENSE_VALUE, "expense_value", chave="expense_value", validar=v.valor,
+              pergunta="Tudo bem! 💸\nVamos lá, qual o valor da despesa?",
+              erros={"formato": "⚠️ Informe um valor numérico. Ex: 100 ou 100,50",
+                     "nao_positivo": "❌ O valor deve ser maior que 0. Tente novamente."}),
+        Passo(ASK_COMPROVANTE, "ask_comprovante", validar=v.sim_nao,
+              pergunta="Gostaria de adicionar um comprovante? (SIM/NAO)", teclado=[["SIM", "NÃO"], ["/cancelar"]],
+              erros={"formato": "⚠️ Responda apenas SIM ou NAO."},
+              proximo=lambda sim: WAIT_FOR_PHOTO if sim else EXPENSE_CATEGORY),
+        Passo(WAIT_FOR_PHOTO, "receive_photo", filtro=filters.PHOTO, ler=_ler_foto,
+              pergunta="📸 Por favor, envie a foto do comprovante.",
+              acao="handlers.despesas:guardar_comprovante"),
+        Passo(EXPENSE_CATEGORY, "expense_category", chave="expense_category", validar=v.categoria_despesa,
+              pergunta=_pergunta_categoria, teclado=_teclado_categorias(get_user_categories, ordenar=True),
+              parse_mode="HTML",
+              erros={"formato": "❌ <b>Categoria não encontrada. Tente novamente.</b>\n\nPara adicioná-la, use "
+                                "<b>/adicionar_cat_despesas</b> ou <b>/cancelar</b> para parar operação."}),
+        Passo(EXPENSE_DATE, "expense_date", chave="expense_date", validar=v.data, guardar=_data_br,
+              pergunta="Informe a data da despesa. \n\n❗Exemplo: 01/01/2000", teclado=REMOVER, parse_mode="HTML",
+              erros={"formato": "⚠️ Data inválida. \n\nUtilize o formato dd/mm/yyyy:",
+                     "futura": "⚠️ A data não pode ser futura. Tente novamente ou /cancelar."}),
+        Passo(EXPENSE_OBS, "expense_obs", chave="expense_obs", validar=v.observacao,
+              pergunta="Digite uma observação para a despesa ou 'NADA' para pular:"),
+    ],
+    concluir="handlers.despesas:registrar_despesa",
+    limpar=("comprovante", "comprovante_unico"),
+)
+
+CATEGORIAS_DESPESA = Fluxo(
+    "category_conv_handler",
+    entradas={"adicionar_cat_despesas": ADD_CAT, "remover_cat_despesas": REMOVE_CAT},
+    passos=[
+        Passo(ADD_CAT, "process_add_categoria", validar=v.nova_categoria_despesa,
+              pergunta=_pergunta_add_cat, parse_mode="HTML",
+              erros={"geral": "🚫 <b>A categoria 'GERAL' não pode ser criada!</b>\nEscolha outro nome."},
+              acao="handlers.despesas:adicionar_categoria"),
+        Passo(REMOVE_CAT, "process_remove_categoria", validar=v.categoria_despesa,
+              pergunta=_pergunta_remove_cat, parse_mode="HTML",
+              erros={"formato": "❌ <b>Entrada inválida!</b> Digite o nome de uma categoria válida ou /cancelar.",
+                     "inexistente": "❌ <b>Categoria não encontrada!</b> Digite um nome válido ou /cancelar."},
+              acao="handlers.despesas:remover_categoria"),
+        Passo(CONFIRM_REMOVE, "confirmar_remove_categoria", validar=v.sim_nao, parse_mode="HTML",
+              erros={"formato": "❌ <b>Resposta inválida!</b> Digite <b>SIM</b> para confirmar ou <b>NAO</b> para cancelar."},
+              acao="handlers.despesas:confirmar_remove_categoria"),
+    ],
+)
+
+# Relatórios
+def _pergunta_relatorio_despesas(user_id: str) -> str:
+    return (
+        "📊 <b>Para gerar o relatório:</b>\n"
+        "• Digite o nome de uma categoria ou 'GERAL' para todas.\n\n"
+        "Suas categorias:\n" + _lista(get_user_categories(user_id)) +
+        "\n\nDigite /cancelar para parar a operação."
+    )
+
+def _erro_relatorio_despesas(user_id: str) -> str:
+    return (
+        "❌ <b>Categoria não encontrada!</b> Por favor, digite uma categoria existente ou 'GERAL'.\n\n"
+        "Suas categorias:\n" + _lista(get_user_categories(user_id)) +
+        "\n\nDigite /cancelar para parar a operação."
+    )
+
+def _pergunta_relatorio_entradas(user_id: str) -> str:
+    return (
+        "📊 <b>Relatório de Entradas:</b>\n\n"
+        "• Digite o nome de uma categoria ou 'GERAL' para todas.\n\n"
+        "Suas categorias de entrada:\n" + _lista(get_user_cat_entrada(user_id)) +
+        "\n\nDigite /cancelar para parar a operação."
+    )
+
+def _erro_relatorio_entradas(user_id: str) -> str:
+    return (
+        "❌ Categoria não encontrada! Digite uma categoria existente ou 'GERAL'.\n\n"
+        "Suas categorias:\n" + _lista(get_user_cat_entrada(user_id)) +
+        "\n\nOu /cancelar para parar."
+    )
+
+RELATORIO_DESPESAS = Fluxo(
+    "report_conv_handler",
+    entradas={"relatorio_despesas": REPORT_CATEGORY},
+    passos=[
+        Passo(REPORT_CATEGORY, "report_category", chave="report_category", validar=v.categoria_despesa_ou_geral,
+              pergunta=_pergunta_relatorio_despesas, teclado=_teclado_categorias(get_user_categories, geral=True),
+              parse_mode="HTML", erros={"formato": _erro_relatorio_despesas}),
+        Passo(REPORT_DATE_START, "report_date_start", chave="report_date_start", validar=v.data_ou_sem_filtro,
+              pergunta="📆 Digite a data inicial (dd/mm/yyyy) para o relatório.\n\n"
+                       "<b>Obs:</b> Se não quiser filtrar por data, clique em 'SEM FILTROS' ou use /cancelar para sair.",
+              teclado=SEM_FILTROS, parse_mode="HTML", proximo=_ate_fim_ou(REPORT_DATE_END),
+              aviso="Relatório sem filtros de data solicitado. Gerando relatório...",
+              erros={"formato": "⚠️ Data inválida. Utilize o formato dd/mm/yyyy:",
+                     "futura": "⚠️ A data inicial não pode ser futura. Informe uma data válida (dd/mm/yyyy):"}),
+        Passo(REPORT_DATE_END, "report_date_end", chave="report_date_end", validar=v.data_ou_sem_filtro,
+              pergunta="Agora, informe a data final (dd/mm/yyyy) ou clique em 'SEM FILTROS' para não filtrar:",
+              teclado=SEM_FILTROS, parse_mode="HTML", proximo=FIM, aviso="Gerando relatório...",
+              erros={"formato": "⚠️ Data inválida. Utilize o formato dd/mm/yyyy:",
+                     "futura": "⚠️ A data final não pode ser futura. Informe uma data válida (dd/mm/yyyy):"}),
+        # Só alcançado pela conclusão (gerar_relatorio): pedidos de comprovante até o usuário dizer NÃO
+        Passo(REPORT_PROV, "report_prov", tratar="handlers.reports:report_prov"),
+    ],
+    concluir="handlers.reports:gerar_relatorio",
+)
+
+RELATORIO_ENTRADAS = Fluxo(
+    "report_entradas_conv_handler",
+    entradas={"relatorio_entradas": REPORT_CAT_ENTRADA},
+    passos=[
+        Passo(REPORT_CAT_ENTRADA, "report_cat_entrada", chave="report_cat_entrada", validar=v.categoria_entrada_ou_geral,
+              pergunta=_pergunta_relatorio_entradas, teclado=_teclado_categorias(get_user_cat_entrada, geral=True),
+              parse_mode="HTML", erros={"formato": _erro_relatorio_entradas}),
+        Passo(REPORT_DATE_START_ENTRADA, "report_date_start_entrada", chave="report_date_start_entrada",
+              validar=v.data_ou_sem_filtro, teclado=SEM_FILTROS, parse_mode="HTML",
+              pergunta="📆 Digite a data inicial (dd/mm/yyyy) ou clique em 'SEM FILTROS' para não filtrar.",
+              proximo=_ate_fim_ou(REPORT_DATE_END_ENTRADA), aviso="Gerando relatório sem filtros de data...",
+              erros={"formato": "Data inválida! Use dd/mm/yyyy ou /cancelar.",
+                     "futura": "Data não pode ser futura. Tente novamente ou /cancelar."}),
+        Passo(REPORT_DATE_END_ENTRADA, "report_date_end_entrada", chave="report_date_end_entrada",
+              validar=v.data_ou_sem_filtro, teclado=SEM_FILTROS, parse_mode="HTML",
+              pergunta="Digite a data final (dd/mm/yyyy) ou clique em 'SEM FILTROS' para não filtrar:",
+              aviso="Gerando relatório...",
+              erros={"formato": "Data inválida! Use dd/mm/yyyy ou /cancelar.",
+                     "futura": "Data não pode ser futura. Tente novamente ou /cancelar."}),
+    ],
+    concluir="handlers.reports:gerar_relatorio_entradas",
+)
+
+RESUMO = Fluxo(
+    "resumo_conv_handler",
+    entradas={"resumo": RESUMO_TIPO},
+    passos=[
+        Passo(RESUMO_TIPO, "resumo_tipo", chave="resumo_tipo", validar=v.tipo_resumo,
+              pergunta="📈 <b>Resumo:</b>\n\nDeseja o resumo de DESPESAS ou de ENTRADAS?", parse_mode="HTML",
+              teclado=[["DESPESAS", "ENTRADAS"], ["/cancelar"]],
+              erros={"formato": "❌ Responda DESPESAS ou ENTRADAS, ou /cancelar."}),
+        Passo(RESUMO_DATE_START, "resumo_date_start", chave="resumo_date_start", validar=v.data_ou_sem_filtro,
+              pergunta="📆 Digite a data inicial (dd/mm/yyyy) ou clique em 'SEM FILTROS' para considerar todo o período.",
+              teclado=SEM_FILTROS, proximo=_ate_fim_ou(RESUMO_DATE_END),
+              erros={"formato": "⚠️ Data inválida. Utilize o formato dd/mm/yyyy ou /cancelar.",
+                     "futura": "⚠️ A data inicial não pode ser futura. Tente novamente ou /cancelar."}),
+        Passo(RESUMO_DATE_END, "resumo_date_end", chave="resumo_date_end", validar=v.data_ou_sem_filtro,
+              pergunta="Agora, informe a data final (dd/mm/yyyy) ou clique em 'SEM FILTROS' para não filtrar:",
+              teclado=SEM_FILTROS,
+              erros={"formato": "⚠️ Data inválida. Utilize o formato dd/mm/yyyy ou /cancelar.",
+                     "futura": "⚠️ A data final não pode ser futura. Tente novamente ou /cancelar."}),
+    ],
+    concluir="handlers.reports:gerar_resumo",
+)
+
+# Importação: o arquivo enviado é tratado por inteiro pelo handler
+IMPORTAR = Fluxo(
+    "importar_conv_handler",
+    entradas={"importar": "handlers.importacao:importar_start"},
+    passos=[
+        Passo(IMPORTAR_ARQUIVO, "receber_importacao", filtro=filters.Document.ALL,
+              tratar="handlers.importacao:receber_importacao"),
+    ],
+)
+
+FLUXOS = {fluxo.nome: fluxo for fluxo in (
+    ADICIONAR_SALDO, CATEGORIAS_ENTRADA, ADICIONAR_DESPESA, RELATORIO_DESPESAS, RELATORIO_ENTRADAS, RESUMO,
+    CATEGORIAS_DESPESA, IMPORTAR,
+)}
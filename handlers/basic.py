@@ -1,11 +1,9 @@
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import CallbackContext, ConversationHandler
-from utils import carregar_json
-from config import DADOS_PATH
+from data_manager import user_exists
 
 async def start(update: Update, context: CallbackContext) -> None:
     user_id = str(update.message.from_user.id)
-    dados = carregar_json(DADOS_PATH)
     comandos = (
         "📌 Comandos disponíveis:\n\n"
         "• /start - Iniciar bot\n"
@@ -13,10 +11,11 @@ async def start(update: Update, context: CallbackContext) -> None:
         "• /entradas - Menu de entradas\n"
         "• /despesas - Menu de despesas\n"
         "• /relatorios - Gerar relatório de despesas\n"
+        "• /importar - Importar extrato CSV/OFX\n"
         "• /cancelar - Cancelar operação atual"
     )
 
-    if user_id in dados:
+    if user_exists(user_id):
         msg = (
             "Que bom te ver novamente! 🎉\n"
             "Seja bem-vindo ao FinFacil_Bot. 💰\n\n"
@@ -51,6 +50,7 @@ async def ajuda(update: Update, context: CallbackContext) -> None:
         "• /entradas - Menu de Entradas\n"
         "• /despesas - Menu de despesas\n"
         "• /relatorios - Gerar relatório de despesas\n"
+        "• /importar - Importar extrato CSV/OFX\n"
         "• /cancelar - Cancelar operação atual",
         parse_mode="HTML",
         reply_markup=reply_markup
@@ -0,0 +1,93 @@
+import io
+import html
+import codecs
+import tempfile
+from telegram import Update, ReplyKeyboardRemove
+from telegram.ext import CallbackContext, ConversationHandler
+from utils import formatar_valor
+from importacao import ler_csv, ler_ofx, converter
+from data_manager import get_user_mapas_categorias, import_user_registros, persistir
+from locks import locks
+from executor_io import executor
+from config import IMPORTAR_ARQUIVO, LIMITE_IMPORTACAO, MAX_ERROS_IMPORTACAO
+
+async def importar_start(update: Update, context: CallbackContext):
+    await update.message.reply_text(
+        "📥 <b>Importar extrato</b>\n\n"
+        "Envie um arquivo <b>.csv</b> ou <b>.ofx</b>.\n\n"
+        "CSV: cabeçalho com as colunas <b>data</b> (dd/mm/yyyy), <b>valor</b>, <b>categoria</b> e, "
+        "opcionalmente, <b>tipo</b> (despesa/entrada) e <b>observacao</b>. Sem a coluna tipo, "
+        "valores negativos são despesas e positivos são entradas.\n\n"
+        "OFX: escreva na legenda do arquivo a categoria usada para todas as transações.\n\n"
+        "Nada é gravado se alguma linha for inválida. Use /cancelar para sair.",
+        parse_mode="HTML",
+        reply_markup=ReplyKeyboardRemove()
+    )
+    return IMPORTAR_ARQUIVO
+
+def _codificacao(bruto) -> str:
+    # Extratos de bancos costumam vir em latin-1; testa UTF-8 em uma amostra
+    amostra = bruto.read(64 * 1024)
+    bruto.seek(0)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(amostra, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+def _ler(bruto, ofx: bool, cat_despesas: dict, cat_entradas: dict, padrao: str):
+    # Roda no pool de I/O: só usa as cópias das categorias, nunca o store
+    texto = io.TextIOWrapper(bruto, encoding=_codificacao(bruto), newline="")
+    try:
+        linhas = ler_ofx(texto) if ofx else ler_csv(texto)
+        return converter(
+            linhas,
+            lambda cat_norm: cat_norm if cat_norm in cat_despesas else None,
+            cat_entradas.get,
+            padrao,
+            MAX_ERROS_IMPORTACAO
+        )
+    finally:
+        texto.detach()
+
+async def receber_importacao(update: Update, context: CallbackContext):
+    documento = update.message.document
+    nome = (documento.file_name or "").lower()
+    ofx = nome.endswith(".ofx")
+    if not (ofx or nome.endswith(".csv")):
+        await update.message.reply_text("⚠️ Envie um arquivo .csv ou .ofx, ou /cancelar.")
+        return IMPORTAR_ARQUIVO
+    if documento.file_size and documento.file_size > LIMITE_IMPORTACAO:
+        await update.message.reply_text(f"⚠️ Arquivo muito grande (máximo {LIMITE_IMPORTACAO // (1024 * 1024)} MB).")
+        return IMPORTAR_ARQUIVO
+    user_id = str(update.message.from_user.id)
+    arquivo = await documento.get_file()
+    with tempfile.TemporaryFile() as bruto:
+        await arquivo.download_to_memory(out=bruto)
+        bruto.seek(0)
+        cat_despesas, cat_entradas = get_user_mapas_categorias(user_id)
+        try:
+            despesas, entradas, erros = await executor.executar(
+                _ler, bruto, ofx, cat_despesas, cat_entradas, (update.message.caption or "").strip()
+            )
+        except (ValueError, UnicodeDecodeError) as e:
+            await update.message.reply_text(f"❌ Não consegui ler o arquivo: {e}")
+            return IMPORTAR_ARQUIVO
+    if erros:
+        await update.message.reply_text(
+            "❌ <b>Nada foi importado.</b> Corrija o arquivo e envie novamente:\n\n" + "\n".join(f"• {html.escape(e)}" for e in erros),
+            parse_mode="HTML"
+        )
+        return IMPORTAR_ARQUIVO
+    if not despesas and not entradas:
+        await update.message.reply_text("⚠️ Nenhuma transação encontrada no arquivo.")
+        return IMPORTAR_ARQUIVO
+    async with locks.travar(user_id, "despesas", "entradas", "dados"):
+        saldo = import_user_registros(user_id, despesas, entradas)
+    await persistir()
+    await update.message.reply_text(
+        f"✅ Importação concluída!\n<b>{len(despesas)} despesa(s) e {len(entradas)} entrada(s).\n"
+        f"Seu novo saldo: R$ {formatar_valor(saldo)}</b>",
+        parse_mode="HTML"
+    )
+    return ConversationHandler.END
@@ -1,277 +1,162 @@
-from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
+from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto
 from telegram.ext import CallbackContext, ConversationHandler
-from datetime import datetime
-from utils import carregar_json, salvar_json, normalize_category
-from data_manager import get_user_cat_entrada, get_user_categories
-from config import ENTRADAS_PATH, REPORT_CAT_ENTRADA, REPORT_DATE_START_ENTRADA, REPORT_DATE_END_ENTRADA, REPORT_CATEGORY, REPORT_DATE_START, REPORT_DATE_END, REPORT_PROV, DESPESAS_PATH
+from itertools import islice
+from utils import formatar_valor
+from paginacao import paginar
+from exportacao import exportar, FORMATOS
+from executor_io import executor
+from data_manager import get_user_despesas_por_id, query_user_despesas, query_user_entradas, get_user_resumo
+from config import LIMITE_ALBUM, REPORT_PROV
 
 async def relatorios_menu(update: Update, context: CallbackContext):
     keyboard = [
         ['/relatorio_entradas', '/relatorio_despesas'],
-        ['/cancelar']
+        ['/resumo', '/cancelar']
     ]
     reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
     await update.message.reply_text(
         "Escolha o tipo de relatório:\n\n"
         "/relatorio_entradas - Relatório de entradas\n"
-        "/relatorio_despesas - Relatório de despesas",
+        "/relatorio_despesas - Relatório de despesas\n"
+        "/resumo - Totais e médias por categoria e mês",
         reply_markup=reply_markup
     )
 
-# Relatório de Entradas
-async def relatorio_entradas_start(update: Update, context: CallbackContext):
-    user_id = str(update.message.from_user.id)
-    cat_list = get_user_cat_entrada(user_id)
-    msg = (
-        "📊 <b>Relatório de Entradas:</b>\n\n"
-        "• Digite o nome de uma categoria ou 'GERAL' para todas.\n\n"
-        "Suas categorias de entrada:\n" + "\n".join(cat_list) +
-        "\n\nDigite /cancelar para parar a operação."
-    )
-    keyboard = [[cat] for cat in cat_list]
-    keyboard.append(['GERAL'])
-    keyboard.append(['/cancelar'])
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-    await update.message.reply_text(msg, parse_mode="HTML", reply_markup=reply_markup)
-    return REPORT_CAT_ENTRADA
+# Renderização paginada dos relatórios
+CABECALHOS = {
+    "despesas": "📊 <b>Relatório de Despesas",
+    "entradas": "📊 <b>Relatório de Entradas",
+}
 
-async def report_cat_entrada(update: Update, context: CallbackContext):
-    user_id = str(update.message.from_user.id)
-    cat_input = update.message.text.strip()
-    cat_norm = normalize_category(cat_input)
-    cat_list = get_user_cat_entrada(user_id)
-    cat_list_norm = [normalize_category(c) for c in cat_list]
-    if cat_norm != "GERAL" and cat_norm not in cat_list_norm:
-        await update.message.reply_text(
-            "❌ Categoria não encontrada! Digite uma categoria existente ou 'GERAL'.\n\n"
-            "Suas categorias:\n" + "\n".join(cat_list) +
-            "\n\nOu /cancelar para parar.",
-            parse_mode="HTML"
-        )
-        return REPORT_CAT_ENTRADA
-    context.user_data["report_cat_entrada"] = cat_norm
-    keyboard = [["SEM FILTROS"], ["/cancelar"]]
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-    await update.message.reply_text(
-        "📆 Digite a data inicial (dd/mm/yyyy) ou clique em 'SEM FILTROS' para não filtrar.",
-        parse_mode="HTML",
-        reply_markup=reply_markup
-    )
-    return REPORT_DATE_START_ENTRADA
+def _bloco_despesa(d) -> str:
+    linhas = [
+        f"• ID: {d.id}\n",
+        f"  Valor: R$ {formatar_valor(d.centavos)}\n",
+        f"  Categoria: {d.categoria}\n",
+        f"  Data: {d.data}\n",
+    ]
+    if d.observacao:
+        linhas.append(f"  Obs: {d.observacao}\n")
+    linhas.append(f"  Comprov: {'Sim' if d.comprovante else 'Não'}\n")
+    linhas.append("------------------------\n")
+    return "".join(linhas)
 
-async def report_date_start_entrada(update: Update, context: CallbackContext):
-    data_text = update.message.text.strip().upper()
-    if data_text == "SEM FILTROS":
-        context.user_data["report_date_start_entrada"] = None
-        context.user_data["report_date_end_entrada"] = None
-        await update.message.reply_text("Gerando relatório sem filtros de data...", parse_mode="HTML")
-        return await gerar_relatorio_entradas(update, context)
-    try:
-        data_obj = datetime.strptime(data_text, "%d/%m/%Y")
-        if data_obj > datetime.now():
-            await update.message.reply_text("Data não pode ser futura. Tente novamente ou /cancelar.")
-            return REPORT_DATE_START_ENTRADA
-        context.user_data["report_date_start_entrada"] = data_obj
-        keyboard = [["SEM FILTROS"], ["/cancelar"]]
-        reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-        await update.message.reply_text(
-            "Digite a data final (dd/mm/yyyy) ou clique em 'SEM FILTROS' para não filtrar:",
-            reply_markup=reply_markup
-        )
-        return REPORT_DATE_END_ENTRADA
-    except ValueError:
-        await update.message.reply_text("Data inválida! Use dd/mm/yyyy ou /cancelar.")
-        return REPORT_DATE_START_ENTRADA
+def _bloco_entrada(r) -> str:
+    linhas = [
+        f"• ID: {r.id}\n",
+        f"  Valor: R$ {formatar_valor(r.centavos)}\n",
+        f"  Categoria: {r.categoria}\n",
+        f"  Data: {r.data}\n",
+    ]
+    if r.observacao:
+        linhas.append(f"  Obs: {r.observacao}\n")
+    linhas.append("------------------------\n")
+    return "".join(linhas)
+
+def _consultar_relatorio(user_id: str, cursor: dict) -> list:
+    consulta = query_user_despesas if cursor["tipo"] == "despesas" else query_user_entradas
+    return consulta(user_id, cursor["inicio"], cursor["fim"], cursor["categoria"])
+
+def _render_pagina(registros: list, cursor: dict):
+    # Gera apenas a página atual; o início da próxima fica registrado no cursor.
+    # Devolve None se a página ficou vazia (registros removidos depois de gerar o relatório)
+    pagina = cursor["pagina"]
+    inicio = cursor["inicios"][pagina]
+    bloco = _bloco_despesa if cursor["tipo"] == "despesas" else _bloco_entrada
+    sufixo = ":" if pagina == 0 else f" (página {pagina + 1}):"
+    cabecalho = f"{CABECALHOS[cursor['tipo']]}{sufixo}</b>\n\n"
+    gerado = next(paginar((bloco(r) for r in islice(registros, inicio, None)), cabecalho), None)
+    if gerado is None:
+        return None
+    texto, quantidade = gerado
+    proximo = inicio + quantidade
+    tem_proxima = proximo < len(registros)
+    if tem_proxima and pagina + 1 == len(cursor["inicios"]):
+        cursor["inicios"].append(proximo)
+    return texto, tem_proxima
+
+def _teclado_paginas(cursor: dict, tem_proxima: bool):
+    botoes = []
+    if cursor["pagina"] > 0:
+        botoes.append(InlineKeyboardButton("◀️ Anterior", callback_data=f"rel:{cursor['serial']}:{cursor['pagina'] - 1}"))
+    if tem_proxima:
+        botoes.append(InlineKeyboardButton("Próxima ▶️", callback_data=f"rel:{cursor['serial']}:{cursor['pagina'] + 1}"))
+    exportar_botoes = [
+        InlineKeyboardButton(f"📄 Exportar {formato.upper()}", callback_data=f"exp:{cursor['serial']}:{formato}")
+        for formato in FORMATOS
+    ]
+    return InlineKeyboardMarkup([botoes, exportar_botoes] if botoes else [exportar_botoes])
+
+async def enviar_relatorio(update: Update, context: CallbackContext, tipo: str, registros: list, inicio, fim, categoria):
+    serial = context.user_data.get("relatorio_serial", 0) + 1
+    context.user_data["relatorio_serial"] = serial
+    cursor = {
+        "serial": serial, "tipo": tipo, "inicio": inicio, "fim": fim, "categoria": categoria,
+        "pagina": 0, "inicios": [0],
+    }
+    context.user_data["relatorio"] = cursor
+    texto, tem_proxima = _render_pagina(registros, cursor)
+    await update.message.reply_text(texto, parse_mode="HTML", reply_markup=_teclado_paginas(cursor, tem_proxima))
+
+async def navegar_relatorio(update: Update, context: CallbackContext):
+    query = update.callback_query
+    await query.answer()
+    _, serial, pagina = query.data.split(":")
+    cursor = context.user_data.get("relatorio")
+    if cursor is None or cursor["serial"] != int(serial) or int(pagina) >= len(cursor["inicios"]):
+        await query.edit_message_reply_markup(reply_markup=None)
+        return
+    cursor["pagina"] = int(pagina)
+    registros = _consultar_relatorio(str(query.from_user.id), cursor)
+    resultado = _render_pagina(registros, cursor)
+    if resultado is None:
+        context.user_data.pop("relatorio", None)
+        await query.edit_message_text("Este relatório expirou. Gere um novo em /relatorios.")
+        return
+    texto, tem_proxima = resultado
+    await query.edit_message_text(texto, parse_mode="HTML", reply_markup=_teclado_paginas(cursor, tem_proxima))
 
-async def report_date_end_entrada(update: Update, context: CallbackContext):
-    data_text = update.message.text.strip().upper()
-    if data_text == "SEM FILTROS":
-        context.user_data["report_date_end_entrada"] = None
-        await update.message.reply_text("Gerando relatório...", parse_mode="HTML")
-        return await gerar_relatorio_entradas(update, context)
-    try:
-        data_obj = datetime.strptime(data_text, "%d/%m/%Y")
-        if data_obj > datetime.now():
-            await update.message.reply_text("Data não pode ser futura. Tente novamente ou /cancelar.")
-            return REPORT_DATE_END_ENTRADA
-        context.user_data["report_date_end_entrada"] = data_obj
-        await update.message.reply_text("Gerando relatório...", parse_mode="HTML")
-        return await gerar_relatorio_entradas(update, context)
-    except ValueError:
-        await update.message.reply_text("Data inválida! Use dd/mm/yyyy ou /cancelar.")
-        return REPORT_DATE_END_ENTRADA
+async def exportar_relatorio(update: Update, context: CallbackContext):
+    # Envia o relatório completo como arquivo, sem passar pelo limite de tamanho da mensagem
+    query = update.callback_query
+    await query.answer()
+    _, serial, formato = query.data.split(":")
+    cursor = context.user_data.get("relatorio")
+    if cursor is None or cursor["serial"] != int(serial) or formato not in FORMATOS:
+        await query.message.reply_text("Este relatório expirou. Gere um novo em /relatorios.")
+        return
+    registros = _consultar_relatorio(str(query.from_user.id), cursor)
+    arquivo = await executor.executar(exportar, cursor["tipo"], registros, formato)
+    with arquivo:
+        await query.message.reply_document(document=arquivo, filename=f"relatorio_{cursor['tipo']}.{formato}")
 
+# Conclusões dos fluxos de relatório (roteiros em fluxos.py)
 async def gerar_relatorio_entradas(update: Update, context: CallbackContext):
     user_id = str(update.message.from_user.id)
     cat_norm = context.user_data["report_cat_entrada"]
     data_inicial = context.user_data.get("report_date_start_entrada")
     data_final = context.user_data.get("report_date_end_entrada")
-    entradas = carregar_json(ENTRADAS_PATH)
-    user_entradas = entradas.get(user_id, [])
-    relatorio = []
-    for e in user_entradas:
-        try:
-            e_data = datetime.strptime(e.get("data", ""), "%d/%m/%Y")
-        except ValueError:
-            e_data = None
-        if data_inicial is not None:
-            if e_data is None or e_data < data_inicial:
-                continue
-        if data_final is not None:
-            if e_data is None or e_data > data_final:
-                continue
-        e_cat_norm = normalize_category(e.get("categoria", ""))
-        if cat_norm == "GERAL" or e_cat_norm == cat_norm:
-            relatorio.append(e)
+    categoria = None if cat_norm == "GERAL" else cat_norm
+    relatorio = query_user_entradas(user_id, data_inicial, data_final, categoria)
     if not relatorio:
         await update.message.reply_text("Nenhuma entrada encontrada para este período/categoria.")
         return ConversationHandler.END
-    msg = "📊 <b>Relatório de Entradas:</b>\n\n"
-    for r in relatorio:
-        r_id = r.get("id")
-        valor = r.get("valor", 0.0)
-        cat = r.get("categoria", "")
-        data_str = r.get("data", "")
-        obs = r.get("observacao", "")
-        msg += f"• ID: {r_id}\n"
-        msg += f"  Valor: R$ {valor:.2f}\n"
-        msg += f"  Categoria: {cat}\n"
-        msg += f"  Data: {data_str}\n"
-        if obs:
-            msg += f"  Obs: {obs}\n"
-        msg += "------------------------\n"
-    await update.message.reply_text(msg, parse_mode="HTML")
+    await enviar_relatorio(update, context, "entradas", relatorio, data_inicial, data_final, categoria)
     await update.message.reply_text("Relatório finalizado. Use /ajuda para ver os comandos.")
     return ConversationHandler.END
 
-# Relatório de Despesas
-async def relatorios_despesas(update: Update, context: CallbackContext):
-    user_id = str(update.message.from_user.id)
-    cat_list = get_user_categories(user_id)
-    msg = (
-        "📊 <b>Para gerar o relatório:</b>\n"
-        "• Digite o nome de uma categoria ou 'GERAL' para todas.\n\n"
-        "Suas categorias:\n" + "\n".join(cat_list) +
-        "\n\nDigite /cancelar para parar a operação."
-    )
-    keyboard = [[cat] for cat in cat_list]
-    keyboard.append(['GERAL'])
-    keyboard.append(['/cancelar'])
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-    await update.message.reply_text(msg, parse_mode="HTML", reply_markup=reply_markup)
-    return REPORT_CATEGORY
-
-async def report_category(update: Update, context: CallbackContext):
-    user_id = str(update.message.from_user.id)
-    categoria_input = update.message.text.strip()
-    categoria_normalizada = normalize_category(categoria_input)
-    available = [normalize_category(c) for c in get_user_categories(user_id)]
-    if categoria_normalizada != "GERAL" and categoria_normalizada not in available:
-        await update.message.reply_text(
-            "❌ <b>Categoria não encontrada!</b> Por favor, digite uma categoria existente ou 'GERAL'.\n\n"
-            "Suas categorias:\n" + "\n".join(get_user_categories(user_id)) +
-            "\n\nDigite /cancelar para parar a operação.",
-            parse_mode="HTML"
-        )
-        return REPORT_CATEGORY
-    context.user_data["report_category"] = categoria_normalizada
-    keyboard = [["SEM FILTROS"], ["/cancelar"]]
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-    await update.message.reply_text(
-        "📆 Digite a data inicial (dd/mm/yyyy) para o relatório.\n\n"
-        "<b>Obs:</b> Se não quiser filtrar por data, clique em 'SEM FILTROS' ou use /cancelar para sair.",
-        parse_mode="HTML",
-        reply_markup=reply_markup
-    )
-    return REPORT_DATE_START
-
-async def report_date_start(update: Update, context: CallbackContext):
-    data_text = update.message.text.strip().upper()
-    if data_text == "SEM FILTROS":
-        context.user_data["report_date_start"] = None
-        context.user_data["report_date_end"] = None
-        await update.message.reply_text("Relatório sem filtros de data solicitado. Gerando relatório...", parse_mode="HTML", reply_markup=ReplyKeyboardRemove())
-        return await gerar_relatorio(update, context)
-    try:
-        data_obj = datetime.strptime(data_text, "%d/%m/%Y")
-        if data_obj > datetime.now():
-            await update.message.reply_text("⚠️ A data inicial não pode ser futura. Informe uma data válida (dd/mm/yyyy):", parse_mode="HTML")
-            return REPORT_DATE_START
-        context.user_data["report_date_start"] = data_obj
-        keyboard = [["SEM FILTROS"], ["/cancelar"]]
-        reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-        await update.message.reply_text("Agora, informe a data final (dd/mm/yyyy) ou clique em 'SEM FILTROS' para não filtrar:", parse_mode="HTML", reply_markup=reply_markup)
-        return REPORT_DATE_END
-    except ValueError:
-        await update.message.reply_text("⚠️ Data inválida. Utilize o formato dd/mm/yyyy:", parse_mode="HTML")
-        return REPORT_DATE_START
-
-async def report_date_end(update: Update, context: CallbackContext):
-    data_text = update.message.text.strip().upper()
-    if data_text == "SEM FILTROS":
-        context.user_data["report_date_end"] = None
-        await update.message.reply_text("Gerando relatório...", parse_mode="HTML", reply_markup=ReplyKeyboardRemove())
-        return await gerar_relatorio(update, context)
-    try:
-        data_obj = datetime.strptime(data_text, "%d/%m/%Y")
-        if data_obj > datetime.now():
-            await update.message.reply_text("⚠️ A data final não pode ser futura. Informe uma data válida (dd/mm/yyyy):", parse_mode="HTML")
-            return REPORT_DATE_END
-        context.user_data["report_date_end"] = data_obj
-        await update.message.reply_text("Gerando relatório...", parse_mode="HTML", reply_markup=ReplyKeyboardRemove())
-        return await gerar_relatorio(update, context)
-    except ValueError:
-        await update.message.reply_text("⚠️ Data inválida. Utilize o formato dd/mm/yyyy:", parse_mode="HTML")
-        return REPORT_DATE_END
-
 async def gerar_relatorio(update: Update, context: CallbackContext):
     user_id = str(update.message.from_user.id)
-    despesas = carregar_json(DESPESAS_PATH)
-    lista = despesas.get(user_id, [])
     cat_filtro = context.user_data["report_category"]
     data_inicial = context.user_data.get("report_date_start")
     data_final = context.user_data.get("report_date_end")
-    relatorio = []
-    for despesa in lista:
-        try:
-            desp_data = datetime.strptime(despesa.get("data", ""), "%d/%m/%Y")
-        except ValueError:
-            desp_data = None
-        if data_inicial is not None:
-            if desp_data is None or desp_data < data_inicial:
-                continue
-        if data_final is not None:
-            if desp_data is None or desp_data > data_final:
-                continue
-        if cat_filtro == "GERAL":
-            relatorio.append(despesa)
-        else:
-            if normalize_category(despesa.get("categoria", "")) == cat_filtro:
-                relatorio.append(despesa)
+    categoria = None if cat_filtro == "GERAL" else cat_filtro
+    relatorio = query_user_despesas(user_id, data_inicial, data_final, categoria)
     if not relatorio:
         await update.message.reply_text("Nenhuma despesa encontrada para o período e categoria informados.")
         return ConversationHandler.END
-    msg = "📊 <b>Relatório de Despesas:</b>\n\n"
-    ids_comprovantes = []
-    for d in relatorio:
-        desp_id = d.get('id')
-        valor = d.get('valor', 0.0)
-        categoria = d.get('categoria', '')
-        data_desp = d.get('data', '')
-        obs = d.get('observacao', '')
-        comp = d.get('comprovante')
-        msg += f"• ID: {desp_id}\n"
-        msg += f"  Valor: R$ {valor:.2f}\n"
-        msg += f"  Categoria: {categoria}\n"
-        msg += f"  Data: {data_desp}\n"
-        if obs:
-            msg += f"  Obs: {obs}\n"
-        comp_str = "Sim" if comp else "Não"
-        msg += f"  Comprov: {comp_str}\n"
-        msg += "------------------------\n"
-        if comp:
-            ids_comprovantes.append(str(desp_id))
-    await update.message.reply_text(msg, parse_mode="HTML")
+    await enviar_relatorio(update, context, "despesas", relatorio, data_inicial, data_final, categoria)
+    ids_comprovantes = [str(d.id) for d in relatorio if d.comprovante]
     context.user_data["ids_comprovantes"] = ids_comprovantes
     if not ids_comprovantes:
         await update.message.reply_text("Nenhuma despesa deste relatório possui comprovante. Digite /cancelar para sair.", parse_mode="HTML")
@@ -287,6 +172,20 @@ async def gerar_relatorio(update: Update, context: CallbackContext):
         )
         return REPORT_PROV
 
+def _legenda_comprovante(d) -> str:
+    return f"Comprovante da despesa ID {d.id}\nR$ {formatar_valor(d.centavos)} - {d.categoria} - {d.data}"
+
+async def _enviar_comprovantes(update: Update, despesas: list):
+    # Um álbum por grupo de até LIMITE_ALBUM fotos; álbuns exigem ao menos 2 itens
+    for inicio in range(0, len(despesas), LIMITE_ALBUM):
+        grupo = despesas[inicio:inicio + LIMITE_ALBUM]
+        if len(grupo) == 1:
+            await update.message.reply_photo(photo=grupo[0].comprovante, caption=_legenda_comprovante(grupo[0]))
+        else:
+            await update.message.reply_media_group(
+                media=[InputMediaPhoto(media=d.comprovante, caption=_legenda_comprovante(d)) for d in grupo]
+            )
+
 async def report_prov(update: Update, context: CallbackContext):
     resposta = update.message.text.strip().lower()
     if resposta in ["não", "nao", "/cancelar"]:
@@ -294,33 +193,34 @@ async def report_prov(update: Update, context: CallbackContext):
         return ConversationHandler.END
     ids_str = [s.strip() for s in resposta.split(',') if s.strip() != '']
     user_id = str(update.message.from_user.id)
-    despesas = carregar_json(DESPESAS_PATH)
-    user_expenses = despesas.get(user_id, [])
     ids_comprovantes = context.user_data.get("ids_comprovantes", [])
+    permitidos = set(ids_comprovantes)
     invalid_ids = []
-    displayed_any = False
+    pedidos = []
     for id_str in ids_str:
         try:
             expense_id = int(id_str)
         except ValueError:
             invalid_ids.append(id_str)
             continue
-        if str(expense_id) not in ids_comprovantes:
+        if str(expense_id) not in permitidos:
             invalid_ids.append(id_str)
             continue
-        found = False
-        for d in user_expenses:
-            if d.get("id") == expense_id:
-                found = True
-                comp = d.get("comprovante")
-                await update.message.reply_text(f"Comprovante da despesa ID {expense_id}:", parse_mode="HTML")
-                await update.message.reply_photo(photo=comp)
-                displayed_any = True
-                if str(expense_id) in ids_comprovantes:
-                    ids_comprovantes.remove(str(expense_id))
-                break
-        if not found:
-            invalid_ids.append(id_str)
+        if expense_id not in pedidos:
+            pedidos.append(expense_id)
+    despesas = get_user_despesas_por_id(user_id, pedidos)
+    encontrados = []
+    for expense_id in pedidos:
+        despesa = despesas.get(expense_id)
+        if despesa is None or not despesa.comprovante:
+            invalid_ids.append(str(expense_id))
+        else:
+            encontrados.append(despesa)
+    await _enviar_comprovantes(update, encontrados)
+    displayed_any = bool(encontrados)
+    exibidos = {str(d.id) for d in encontrados}
+    ids_comprovantes = [idc for idc in ids_comprovantes if idc not in exibidos]
+    context.user_data["ids_comprovantes"] = ids_comprovantes
     if invalid_ids:
         await update.message.reply_text("Não encontrei comprovante(s) para ID(s): " + ", ".join(invalid_ids), parse_mode="HTML")
     if ids_comprovantes:
@@ -335,3 +235,41 @@ async def report_prov(update: Update, context: CallbackContext):
     else:
         await update.message.reply_text("Todos os comprovantes solicitados foram exibidos. Use /ajuda para ver os comandos.", parse_mode="HTML", reply_markup=ReplyKeyboardRemove())
         return ConversationHandler.END
+
+# Resumo agregado por categoria e mês
+def _media(total: int, quantidade: int) -> str:
+    return formatar_valor(round(total / quantidade) if quantidade else 0)
+
+async def gerar_resumo(update: Update, context: CallbackContext):
+    user_id = str(update.message.from_user.id)
+    tipo = context.user_data["resumo_tipo"]
+    inicio = context.user_data.get("resumo_date_start")
+    fim = context.user_data.get("resumo_date_end")
+    resumo = get_user_resumo(user_id, tipo, inicio, fim)
+    if not resumo["quantidade"]:
+        await update.message.reply_text(
+            f"Nenhum registro de {tipo} encontrado para o período informado.", reply_markup=ReplyKeyboardRemove()
+        )
+        return ConversationHandler.END
+    periodo = "todo o período"
+    if inicio or fim:
+        periodo = f"{inicio.strftime('%d/%m/%Y') if inicio else 'início'} a {fim.strftime('%d/%m/%Y') if fim else 'hoje'}"
+    cabecalho = (
+        f"📈 <b>Resumo de {tipo.capitalize()}</b> ({periodo})\n\n"
+        f"Total: R$ {formatar_valor(resumo['total'])} em {resumo['quantidade']} registro(s)\n"
+        f"Média: R$ {_media(resumo['total'], resumo['quantidade'])}\n\n"
+    )
+    blocos = ["<b>Por categoria:</b>\n"]
+    blocos += [
+        f"• {cat}: R$ {formatar_valor(total)} ({qtd}x, média R$ {_media(total, qtd)})\n"
+        for cat, total, qtd in resumo["por_categoria"]
+    ]
+    blocos.append("\n<b>Por mês:</b>\n")
+    blocos += [
+        f"• {mes[5:]}/{mes[:4]}: R$ {formatar_valor(total)} ({qtd}x, média R$ {_media(total, qtd)})\n"
+        for mes, total, qtd in resumo["por_mes"]
+    ]
+    for texto, _ in paginar(blocos, cabecalho):
+        await update.message.reply_text(texto, parse_mode="HTML", reply_markup=ReplyKeyboardRemove())
+    await update.message.reply_text("Resumo finalizado. Use /ajuda para ver os comandos.")
+    return ConversationHandler.END
@@ -0,0 +1,128 @@
+import csv
+import re
+from datetime import datetime
+from utils import normalize_category, parse_valor
+from modelos import Despesa, Entrada
+
+# Leitura em fluxo de extratos CSV/OFX: gera uma linha por vez, sem carregar o arquivo inteiro
+
+# Nomes de coluna aceitos no cabeçalho do CSV (já normalizados)
+COLUNAS = {
+    "TIPO": "tipo",
+    "DATA": "data",
+    "VALOR": "valor",
+    "CATEGORIA": "categoria",
+    "OBSERVACAO": "observacao",
+    "DESCRICAO": "observacao",
+    "HISTORICO": "observacao",
+}
+
+TIPOS = {
+    "DESPESA": "despesas", "DESPESAS": "despesas", "SAIDA": "despesas", "D": "despesas",
+    "ENTRADA": "entradas", "ENTRADAS": "entradas", "RECEITA": "entradas", "C": "entradas",
+}
+
+def valor_extrato(texto: str) -> int:
+    # Aceita "R$ 1.234,56", "1,234.56", "1234.56" e "-12,50": com os dois separadores, o último é o decimal
+    texto = texto.replace("R$", "").replace(" ", "").strip()
+    if "," in texto and "." in texto:
+        milhar = "." if texto.rfind(",") > texto.rfind(".") else ","
+        texto = texto.replace(milhar, "")
+    return parse_valor(texto)
+
+def ler_csv(arquivo):
+    # arquivo: fluxo de texto; gera (número da linha, {campo: texto})
+    amostra = arquivo.read(4096)
+    arquivo.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=";,\t")
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.reader(arquivo, dialeto)
+    cabecalho = next(leitor, None)
+    if cabecalho is None:
+        return
+    campos = [COLUNAS.get(normalize_category(nome.lstrip("\ufeff"))) for nome in cabecalho]
+    if "data" not in campos or "valor" not in campos:
+        raise ValueError("O CSV precisa das colunas 'data' e 'valor'.")
+    for linha in leitor:
+        if not any(celula.strip() for celula in linha):
+            continue
+        yield leitor.line_num, {campo: celula.strip() for campo, celula in zip(campos, linha) if campo}
+
+_TAG_OFX = re.compile(r"<(/?)(\w+)>([^<\r\n]*)")
+
+def ler_ofx(arquivo):
+    # OFX 1.x (SGML) ou 2.x (XML): cada <STMTTRN> vira uma linha; o sinal do valor define o tipo.
+    # A transação termina no </STMTTRN> (várias podem estar na mesma linha em XML) ou, em SGML sem
+    # fechamento, no próximo <STMTTRN>, no fim da lista ou no fim do arquivo
+    transacao = None
+    for numero, linha in enumerate(arquivo, 1):
+        for fechamento, tag, conteudo in _TAG_OFX.findall(linha):
+            tag = tag.upper()
+            if tag == "STMTTRN" or (fechamento and tag == "BANKTRANLIST"):
+                if transacao is not None:
+                    yield inicio, transacao
+                transacao = None
+                if not fechamento:
+                    transacao = {}
+                    inicio = numero
+            elif transacao is None or fechamento:
+                continue
+            elif tag == "DTPOSTED":
+                transacao["data"] = conteudo[6:8] + "/" + conteudo[4:6] + "/" + conteudo[0:4]
+            elif tag == "TRNAMT":
+                transacao["valor"] = conteudo.strip()
+            elif tag in ("MEMO", "NAME") and conteudo.strip():
+                transacao.setdefault("observacao", conteudo.strip())
+    if transacao is not None:
+        yield inicio, transacao
+
+def converter_linha(numero: int, campos: dict, categoria_despesa, categoria_entrada, padrao: str = None, hoje=None):
+    # categoria_*: nome normalizado -> nome a gravar (None se o usuário não tiver a categoria).
+    # Retorna ("despesas" | "entradas", registro) ou levanta ValueError com o motivo
+    try:
+        centavos = valor_extrato(campos.get("valor", ""))
+    except ValueError:
+        raise ValueError(f"linha {numero}: valor inválido {campos.get('valor')!r}")
+    tipo_texto = normalize_category(campos.get("tipo", ""))
+    if tipo_texto:
+        tipo = TIPOS.get(tipo_texto)
+        if tipo is None:
+            raise ValueError(f"linha {numero}: tipo desconhecido {campos.get('tipo')!r}")
+    else:
+        tipo = "despesas" if centavos < 0 else "entradas"
+    centavos = abs(centavos)
+    if centavos == 0:
+        raise ValueError(f"linha {numero}: valor zerado")
+    try:
+        data = datetime.strptime(campos.get("data", ""), "%d/%m/%Y")
+    except ValueError:
+        raise ValueError(f"linha {numero}: data inválida {campos.get('data')!r} (use dd/mm/yyyy)")
+    if data > (hoje or datetime.now()):
+        raise ValueError(f"linha {numero}: data futura {campos['data']}")
+    nome = campos.get("categoria") or padrao or ""
+    buscar = categoria_despesa if tipo == "despesas" else categoria_entrada
+    categoria = buscar(normalize_category(nome))
+    if categoria is None:
+        raise ValueError(f"linha {numero}: categoria {nome or '(vazia)'!r} não cadastrada em {tipo}")
+    modelo = Despesa if tipo == "despesas" else Entrada
+    return tipo, modelo(
+        centavos=centavos, categoria=categoria, data=data.strftime("%d/%m/%Y"),
+        observacao=campos.get("observacao", "")
+    )
+
+def converter(linhas, categoria_despesa, categoria_entrada, padrao: str = None, max_erros: int = 10):
+    # Tudo ou nada: devolve (despesas, entradas, erros); com erros, nada deve ser gravado
+    despesas, entradas, erros = [], [], []
+    hoje = datetime.now()
+    for numero, campos in linhas:
+        try:
+            tipo, registro = converter_linha(numero, campos, categoria_despesa, categoria_entrada, padrao, hoje)
+        except ValueError as e:
+            erros.append(str(e))
+            if len(erros) >= max_erros:
+                break
+            continue
+        (despesas if tipo == "despesas" else entradas).append(registro)
+    return despesas, entradas, erros
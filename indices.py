@@ -0,0 +1,23 @@
+import bisect
+
+# Registros de um usuário ordenados por data (ordinal), para consultas por intervalo via bisseção
+class IndiceDatas:
+    def __init__(self, registros: list):
+        pares = sorted(
+            ((r.data_ord, n) for n, r in enumerate(registros) if r.data_ord is not None)
+        )
+        self.ordinais = [ordinal for ordinal, _ in pares]
+        self.registros = [registros[n] for _, n in pares]
+
+    def adicionar(self, registro):
+        ordinal = registro.data_ord
+        if ordinal is None:
+            return
+        pos = bisect.bisect_right(self.ordinais, ordinal)
+        self.ordinais.insert(pos, ordinal)
+        self.registros.insert(pos, registro)
+
+    def intervalo(self, inicio_ord=None, fim_ord=None) -> list:
+        lo = bisect.bisect_left(self.ordinais, inicio_ord) if inicio_ord is not None else 0
+        hi = bisect.bisect_right(self.ordinais, fim_ord) if fim_ord is not None else len(self.ordinais)
+        return self.registros[lo:hi]
@@ -0,0 +1,78 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Diário append-only em JSON lines: cada inclusão/remoção é uma linha pequena.
+# O fsync não acontece na escrita: sincronizar() grava de uma vez tudo o que ficou pendente
+class Journal:
+    def __init__(self, caminho: str, fsync: bool = True):
+        self.caminho = caminho
+        self.fsync = fsync
+        self.pendente = False
+        self._file = None
+
+    def _abrir(self):
+        if self._file is None:
+            self._file = open(self.caminho, "a", encoding="utf-8")
+        return self._file
+
+    def registrar(self, evento: dict):
+        file = self._abrir()
+        file.write(json.dumps(evento, ensure_ascii=False, separators=(",", ":")) + "\n")
+        file.flush()
+        self.pendente = self.fsync
+
+    def sincronizar(self):
+        if self.pendente and self._file is not None:
+            self.pendente = False
+            os.fsync(self._file.fileno())
+
+    def reproduzir(self):
+        if not os.path.exists(self.caminho):
+            return
+        with open(self.caminho, "r", encoding="utf-8") as file:
+            for numero, linha in enumerate(file, 1):
+                if not linha.strip():
+                    continue
+                try:
+                    yield json.loads(linha)
+                except ValueError:
+                    # Uma linha incompleta só pode sobrar de uma queda no meio da escrita
+                    logger.warning("Ignorando linha %d inválida em %s", numero, self.caminho)
+
+    def tamanho(self) -> int:
+        if self._file is not None:
+            return self._file.tell()
+        try:
+            return os.path.getsize(self.caminho)
+        except OSError:
+            return 0
+
+    def truncar(self):
+        self.fechar()
+        with open(self.caminho, "w", encoding="utf-8") as file:
+            file.flush()
+            os.fsync(file.fileno())
+
+    def descartar_ate(self, posicao: int):
+        # Remove o início já incorporado ao snapshot, preservando o que foi escrito depois
+        self.fechar()
+        if posicao == 0 or not os.path.exists(self.caminho):
+            return
+        with open(self.caminho, "rb") as file:
+            file.seek(posicao)
+            resto = file.read()
+        tmp = self.caminho + ".tmp"
+        with open(tmp, "wb") as file:
+            file.write(resto)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.caminho)
+
+    def fechar(self):
+        if self._file is not None:
+            self.sincronizar()
+            self._file.close()
+            self._file = None
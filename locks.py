@@ -0,0 +1,55 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+# Travas por (usuário, seção); somem sozinhas quando ninguém mais as usa
+class LockManager:
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+
+    def lock(self, user_id: str, secao: str = "*") -> asyncio.Lock:
+        chave = (user_id, secao)
+        lock = self._locks.get(chave)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[chave] = lock
+        return lock
+
+    @asynccontextmanager
+    async def travar(self, user_id: str, *secoes: str):
+        # Ordem fixa de aquisição evita deadlock entre fluxos que travam várias seções
+        locks = [self.lock(user_id, secao) for secao in sorted(set(secoes))]
+        adquiridos = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                adquiridos.append(lock)
+            yield
+        finally:
+            for lock in reversed(adquiridos):
+                lock.release()
+
+locks = LockManager()
+
+# Processa updates de usuários diferentes em paralelo, mas os de um mesmo usuário em ordem.
+# A fila por usuário vem antes do semáforo global: um update esperando a vez do seu usuário não
+# ocupa uma das vagas de concorrência (senão um usuário insistente travaria todos os outros)
+class ProcessadorPorUsuario(BaseUpdateProcessor):
+    async def process_update(self, update, coroutine):
+        user = update.effective_user if isinstance(update, Update) else None
+        if user is None:
+            await super().process_update(update, coroutine)
+            return
+        async with locks.travar(str(user.id), "*"):
+            await super().process_update(update, coroutine)
+
+    async def do_process_update(self, update, coroutine):
+        await coroutine
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
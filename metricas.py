@@ -0,0 +1,211 @@
+import time
+import asyncio
+import logging
+import functools
+import threading
+from telegram.ext import ConversationHandler
+from telegram.request import HTTPXRequest
+from config import METRICAS_HOST, METRICAS_PORTA, LIMITE_HANDLER_LENTO, LAG_INTERVALO
+
+logger = logging.getLogger(__name__)
+
+# Métricas em memória expostas no formato texto do Prometheus (sem dependências externas)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _rotulos(nomes: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{nome}="{valor}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+class Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.valores = {}
+        # Observações chegam também das threads do pool de I/O
+        self._trava = threading.Lock()
+
+    def _chave(self, rotulos: dict) -> tuple:
+        return tuple(str(rotulos.get(nome, "")) for nome in self.rotulos)
+
+    def linhas(self):
+        yield f"# HELP {self.nome} {self.ajuda}"
+        yield f"# TYPE {self.nome} {self.tipo}"
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def inc(self, valor: float = 1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._trava:
+            self.valores[chave] = self.valores.get(chave, 0) + valor
+
+    def linhas(self):
+        # Cópia sob a trava: as threads do pool podem incluir chaves enquanto o texto é montado
+        with self._trava:
+            valores = sorted(self.valores.items())
+        yield from super().linhas()
+        for chave, valor in valores:
+            yield f"{self.nome}{_rotulos(self.rotulos, chave)} {valor}"
+
+class Histograma(Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = (), buckets: tuple = BUCKETS):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = buckets
+
+    def observar(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        with self._trava:
+            contagens, soma, total = self.valores.get(chave) or ([0] * len(self.buckets), 0.0, 0)
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    contagens[i] += 1
+            self.valores[chave] = (contagens, soma + valor, total + 1)
+
+    def linhas(self):
+        # As contagens são alteradas no lugar: copia as listas também
+        with self._trava:
+            valores = sorted((chave, (list(contagens), soma, total)) for chave, (contagens, soma, total) in self.valores.items())
+        yield from super().linhas()
+        for chave, (contagens, soma, total) in valores:
+            limites = [str(limite) for limite in self.buckets] + ["+Inf"]
+            for limite, contagem in zip(limites, contagens + [total]):
+                le = f'le="{limite}"'
+                yield f"{self.nome}_bucket{_rotulos(self.rotulos, chave, le)} {contagem}"
+            yield f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {soma}"
+            yield f"{self.nome}_count{_rotulos(self.rotulos, chave)} {total}"
+
+class Registro:
+    def __init__(self):
+        self.metricas = []
+
+    def adicionar(self, metrica: Metrica) -> Metrica:
+        self.metricas.append(metrica)
+        return metrica
+
+    def texto(self) -> str:
+        return "\n".join(linha for metrica in self.metricas for linha in metrica.linhas()) + "\n"
+
+registro = Registro()
+handler_segundos = registro.adicionar(Histograma(
+    "finfacil_handler_segundos", "Duração de cada handler do bot", ("handler",)))
+handler_erros = registro.adicionar(Contador(
+    "finfacil_handler_erros_total", "Exceções lançadas por handler", ("handler",)))
+json_segundos = registro.adicionar(Histograma(
+    "finfacil_json_segundos", "Tempo de leitura, parse, serialização e escrita dos arquivos JSON", ("etapa",)))
+json_bytes = registro.adicionar(Contador(
+    "finfacil_json_bytes_total", "Bytes lidos e gravados em arquivos JSON", ("operacao",)))
+telegram_segundos = registro.adicionar(Histograma(
+    "finfacil_telegram_api_segundos", "Duração das chamadas à Bot API", ("metodo",)))
+envio_retry_after = registro.adicionar(Contador(
+    "finfacil_envio_retry_after_total", "Respostas 429 (flood control) recebidas da Bot API", ("metodo",)))
+envio_agrupadas = registro.adicionar(Contador(
+    "finfacil_envio_agrupadas_total", "Mensagens de texto unidas a outra antes do envio"))
+envio_espera = registro.adicionar(Histograma(
+    "finfacil_envio_espera_segundos", "Tempo na fila de envio até a chamada à Bot API"))
+loop_atraso = registro.adicionar(Histograma(
+    "finfacil_event_loop_atraso_segundos", "Atraso do event loop em relação ao agendado"))
+
+# Handlers
+def instrumentar(func, nome: str = None):
+    # Decorator para callbacks de handler: latência, erros e aviso de handler lento
+    if getattr(func, "instrumentado", False):
+        return func
+    nome = nome or func.__name__
+
+    @functools.wraps(func)
+    async def medido(update, context):
+        inicio = time.perf_counter()
+        try:
+            return await func(update, context)
+        except Exception:
+            handler_erros.inc(handler=nome)
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            handler_segundos.observar(duracao, handler=nome)
+            if LIMITE_HANDLER_LENTO and duracao >= LIMITE_HANDLER_LENTO:
+                logger.warning("Handler lento: %s levou %.0f ms", nome, duracao * 1000)
+
+    medido.instrumentado = True
+    return medido
+
+def _instrumentar_handler(handler):
+    if isinstance(handler, ConversationHandler):
+        for filho in handler.entry_points + handler.fallbacks:
+            _instrumentar_handler(filho)
+        for handlers in handler.states.values():
+            for filho in handlers:
+                _instrumentar_handler(filho)
+    elif getattr(handler, "callback", None) is not None:
+        handler.callback = instrumentar(handler.callback)
+
+def instrumentar_handlers(app):
+    # Aplica o decorator a todos os handlers registrados, inclusive os de dentro das conversas
+    for handlers in app.handlers.values():
+        for handler in handlers:
+            _instrumentar_handler(handler)
+
+# Bot API
+class RequisicaoMedida(HTTPXRequest):
+    async def do_request(self, url: str, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return await super().do_request(url, *args, **kwargs)
+        finally:
+            telegram_segundos.observar(time.perf_counter() - inicio, metodo=url.rsplit("/", 1)[-1])
+
+# Event loop e servidor HTTP
+async def _monitorar_loop(intervalo: float):
+    while True:
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        loop_atraso.observar(max(0.0, time.perf_counter() - inicio - intervalo))
+
+async def _responder(leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+    try:
+        linha = await leitor.readline()
+        while (await leitor.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        partes = linha.decode("latin-1").split()
+        if len(partes) >= 2 and partes[0] == "GET" and partes[1].split("?")[0] == "/metrics":
+            corpo = registro.texto().encode("utf-8")
+            status, tipo = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            corpo, status, tipo = b"not found\n", "404 Not Found", "text/plain"
+        escritor.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {tipo}\r\nContent-Length: {len(corpo)}\r\nConnection: close\r\n\r\n".encode()
+            + corpo
+        )
+        await escritor.drain()
+    finally:
+        escritor.close()
+
+class Exportador:
+    def __init__(self):
+        self._servidor = None
+        self._monitor = None
+
+    async def iniciar(self, host: str = METRICAS_HOST, porta: int = METRICAS_PORTA):
+        if self._monitor is None:
+            self._monitor = asyncio.get_running_loop().create_task(_monitorar_loop(LAG_INTERVALO))
+        if porta and self._servidor is None:
+            self._servidor = await asyncio.start_server(_responder, host, porta)
+            logger.info("Métricas em http://%s:%d/metrics", host, porta)
+
+    async def parar(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+
+exportador = Exportador()
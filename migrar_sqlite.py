@@ -0,0 +1,44 @@
+import ambiente
+
+# Executado como script: o .env entra no ambiente antes de config ser importado
+if __name__ == "__main__":
+    ambiente.carregar()
+
+import argparse
+import logging
+import logger_config
+from storage import LedgerStore
+from sqlite_store import SqliteStore
+from config import SQLITE_PATH, preparar_diretorios
+
+logger = logging.getLogger(__name__)
+
+# Migração única dos arquivos data/*.json (e diários pendentes) para o banco SQLite
+def migrar(destino: str = SQLITE_PATH, forcar: bool = False):
+    origem = LedgerStore()
+    origem.carregar()
+    banco = SqliteStore(destino)
+    banco.carregar()
+    if not banco.vazio() and not forcar:
+        raise SystemExit(f"O banco {destino} já possui dados. Use --forcar para sobrescrever.")
+    banco.importar(
+        saldos=origem.dados["dados"],
+        despesas=origem.dados["despesas"],
+        entradas=origem.dados["entradas"],
+        categorias={secao: origem.dados[secao] for secao in ("categorias_despesas", "categorias_entrada")},
+    )
+    logger.info(
+        "Migrados %d saldos, %d despesas e %d entradas para %s",
+        len(origem.dados["dados"]),
+        sum(len(r) for r in origem.dados["despesas"].values()),
+        sum(len(r) for r in origem.dados["entradas"].values()),
+        destino,
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra os dados JSON para SQLite.")
+    parser.add_argument("--destino", default=SQLITE_PATH, help="Caminho do banco SQLite")
+    parser.add_argument("--forcar", action="store_true", help="Apaga dados existentes no banco")
+    args = parser.parse_args()
+    preparar_diretorios()
+    migrar(args.destino, args.forcar)
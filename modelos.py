@@ -0,0 +1,40 @@
+from utils import normalize_category, data_ordinal
+
+# Registros compactos (__slots__); dicts só existem na borda de persistência
+class Registro:
+    __slots__ = ("id", "centavos", "categoria", "categoria_norm", "data", "data_ord", "observacao")
+    CAMPOS = ("id", "centavos", "categoria", "data", "observacao", "data_ord")
+
+    def __init__(self, centavos: int, categoria: str, data: str, observacao: str = "", id: int = None, data_ord: int = None):
+        self.id = id
+        self.centavos = centavos
+        self.categoria = categoria
+        self.categoria_norm = normalize_category(categoria or "")
+        self.data = data
+        self.data_ord = data_ord if data_ord is not None else data_ordinal(data)
+        self.observacao = observacao or ""
+
+    @classmethod
+    def from_dict(cls, dados: dict):
+        return cls(**{campo: dados.get(campo) for campo in cls.CAMPOS})
+
+    def to_dict(self) -> dict:
+        return {campo: getattr(self, campo) for campo in self.CAMPOS}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Despesa(Registro):
+    # comprovante: file_id do Telegram; comprovante_local: caminho no arquivo local (comprovantes.py)
+    __slots__ = ("comprovante", "comprovante_local")
+    CAMPOS = ("id", "centavos", "categoria", "data", "comprovante", "comprovante_local", "observacao", "data_ord")
+
+    def __init__(self, centavos: int, categoria: str, data: str, observacao: str = "", comprovante: str = None, id: int = None, data_ord: int = None, comprovante_local: str = None):
+        super().__init__(centavos, categoria, data, observacao, id, data_ord)
+        self.comprovante = comprovante
+        self.comprovante_local = comprovante_local
+
+class Entrada(Registro):
+    __slots__ = ()
+
+MODELOS = {"despesas": Despesa, "entradas": Entrada}
@@ -0,0 +1,20 @@
+from config import LIMITE_MENSAGEM
+
+def paginar(blocos, cabecalho: str = "", limite: int = LIMITE_MENSAGEM):
+    # Agrupa os blocos em páginas de até 'limite' caracteres; gera (texto, blocos na página)
+    partes = [cabecalho]
+    tamanho = len(cabecalho)
+    quantidade = 0
+    for bloco in blocos:
+        if len(bloco) > limite - len(cabecalho):
+            bloco = bloco[:limite - len(cabecalho) - 2] + "…\n"
+        if quantidade and tamanho + len(bloco) > limite:
+            yield "".join(partes), quantidade
+            partes = [cabecalho]
+            tamanho = len(cabecalho)
+            quantidade = 0
+        partes.append(bloco)
+        tamanho += len(bloco)
+        quantidade += 1
+    if quantidade:
+        yield "".join(partes), quantidade
@@ -0,0 +1,106 @@
+from abc import ABC, abstractmethod
+
+# Interface comum dos backends de armazenamento (JSON ou SQLite).
+# Despesas e entradas trafegam como modelos.Despesa / modelos.Entrada
+class Repositorio(ABC):
+    @abstractmethod
+    def carregar(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def listar_usuarios(self) -> list:
+        raise NotImplementedError
+
+    # Saldo
+    @abstractmethod
+    def usuario_existe(self, user_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_saldo(self, user_id: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def ajustar_saldo(self, user_id: str, delta):
+        raise NotImplementedError
+
+    # Despesas
+    @abstractmethod
+    def listar_despesas(self, user_id: str) -> list:
+        raise NotImplementedError
+
+    @abstractmethod
+    def consultar_despesas(self, user_id: str, inicio=None, fim=None, categoria=None) -> list:
+        raise NotImplementedError
+
+    def adicionar_despesas(self, user_id: str, despesas: list) -> list:
+        # Inclusão em lote (importação); os backends gravam tudo de uma vez
+        return [self.adicionar_despesa(user_id, despesa) for despesa in despesas]
+
+    @abstractmethod
+    def obter_despesas(self, user_id: str, ids) -> dict:
+        # {id: Despesa} apenas para os ids existentes
+        raise NotImplementedError
+
+    @abstractmethod
+    def adicionar_despesa(self, user_id: str, despesa):
+        raise NotImplementedError
+
+    @abstractmethod
+    def definir_comprovante_local(self, user_id: str, despesa_id: int, caminho: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def remover_despesas_categoria(self, user_id: str, cat_norm: str) -> list:
+        raise NotImplementedError
+
+    # Entradas
+    @abstractmethod
+    def listar_entradas(self, user_id: str) -> list:
+        raise NotImplementedError
+
+    @abstractmethod
+    def consultar_entradas(self, user_id: str, inicio=None, fim=None, categoria=None) -> list:
+        raise NotImplementedError
+
+    @abstractmethod
+    def adicionar_entrada(self, user_id: str, entrada):
+        raise NotImplementedError
+
+    def adicionar_entradas(self, user_id: str, entradas: list) -> list:
+        return [self.adicionar_entrada(user_id, entrada) for entrada in entradas]
+
+    # Categorias ("categorias_despesas" ou "categorias_entrada")
+    @abstractmethod
+    def get_categorias(self, secao: str, user_id: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_categorias(self, secao: str, user_id: str, lista: list):
+        raise NotImplementedError
+
+    @abstractmethod
+    def todas_categorias(self, secao: str) -> dict:
+        raise NotImplementedError
+
+    # Ciclo de vida
+    @abstractmethod
+    def importar(self, saldos: dict, despesas: dict, entradas: dict, categorias: dict):
+        # Carga completa (migração/partição): {user_id: saldo}, {user_id: [registros]}, {secao: {user_id: lista}}
+        raise NotImplementedError
+
+    async def sincronizar(self):
+        # Garante em disco as gravações já feitas (o JSON agrupa os fsyncs do diário)
+        pass
+
+    async def flush_async(self) -> int:
+        return self.flush()
+
+    def flush(self) -> int:
+        return 0
+
+    def iniciar_flush(self, intervalo: float = None):
+        pass
+
+    async def parar(self):
+        pass
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from config import RESUMO_CACHE_SIZE
+
+# numpy só é importado quando o primeiro resumo é calculado (o /resumo é raro e o import custa ~60 ms
+# na inicialização)
+
+# Cache colunar por (tipo, usuário): ordinais de data, mês, código de categoria e valor em centavos
+class Colunas:
+    def __init__(self, registros: list):
+        self._codigos = {}
+        self.categorias = []
+        self.data_ord, self.meses, self.cats, self.centavos = self._converter(registros)
+
+    def _converter(self, registros: list):
+        import numpy as np
+        n = len(registros)
+        data_ord = np.full(n, -1, dtype=np.int64)
+        meses = np.full(n, -1, dtype=np.int64)
+        cats = np.empty(n, dtype=np.int64)
+        for i, r in enumerate(registros):
+            if r.data_ord is not None:
+                data_ord[i] = r.data_ord
+                meses[i] = int(r.data[6:10]) * 12 + int(r.data[3:5]) - 1
+            cat = r.categoria_norm
+            codigo = self._codigos.get(cat)
+            if codigo is None:
+                codigo = self._codigos[cat] = len(self.categorias)
+                self.categorias.append(cat)
+            cats[i] = codigo
+        centavos = np.fromiter((r.centavos for r in registros), dtype=np.int64, count=n)
+        return data_ord, meses, cats, centavos
+
+    def estender(self, registros: list):
+        # Inclusões só acrescentam linhas: converte apenas os novos registros
+        import numpy as np
+        novos = self._converter(registros)
+        self.data_ord, self.meses, self.cats, self.centavos = (
+            np.concatenate((atual, novo))
+            for atual, novo in zip((self.data_ord, self.meses, self.cats, self.centavos), novos)
+        )
+
+    def resumir(self, inicio_ord=None, fim_ord=None) -> dict:
+        import numpy as np
+        mascara = np.ones(len(self.cats), dtype=bool)
+        if inicio_ord is not None or fim_ord is not None:
+            mascara &= self.data_ord >= 0
+        if inicio_ord is not None:
+            mascara &= self.data_ord >= inicio_ord
+        if fim_ord is not None:
+            mascara &= self.data_ord <= fim_ord
+        cats = self.cats[mascara]
+        centavos = self.centavos[mascara]
+        meses = self.meses[mascara]
+
+        total_cat = np.bincount(cats, weights=centavos, minlength=len(self.categorias))
+        conta_cat = np.bincount(cats, minlength=len(self.categorias))
+        por_categoria = [
+            (self.categorias[c], int(total_cat[c]), int(conta_cat[c]))
+            for c in np.flatnonzero(conta_cat)
+        ]
+        por_categoria.sort(key=lambda item: -item[1])
+
+        validos = meses >= 0
+        chaves, inverso = np.unique(meses[validos], return_inverse=True)
+        total_mes = np.bincount(inverso, weights=centavos[validos], minlength=len(chaves))
+        conta_mes = np.bincount(inverso, minlength=len(chaves))
+        por_mes = [
+            (f"{m // 12:04d}-{m % 12 + 1:02d}", int(total_mes[i]), int(conta_mes[i]))
+            for i, m in enumerate(chaves)
+        ]
+        return {
+            "total": int(centavos.sum()),
+            "quantidade": int(len(centavos)),
+            "por_categoria": por_categoria,
+            "por_mes": por_mes,
+        }
+
+class ResumoCache:
+    # LRU limitado a RESUMO_CACHE_SIZE pares (tipo, usuário). Inclusões ficam pendentes e entram nas
+    # colunas no próximo resumo; remoções descartam a entrada, que é remontada quando for usada
+    def __init__(self, tamanho: int = RESUMO_CACHE_SIZE):
+        self.tamanho = tamanho
+        self._colunas = OrderedDict()
+        self._pendentes = {}
+
+    def colunas(self, tipo: str, user_id: str, carregar) -> Colunas:
+        chave = (tipo, user_id)
+        colunas = self._colunas.get(chave)
+        if colunas is None:
+            colunas = Colunas(carregar(user_id))
+            self._pendentes.pop(chave, None)
+            self._colunas[chave] = colunas
+            if len(self._colunas) > self.tamanho:
+                antiga, _ = self._colunas.popitem(last=False)
+                self._pendentes.pop(antiga, None)
+        else:
+            self._colunas.move_to_end(chave)
+            pendentes = self._pendentes.pop(chave, None)
+            if pendentes:
+                colunas.estender(pendentes)
+        return colunas
+
+    def acrescentar(self, tipo: str, user_id: str, registros: list):
+        chave = (tipo, user_id)
+        if chave in self._colunas:
+            self._pendentes.setdefault(chave, []).extend(registros)
+
+    def invalidar(self, tipo: str, user_id: str):
+        self._colunas.pop((tipo, user_id), None)
+        self._pendentes.pop((tipo, user_id), None)
+
+resumos = ResumoCache()
@@ -0,0 +1,239 @@
+import ambiente
+
+# Executado como script: o .env entra no ambiente antes de config ser importado
+if __name__ == "__main__":
+    ambiente.carregar()
+
+import os
+import signal
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from telegram import Bot, Update
+from config import (
+    TOKEN, BOT_API_URL, SHARDS, BOT_MODO, DATA_DIR, STORAGE_BACKEND, SQLITE_PATH, WEBHOOK_HOST, WEBHOOK_PORTA, METRICAS_PORTA,
+    preparar_diretorios
+)
+from storage import SECOES, LedgerStore, criar_repositorio, store
+from data_manager import reparar_categorias
+from bot import criar_app, criar_persistencia, registrar_inicio
+from ciclo_vida import iniciar_app, encerrar_app, sinal_de_parada
+import logger_config
+
+logger = logging.getLogger(__name__)
+
+# Roteador de shards: um processo recebe os updates (polling ou webhook) e os repassa para N workers
+# por user_id. Cada worker tem sua própria pasta de dados (data/shard_<n>) e o estado das conversas
+# em disco, então pode ser reiniciado sem derrubar quem está no meio de um fluxo.
+#   python shards.py --particionar   # divide os dados atuais entre as pastas dos shards
+#   python shards.py                 # sobe o roteador e os SHARDS workers
+
+# Campos de um update que carregam o usuário (em "from" ou "user")
+CAMPOS_USUARIO = (
+    "message", "edited_message", "callback_query", "inline_query", "chosen_inline_result",
+    "shipping_query", "pre_checkout_query", "poll_answer", "my_chat_member", "chat_member",
+    "chat_join_request", "channel_post", "edited_channel_post",
+)
+
+def usuario_do_update(dados: dict):
+    for campo in CAMPOS_USUARIO:
+        objeto = dados.get(campo)
+        if not isinstance(objeto, dict):
+            continue
+        usuario = objeto.get("from") or objeto.get("user")
+        if usuario:
+            return usuario["id"]
+        chat = objeto.get("chat")
+        if chat:
+            return chat["id"]
+    return None
+
+def shard_do_usuario(user_id, shards: int) -> int:
+    # Estável entre processos e reinícios (hash() de str muda a cada execução)
+    return int(user_id) % shards if user_id is not None else 0
+
+def diretorio_shard(indice: int) -> str:
+    return os.path.join(DATA_DIR, f"shard_{indice}")
+
+# Worker
+async def _executar_worker(fila):
+    preparar_diretorios()
+    store.carregar()
+    reparar_categorias()
+    app = criar_app(criar_persistencia(), com_updater=False)
+    registrar_inicio()
+    await iniciar_app(app)
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            dados = await loop.run_in_executor(None, fila.get)
+            if dados is None:
+                break
+            # Um update que não se converte é descartado; não pode derrubar o worker
+            try:
+                update = Update.de_json(dados, app.bot)
+            except Exception:
+                logger.exception("Update inválido descartado: %.200r", dados)
+                continue
+            await app.update_queue.put(update)
+    finally:
+        await encerrar_app(app)
+
+def _worker(indice: int, fila):
+    # Quem decide a parada é o roteador (Ctrl+C chega a todo o grupo de processos)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logger.info("Shard %d usando %s", indice, os.environ.get("DATA_DIR"))
+    asyncio.run(_executar_worker(fila))
+
+# Roteador
+class Roteador:
+    def __init__(self, shards: int = SHARDS):
+        self.shards = shards
+        self.contexto = multiprocessing.get_context("spawn")
+        self.filas = [self.contexto.Queue() for _ in range(shards)]
+        self.processos = [None] * shards
+        self.parando = False
+
+    def _iniciar_shard(self, indice: int):
+        # Os workers são processos novos (spawn): cada um importa config com o seu DATA_DIR
+        # e expõe métricas na porta METRICAS_PORTA + 1 + índice
+        original = {nome: os.environ.get(nome) for nome in ("DATA_DIR", "METRICAS_PORTA")}
+        try:
+            os.environ["DATA_DIR"] = diretorio_shard(indice)
+            os.environ["METRICAS_PORTA"] = str(METRICAS_PORTA + 1 + indice if METRICAS_PORTA else 0)
+            os.makedirs(os.environ["DATA_DIR"], exist_ok=True)
+            processo = self.contexto.Process(target=_worker, args=(indice, self.filas[indice]), name=f"shard-{indice}")
+            processo.start()
+            self.processos[indice] = processo
+        finally:
+            for nome, valor in original.items():
+                if valor is None:
+                    os.environ.pop(nome, None)
+                else:
+                    os.environ[nome] = valor
+
+    def iniciar(self):
+        for indice in range(self.shards):
+            self._iniciar_shard(indice)
+
+    def _garantir_vivo(self, indice: int):
+        # Worker que morreu é recriado com a mesma fila: os updates já enfileirados não se perdem
+        processo = self.processos[indice]
+        if processo is not None and not processo.is_alive() and not self.parando:
+            logger.error("Shard %d encerrou (código %s); reiniciando", indice, processo.exitcode)
+            self._iniciar_shard(indice)
+
+    async def entregar(self, dados: dict):
+        indice = shard_do_usuario(usuario_do_update(dados), self.shards)
+        self._garantir_vivo(indice)
+        self.filas[indice].put(dados)
+
+    def estado(self) -> dict:
+        vivos = [processo.is_alive() for processo in self.processos]
+        return {"ok": all(vivos), "shards": vivos}
+
+    def parar(self, timeout: float = 30):
+        self.parando = True
+        for fila in self.filas:
+            fila.put(None)
+        for processo in self.processos:
+            processo.join(timeout)
+            if processo.is_alive():
+                logger.warning("Shard %s não encerrou a tempo; finalizando", processo.name)
+                processo.terminate()
+
+async def _polling(bot: Bot, entregar, posicao: dict):
+    # posicao["offset"]: próximo update a pedir, lido na parada para confirmar o último lote
+    while True:
+        try:
+            updates = await bot.get_updates(offset=posicao["offset"], timeout=30, allowed_updates=Update.ALL_TYPES)
+        except Exception:
+            logger.exception("Falha no getUpdates; tentando de novo")
+            await asyncio.sleep(5)
+            continue
+        for update in updates:
+            await entregar(update.to_dict())
+            posicao["offset"] = update.update_id + 1
+
+async def rotear(roteador: Roteador, modo: str = BOT_MODO):
+    parar = sinal_de_parada()
+    async with Bot(TOKEN, base_url=f"{BOT_API_URL}/bot") as bot:
+        if modo == "webhook":
+            # aiohttp só é necessário no modo webhook
+            from webhook import conferir_seguranca, criar_servidor, ouvir, registrar_webhook
+            conferir_seguranca(WEBHOOK_HOST)
+            await registrar_webhook(bot)
+            runner = await ouvir(criar_servidor(roteador.entregar, roteador.estado), WEBHOOK_HOST, WEBHOOK_PORTA)
+            await parar.wait()
+            await runner.cleanup()
+        else:
+            await bot.delete_webhook()
+            posicao = {"offset": None}
+            tarefa = asyncio.create_task(_polling(bot, roteador.entregar, posicao))
+            await parar.wait()
+            tarefa.cancel()
+            try:
+                await tarefa
+            except asyncio.CancelledError:
+                pass
+            # Confirma ao Telegram o último lote entregue, senão ele volta no próximo início (como o Updater do PTB)
+            if posicao["offset"] is not None:
+                try:
+                    await bot.get_updates(offset=posicao["offset"], timeout=0)
+                except Exception:
+                    logger.exception("Falha ao confirmar o último offset")
+
+# Partição dos dados existentes
+def _destino(indice: int):
+    pasta = diretorio_shard(indice)
+    os.makedirs(pasta, exist_ok=True)
+    if STORAGE_BACKEND == "sqlite":
+        from sqlite_store import SqliteStore
+        return SqliteStore(os.path.join(pasta, os.path.basename(SQLITE_PATH)))
+    return LedgerStore({secao: os.path.join(pasta, os.path.basename(caminho)) for secao, caminho in SECOES.items()})
+
+def particionar(shards: int = SHARDS, forcar: bool = False):
+    for indice in range(shards):
+        pasta = diretorio_shard(indice)
+        if os.path.isdir(pasta) and os.listdir(pasta) and not forcar:
+            raise SystemExit(f"{pasta} já possui dados. Use --forcar para sobrescrever.")
+    origem = criar_repositorio()
+    origem.carregar()
+    partes = [
+        {"saldos": {}, "despesas": {}, "entradas": {}, "categorias": {"categorias_despesas": {}, "categorias_entrada": {}}}
+        for _ in range(shards)
+    ]
+    for user_id in origem.listar_usuarios():
+        parte = partes[shard_do_usuario(user_id, shards)]
+        if origem.usuario_existe(user_id):
+            parte["saldos"][user_id] = origem.get_saldo(user_id)
+        parte["despesas"][user_id] = origem.listar_despesas(user_id)
+        parte["entradas"][user_id] = origem.listar_entradas(user_id)
+    for secao in ("categorias_despesas", "categorias_entrada"):
+        for user_id, lista in origem.todas_categorias(secao).items():
+            partes[shard_do_usuario(user_id, shards)]["categorias"][secao][user_id] = lista
+    for indice, parte in enumerate(partes):
+        destino = _destino(indice)
+        destino.importar(**parte)
+        logger.info("Shard %d: %d usuário(s) em %s", indice, len(parte["despesas"]), diretorio_shard(indice))
+
+def main():
+    parser = argparse.ArgumentParser(description="Roteia os updates para workers particionados por usuário.")
+    parser.add_argument("--shards", type=int, default=SHARDS, help="Número de workers")
+    parser.add_argument("--particionar", action="store_true", help="Divide os dados atuais entre os shards e sai")
+    parser.add_argument("--forcar", action="store_true", help="Sobrescreve pastas de shard com dados")
+    args = parser.parse_args()
+    preparar_diretorios()
+    if args.particionar:
+        particionar(args.shards, args.forcar)
+        return
+    roteador = Roteador(args.shards)
+    roteador.iniciar()
+    try:
+        asyncio.run(rotear(roteador))
+    finally:
+        roteador.parar()
+
+if __name__ == "__main__":
+    main()
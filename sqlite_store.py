@@ -0,0 +1,284 @@
+import json
+import sqlite3
+import logging
+from repositorio import Repositorio
+from modelos import MODELOS
+from config import SQLITE_PATH
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saldos (
+    user_id TEXT PRIMARY KEY,
+    saldo INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS despesas (
+    user_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    centavos INTEGER NOT NULL,
+    categoria TEXT NOT NULL,
+    categoria_norm TEXT NOT NULL,
+    data TEXT,
+    data_ord INTEGER,
+    comprovante TEXT,
+    comprovante_local TEXT,
+    observacao TEXT,
+    PRIMARY KEY (user_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_despesas_data ON despesas (user_id, data_ord);
+CREATE INDEX IF NOT EXISTS idx_despesas_categoria ON despesas (user_id, categoria_norm);
+CREATE TABLE IF NOT EXISTS entradas (
+    user_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    centavos INTEGER NOT NULL,
+    categoria TEXT NOT NULL,
+    categoria_norm TEXT NOT NULL,
+    data TEXT,
+    data_ord INTEGER,
+    observacao TEXT,
+    PRIMARY KEY (user_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_entradas_data ON entradas (user_id, data_ord);
+CREATE INDEX IF NOT EXISTS idx_entradas_categoria ON entradas (user_id, categoria_norm);
+CREATE TABLE IF NOT EXISTS categorias (
+    secao TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    lista TEXT NOT NULL,
+    PRIMARY KEY (secao, user_id)
+);
+"""
+
+CAMPOS = {
+    "despesas": ("id", "centavos", "categoria", "data", "comprovante", "comprovante_local", "observacao"),
+    "entradas": ("id", "centavos", "categoria", "data", "observacao"),
+}
+
+# Versão 1: valores em centavos (INTEGER) em vez de reais (REAL)
+# Versão 2: caminho do comprovante no arquivo local
+VERSAO_SCHEMA = 2
+
+MIGRACAO_CENTAVOS = """
+DROP INDEX IF EXISTS idx_despesas_data;
+DROP INDEX IF EXISTS idx_despesas_categoria;
+DROP INDEX IF EXISTS idx_entradas_data;
+DROP INDEX IF EXISTS idx_entradas_categoria;
+ALTER TABLE saldos RENAME TO saldos_v0;
+ALTER TABLE despesas RENAME TO despesas_v0;
+ALTER TABLE entradas RENAME TO entradas_v0;
+"""
+
+COPIA_CENTAVOS = """
+INSERT INTO saldos SELECT user_id, CAST(ROUND(saldo * 100) AS INTEGER) FROM saldos_v0;
+INSERT INTO despesas (user_id, id, centavos, categoria, categoria_norm, data, data_ord, comprovante, observacao)
+    SELECT user_id, id, CAST(ROUND(valor * 100) AS INTEGER), categoria, categoria_norm,
+    data, data_ord, comprovante, observacao FROM despesas_v0;
+INSERT INTO entradas SELECT user_id, id, CAST(ROUND(valor * 100) AS INTEGER), categoria, categoria_norm,
+    data, data_ord, observacao FROM entradas_v0;
+DROP TABLE saldos_v0;
+DROP TABLE despesas_v0;
+DROP TABLE entradas_v0;
+"""
+
+class SqliteStore(Repositorio):
+    def __init__(self, caminho: str = SQLITE_PATH):
+        self.caminho = caminho
+        self.conn = None
+
+    def carregar(self):
+        if self.conn is not None:
+            return
+        self.conn = sqlite3.connect(self.caminho)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        versao = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        legado = self.conn.execute(
+            "SELECT 1 FROM pragma_table_info('despesas') WHERE name = 'valor'"
+        ).fetchone() is not None
+        if legado:
+            logger.info("Migrando %s para valores em centavos", self.caminho)
+            self.conn.executescript("BEGIN;" + MIGRACAO_CENTAVOS + SCHEMA + COPIA_CENTAVOS + "COMMIT;")
+        else:
+            self.conn.executescript(SCHEMA)
+        sem_local = self.conn.execute(
+            "SELECT 1 FROM pragma_table_info('despesas') WHERE name = 'comprovante_local'"
+        ).fetchone() is None
+        if sem_local:
+            self.conn.execute("ALTER TABLE despesas ADD COLUMN comprovante_local TEXT")
+        if versao != VERSAO_SCHEMA:
+            self.conn.execute(f"PRAGMA user_version = {VERSAO_SCHEMA}")
+
+    def _db(self) -> sqlite3.Connection:
+        if self.conn is None:
+            self.carregar()
+        return self.conn
+
+    def listar_usuarios(self) -> list:
+        rows = self._db().execute(
+            "SELECT user_id FROM saldos UNION SELECT user_id FROM despesas UNION SELECT user_id FROM entradas"
+        )
+        return sorted(row[0] for row in rows)
+
+    # Saldo
+    def usuario_existe(self, user_id: str) -> bool:
+        return self._db().execute("SELECT 1 FROM saldos WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def get_saldo(self, user_id: str):
+        row = self._db().execute("SELECT saldo FROM saldos WHERE user_id = ?", (user_id,)).fetchone()
+        return row["saldo"] if row else 0
+
+    def ajustar_saldo(self, user_id: str, delta):
+        with self._db() as conn:
+            conn.execute(
+                "INSERT INTO saldos (user_id, saldo) VALUES (?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET saldo = saldo + excluded.saldo",
+                (user_id, delta)
+            )
+        return self.get_saldo(user_id)
+
+    # Despesas e entradas
+    def _registro(self, tabela: str, row):
+        modelo = MODELOS[tabela]
+        return modelo(**{campo: row[campo] for campo in modelo.CAMPOS})
+
+    def _listar(self, tabela: str, user_id: str) -> list:
+        rows = self._db().execute(f"SELECT * FROM {tabela} WHERE user_id = ? ORDER BY rowid", (user_id,))
+        return [self._registro(tabela, row) for row in rows]
+
+    def _consultar(self, tabela: str, user_id: str, inicio, fim, categoria) -> list:
+        sql = f"SELECT * FROM {tabela} WHERE user_id = ?"
+        params = [user_id]
+        if inicio is not None:
+            sql += " AND data_ord >= ?"
+            params.append(inicio.toordinal())
+        if fim is not None:
+            sql += " AND data_ord <= ?"
+            params.append(fim.toordinal())
+        if categoria is not None:
+            sql += " AND categoria_norm = ?"
+            params.append(categoria)
+        sql += " ORDER BY data_ord, rowid" if inicio is not None or fim is not None else " ORDER BY rowid"
+        return [self._registro(tabela, row) for row in self._db().execute(sql, params)]
+
+    def _linha(self, tabela: str, user_id: str, registro) -> tuple:
+        valores = [user_id] + [getattr(registro, campo) for campo in CAMPOS[tabela]]
+        valores += [registro.categoria_norm, registro.data_ord]
+        return tuple(valores)
+
+    def _inserir(self, conn, tabela: str, linhas):
+        colunas = ("user_id",) + CAMPOS[tabela] + ("categoria_norm", "data_ord")
+        marcadores = ", ".join("?" for _ in colunas)
+        conn.executemany(f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({marcadores})", linhas)
+
+    def _adicionar(self, tabela: str, user_id: str, registro):
+        return self._adicionar_lote(tabela, user_id, [registro])[0]
+
+    def _adicionar_lote(self, tabela: str, user_id: str, registros: list) -> list:
+        if not registros:
+            return []
+        with self._db() as conn:
+            proximo = conn.execute(
+                f"SELECT COALESCE(MAX(id), 0) + 1 FROM {tabela} WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+            for n, registro in enumerate(registros):
+                registro.id = proximo + n
+            self._inserir(conn, tabela, [self._linha(tabela, user_id, registro) for registro in registros])
+        return registros
+
+    def listar_despesas(self, user_id: str) -> list:
+        return self._listar("despesas", user_id)
+
+    def consultar_despesas(self, user_id: str, inicio=None, fim=None, categoria=None) -> list:
+        return self._consultar("despesas", user_id, inicio, fim, categoria)
+
+    def adicionar_despesas(self, user_id: str, despesas: list) -> list:
+        return self._adicionar_lote("despesas", user_id, despesas)
+
+    def obter_despesas(self, user_id: str, ids) -> dict:
+        ids = list(ids)
+        if not ids:
+            return {}
+        marcadores = ", ".join("?" for _ in ids)
+        rows = self._db().execute(
+            f"SELECT * FROM despesas WHERE user_id = ? AND id IN ({marcadores})", [user_id, *ids]
+        )
+        return {row["id"]: self._registro("despesas", row) for row in rows}
+
+    def adicionar_despesa(self, user_id: str, despesa):
+        return self._adicionar("despesas", user_id, despesa)
+
+    def definir_comprovante_local(self, user_id: str, despesa_id: int, caminho: str):
+        with self._db() as conn:
+            conn.execute(
+                "UPDATE despesas SET comprovante_local = ? WHERE user_id = ? AND id = ?",
+                (caminho, user_id, despesa_id)
+            )
+
+    def remover_despesas_categoria(self, user_id: str, cat_norm: str) -> list:
+        removidas = self._consultar("despesas", user_id, None, None, cat_norm)
+        if removidas:
+            with self._db() as conn:
+                conn.execute("DELETE FROM despesas WHERE user_id = ? AND categoria_norm = ?", (user_id, cat_norm))
+        return removidas
+
+    def listar_entradas(self, user_id: str) -> list:
+        return self._listar("entradas", user_id)
+
+    def consultar_entradas(self, user_id: str, inicio=None, fim=None, categoria=None) -> list:
+        return self._consultar("entradas", user_id, inicio, fim, categoria)
+
+    def adicionar_entrada(self, user_id: str, entrada):
+        return self._adicionar("entradas", user_id, entrada)
+
+    def adicionar_entradas(self, user_id: str, entradas: list) -> list:
+        return self._adicionar_lote("entradas", user_id, entradas)
+
+    # Categorias
+    def get_categorias(self, secao: str, user_id: str):
+        row = self._db().execute(
+            "SELECT lista FROM categorias WHERE secao = ? AND user_id = ?", (secao, user_id)
+        ).fetchone()
+        return json.loads(row["lista"]) if row else None
+
+    def set_categorias(self, secao: str, user_id: str, lista: list):
+        with self._db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO categorias (secao, user_id, lista) VALUES (?, ?, ?)",
+                (secao, user_id, json.dumps(lista, ensure_ascii=False))
+            )
+
+    def todas_categorias(self, secao: str) -> dict:
+        rows = self._db().execute("SELECT user_id, lista FROM categorias WHERE secao = ?", (secao,))
+        return {row["user_id"]: json.loads(row["lista"]) for row in rows}
+
+    # Importação em massa (migração/partição): substitui todo o conteúdo em uma única transação,
+    # então uma falha no meio não deixa o banco apagado
+    def importar(self, saldos: dict, despesas: dict, entradas: dict, categorias: dict):
+        with self._db() as conn:
+            for tabela in ("saldos", "despesas", "entradas", "categorias"):
+                conn.execute(f"DELETE FROM {tabela}")
+            conn.executemany(
+                "INSERT OR REPLACE INTO saldos (user_id, saldo) VALUES (?, ?)", saldos.items()
+            )
+            for tabela, dados in (("despesas", despesas), ("entradas", entradas)):
+                self._inserir(conn, tabela, (
+                    self._linha(tabela, user_id, registro)
+                    for user_id, registros in dados.items() for registro in registros
+                ))
+            conn.executemany(
+                "INSERT OR REPLACE INTO categorias (secao, user_id, lista) VALUES (?, ?, ?)",
+                ((secao, user_id, json.dumps(lista, ensure_ascii=False))
+                 for secao, por_usuario in categorias.items() for user_id, lista in por_usuario.items())
+            )
+
+    def vazio(self) -> bool:
+        db = self._db()
+        return all(
+            db.execute(f"SELECT 1 FROM {tabela} LIMIT 1").fetchone() is None
+            for tabela in ("saldos", "despesas", "entradas", "categorias")
+        )
+
+    async def parar(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
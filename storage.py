@@ -0,0 +1,426 @@
+import os
+import time
+import asyncio
+import logging
+from utils import carregar_json, salvar_json, reais_para_centavos
+from journal import Journal
+from indices import IndiceDatas
+from modelos import MODELOS
+from repositorio import Repositorio
+from executor_io import executor
+from config import (
+    DADOS_PATH, DESPESAS_PATH, ENTRADAS_PATH, CATEGORIAS_DESPESAS_PATH,
+    CATEGORIAS_ENTRADA_PATH, FLUSH_INTERVALO, JOURNAL_MAX_BYTES, JOURNAL_FSYNC,
+    COMPACTACAO_INTERVALO, STORAGE_BACKEND
+)
+
+logger = logging.getLogger(__name__)
+
+# Cada seção corresponde a um arquivo JSON particionado por user_id
+SECOES = {
+    "dados": DADOS_PATH,
+    "despesas": DESPESAS_PATH,
+    "entradas": ENTRADAS_PATH,
+    "categorias_despesas": CATEGORIAS_DESPESAS_PATH,
+    "categorias_entrada": CATEGORIAS_ENTRADA_PATH,
+}
+
+# Seções de registros que crescem sem limite: gravadas via diário append-only
+SECOES_JOURNAL = ("despesas", "entradas")
+# Seções de um valor por usuário (saldo, listas de categorias): o diário guarda o valor novo inteiro,
+# então reproduzir um evento já incorporado ao snapshot não muda nada
+SECOES_VALOR = ("dados", "categorias_despesas", "categorias_entrada")
+
+
+# Mantém todos os dados em memória e grava as partições alteradas em lote
+class LedgerStore(Repositorio):
+    def __init__(self, caminhos=None):
+        self.caminhos = dict(caminhos or SECOES)
+        self.dados = {secao: {} for secao in self.caminhos}
+        self.sujos = {secao: set() for secao in self.caminhos}
+        self.journais = {
+            secao: Journal(os.path.splitext(self.caminhos[secao])[0] + ".journal", fsync=JOURNAL_FSYNC)
+            for secao in SECOES_JOURNAL + SECOES_VALOR if secao in self.caminhos
+        }
+        self.ultima_compactacao = time.monotonic()
+        self._indices = {}
+        self._por_id = {}
+        self._migrar = set()
+        self.carregado = False
+        self._tarefa_flush = None
+        self._gravacao = None
+        self._sincronizacao = None
+
+    def carregar(self):
+        for secao, caminho in self.caminhos.items():
+            self.dados[secao] = carregar_json(caminho)
+            self.sujos[secao].clear()
+        self._migrar_saldos()
+        for secao, journal in self.journais.items():
+            if secao in SECOES_VALOR:
+                self._reproduzir_valores(secao, journal)
+            else:
+                self._reproduzir(secao, journal)
+                self._preparar_registros(secao)
+        self._indices.clear()
+        self._por_id.clear()
+        self.carregado = True
+
+    def _migrar_saldos(self):
+        # Saldos antigos eram float em reais; os atuais são int em centavos
+        dados = self.dados["dados"]
+        for user_id, saldo in dados.items():
+            if isinstance(saldo, float):
+                dados[user_id] = reais_para_centavos(saldo)
+                self._marcar("dados", user_id)
+
+    def _preparar_registros(self, secao: str):
+        # Converte os dicts lidos do disco em registros compactos. Arquivos antigos não têm
+        # a data pré-processada nem o valor em centavos: isso é gravado na próxima compactação
+        modelo = MODELOS[secao]
+        dados = self.dados[secao]
+        for user_id, registros in dados.items():
+            for registro in registros:
+                if "data_ord" not in registro:
+                    self._migrar.add(secao)
+                if "valor" in registro:
+                    registro["centavos"] = reais_para_centavos(registro.pop("valor"))
+                    self._migrar.add(secao)
+            dados[user_id] = [modelo.from_dict(registro) for registro in registros]
+
+    def _serializar(self, secao: str, dados: dict = None) -> dict:
+        dados = self.dados[secao] if dados is None else dados
+        if secao not in MODELOS:
+            return dados
+        return {
+            user_id: [registro.to_dict() for registro in registros]
+            for user_id, registros in dados.items()
+        }
+
+    def _copiar(self, secao: str) -> dict:
+        # Cópia rasa feita no event loop; serialização e escrita seguem em outra thread sem disputar os dicts
+        if secao in MODELOS:
+            return {user_id: list(registros) for user_id, registros in self.dados[secao].items()}
+        return dict(self.dados[secao])
+
+    def _gravar(self, secao: str, copia: dict):
+        salvar_json(self.caminhos[secao], self._serializar(secao, copia))
+
+    def _reproduzir(self, secao: str, journal: Journal):
+        dados = self.dados[secao]
+        for evento in journal.reproduzir():
+            registros = dados.setdefault(evento["user"], [])
+            if evento["op"] == "add":
+                # Idempotente: o diário pode conter eventos já incorporados ao snapshot
+                existentes = {r.get("id") for r in registros}
+                novos = evento["registros"] if "registros" in evento else [evento["registro"]]
+                registros.extend(r for r in novos if r["id"] not in existentes)
+            elif evento["op"] == "set":
+                for registro in registros:
+                    if registro.get("id") == evento["id"]:
+                        registro.update(evento["campos"])
+            elif evento["op"] == "del":
+                ids = set(evento["ids"])
+                dados[evento["user"]] = [r for r in registros if r.get("id") not in ids]
+
+    def _reproduzir_valores(self, secao: str, journal: Journal):
+        dados = self.dados[secao]
+        for evento in journal.reproduzir():
+            dados[evento["user"]] = evento["valor"]
+
+    def _secao(self, secao: str) -> dict:
+        if not self.carregado:
+            self.carregar()
+        return self.dados[secao]
+
+    def _marcar(self, secao: str, user_id: str):
+        self.sujos[secao].add(user_id)
+
+    def listar_usuarios(self) -> list:
+        usuarios = set()
+        for secao in ("dados", "despesas", "entradas"):
+            usuarios.update(self._secao(secao))
+        return sorted(usuarios)
+
+    # Saldo
+    def usuario_existe(self, user_id: str) -> bool:
+        return user_id in self._secao("dados")
+
+    def get_saldo(self, user_id: str):
+        return self._secao("dados").get(user_id, 0)
+
+    def ajustar_saldo(self, user_id: str, delta):
+        dados = self._secao("dados")
+        dados[user_id] = dados.get(user_id, 0) + delta
+        self._registrar("dados", user_id, {"op": "valor", "user": user_id, "valor": dados[user_id]})
+        return dados[user_id]
+
+    # Despesas e entradas
+    def _listar(self, secao: str, user_id: str) -> list:
+        return self._secao(secao).get(user_id, [])
+
+    def _adicionar(self, secao: str, user_id: str, registro):
+        registros = self._secao(secao).setdefault(user_id, [])
+        registro.id = max((r.id for r in registros), default=0) + 1
+        registros.append(registro)
+        indice = self._indices.get((secao, user_id))
+        if indice is not None:
+            indice.adicionar(registro)
+        por_id = self._por_id.get((secao, user_id))
+        if por_id is not None:
+            por_id[registro.id] = registro
+        self._registrar(secao, user_id, {"op": "add", "user": user_id, "registro": registro.to_dict()})
+        return registro
+
+    def _adicionar_lote(self, secao: str, user_id: str, novos: list) -> list:
+        # Um único evento no diário para o lote inteiro; índices são refeitos na próxima consulta
+        if not novos:
+            return []
+        registros = self._secao(secao).setdefault(user_id, [])
+        proximo = max((r.id for r in registros), default=0) + 1
+        for n, registro in enumerate(novos):
+            registro.id = proximo + n
+        registros.extend(novos)
+        self._indices.pop((secao, user_id), None)
+        self._por_id.pop((secao, user_id), None)
+        self._registrar(secao, user_id, {
+            "op": "add", "user": user_id, "registros": [registro.to_dict() for registro in novos]
+        })
+        return novos
+
+    def _registrar(self, secao: str, user_id: str, evento: dict):
+        journal = self.journais.get(secao)
+        if journal is None:
+            self._marcar(secao, user_id)
+        else:
+            journal.registrar(evento)
+
+    def _remover(self, secao: str, user_id: str, filtro) -> list:
+        registros = self._secao(secao).get(user_id)
+        if not registros:
+            return []
+        removidos = [r for r in registros if filtro(r)]
+        if removidos:
+            self._secao(secao)[user_id] = [r for r in registros if not filtro(r)]
+            self._indices.pop((secao, user_id), None)
+            self._por_id.pop((secao, user_id), None)
+            self._registrar(secao, user_id, {"op": "del", "user": user_id, "ids": [r.id for r in removidos]})
+        return removidos
+
+    def _indice(self, secao: str, user_id: str) -> IndiceDatas:
+        indice = self._indices.get((secao, user_id))
+        if indice is None:
+            indice = IndiceDatas(self._listar(secao, user_id))
+            self._indices[(secao, user_id)] = indice
+        return indice
+
+    def _obter(self, secao: str, user_id: str, ids) -> dict:
+        # Índice id -> registro por usuário, construído sob demanda
+        por_id = self._por_id.get((secao, user_id))
+        if por_id is None:
+            por_id = {r.id: r for r in self._listar(secao, user_id)}
+            self._por_id[(secao, user_id)] = por_id
+        return {i: por_id[i] for i in ids if i in por_id}
+
+    def _consultar(self, secao: str, user_id: str, inicio, fim, categoria) -> list:
+        if inicio is None and fim is None:
+            registros = self._listar(secao, user_id)
+        else:
+            registros = self._indice(secao, user_id).intervalo(
+                inicio.toordinal() if inicio is not None else None,
+                fim.toordinal() if fim is not None else None,
+            )
+        if categoria is None:
+            return list(registros)
+        return [r for r in registros if r.categoria_norm == categoria]
+
+    def listar_despesas(self, user_id: str) -> list:
+        return self._listar("despesas", user_id)
+
+    def consultar_despesas(self, user_id: str, inicio=None, fim=None, categoria=None) -> list:
+        return self._consultar("despesas", user_id, inicio, fim, categoria)
+
+    def adicionar_despesas(self, user_id: str, despesas: list) -> list:
+        return self._adicionar_lote("despesas", user_id, despesas)
+
+    def obter_despesas(self, user_id: str, ids) -> dict:
+        return self._obter("despesas", user_id, ids)
+
+    def adicionar_despesa(self, user_id: str, despesa):
+        return self._adicionar("despesas", user_id, despesa)
+
+    def definir_comprovante_local(self, user_id: str, despesa_id: int, caminho: str):
+        despesa = self._obter("despesas", user_id, [despesa_id]).get(despesa_id)
+        if despesa is None:
+            return
+        despesa.comprovante_local = caminho
+        self._registrar("despesas", user_id, {
+            "op": "set", "user": user_id, "id": despesa_id, "campos": {"comprovante_local": caminho}
+        })
+
+    def remover_despesas_categoria(self, user_id: str, cat_norm: str) -> list:
+        return self._remover("despesas", user_id, lambda d: d.categoria_norm == cat_norm)
+
+    def listar_entradas(self, user_id: str) -> list:
+        return self._listar("entradas", user_id)
+
+    def consultar_entradas(self, user_id: str, inicio=None, fim=None, categoria=None) -> list:
+        return self._consultar("entradas", user_id, inicio, fim, categoria)
+
+    def adicionar_entrada(self, user_id: str, entrada):
+        return self._adicionar("entradas", user_id, entrada)
+
+    def adicionar_entradas(self, user_id: str, entradas: list) -> list:
+        return self._adicionar_lote("entradas", user_id, entradas)
+
+    # Categorias ("categorias_despesas" ou "categorias_entrada")
+    def get_categorias(self, secao: str, user_id: str):
+        return self._secao(secao).get(user_id)
+
+    def set_categorias(self, secao: str, user_id: str, lista: list):
+        self._secao(secao)[user_id] = lista
+        self._registrar(secao, user_id, {"op": "valor", "user": user_id, "valor": list(lista)})
+
+    def todas_categorias(self, secao: str) -> dict:
+        return dict(self._secao(secao))
+
+    # Importação em massa (partição em shards)
+    def importar(self, saldos: dict, despesas: dict, entradas: dict, categorias: dict):
+        self.dados = {
+            "dados": dict(saldos),
+            "despesas": {user_id: list(registros) for user_id, registros in despesas.items()},
+            "entradas": {user_id: list(registros) for user_id, registros in entradas.items()},
+            "categorias_despesas": dict(categorias.get("categorias_despesas", {})),
+            "categorias_entrada": dict(categorias.get("categorias_entrada", {})),
+        }
+        self.carregado = True
+        self._indices.clear()
+        self._por_id.clear()
+        for secao, caminho in self.caminhos.items():
+            salvar_json(caminho, self._serializar(secao), rotacionar=False)
+            self.sujos[secao].clear()
+        for journal in self.journais.values():
+            journal.truncar()
+
+    # Persistência
+    def pendentes(self) -> int:
+        return sum(len(users) for users in self.sujos.values())
+
+    def flush(self) -> int:
+        # Cada arquivo é regravado uma única vez, não importa quantas alterações acumulou
+        gravados = 0
+        for secao, users in self.sujos.items():
+            if not users:
+                continue
+            salvar_json(self.caminhos[secao], self._serializar(secao))
+            gravados += len(users)
+            users.clear()
+        return gravados
+
+    def _a_compactar(self, forcar: bool) -> list:
+        # Incorpora o diário ao snapshot quando ele fica grande ou antigo demais
+        vencido = time.monotonic() - self.ultima_compactacao >= COMPACTACAO_INTERVALO
+        secoes = []
+        for secao, journal in self.journais.items():
+            tamanho = journal.tamanho()
+            if secao in self._migrar or (tamanho and (forcar or vencido or tamanho >= JOURNAL_MAX_BYTES)):
+                secoes.append(secao)
+        if forcar or vencido:
+            self.ultima_compactacao = time.monotonic()
+        return secoes
+
+    def compactar(self, forcar: bool = False) -> list:
+        compactadas = self._a_compactar(forcar)
+        for secao in compactadas:
+            salvar_json(self.caminhos[secao], self._serializar(secao))
+            self.journais[secao].truncar()
+            self._migrar.discard(secao)
+        return compactadas
+
+    # Versões assíncronas: serialização e escrita no pool de I/O, o event loop só copia referências
+    def _travas(self):
+        if self._gravacao is None:
+            self._gravacao = asyncio.Lock()
+            self._sincronizacao = asyncio.Lock()
+        return self._gravacao, self._sincronizacao
+
+    async def sincronizar(self):
+        # Group commit: quem chega durante um fsync espera e, se ainda houver pendência, faz o próximo
+        _, sincronizacao = self._travas()
+        async with sincronizacao:
+            pendentes = [journal for journal in self.journais.values() if journal.pendente]
+            if pendentes:
+                await executor.executar(lambda: [journal.sincronizar() for journal in pendentes])
+
+    async def flush_async(self) -> int:
+        gravacao, _ = self._travas()
+        gravados = 0
+        async with gravacao:
+            for secao, users in self.sujos.items():
+                if not users:
+                    continue
+                marcados = set(users)
+                users.clear()
+                try:
+                    await executor.executar(self._gravar, secao, self._copiar(secao))
+                except Exception:
+                    users.update(marcados)
+                    raise
+                gravados += len(marcados)
+        return gravados
+
+    async def compactar_async(self, forcar: bool = False) -> list:
+        gravacao, sincronizacao = self._travas()
+        async with gravacao:
+            compactadas = self._a_compactar(forcar)
+            for secao in compactadas:
+                journal = self.journais[secao]
+                posicao = journal.tamanho()
+                await executor.executar(self._gravar, secao, self._copiar(secao))
+                # No próprio loop: novas linhas do diário não podem chegar no meio da troca do arquivo
+                async with sincronizacao:
+                    journal.descartar_ate(posicao)
+                self._migrar.discard(secao)
+        return compactadas
+
+    async def _loop_flush(self, intervalo: float):
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                gravados = await self.flush_async()
+                if gravados:
+                    logger.debug("Flush de %d partições de usuário", gravados)
+                compactadas = await self.compactar_async()
+                if compactadas:
+                    logger.info("Diários compactados: %s", ", ".join(compactadas))
+            except Exception:
+                logger.exception("Falha ao gravar dados pendentes")
+
+    def iniciar_flush(self, intervalo: float = None):
+        if self._tarefa_flush is None:
+            self._tarefa_flush = asyncio.get_running_loop().create_task(
+                self._loop_flush(intervalo or FLUSH_INTERVALO)
+            )
+
+    async def parar(self):
+        if self._tarefa_flush is not None:
+            self._tarefa_flush.cancel()
+            try:
+                await self._tarefa_flush
+            except asyncio.CancelledError:
+                pass
+            self._tarefa_flush = None
+        await self.flush_async()
+        await self.compactar_async(forcar=True)
+        for journal in self.journais.values():
+            journal.fechar()
+
+def criar_repositorio(backend: str = STORAGE_BACKEND) -> Repositorio:
+    if backend == "sqlite":
+        from sqlite_store import SqliteStore
+        return SqliteStore()
+    if backend == "json":
+        return LedgerStore()
+    raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+
+store = criar_repositorio()
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+# config lê o ambiente na importação: a pasta de dados temporária precisa existir antes de qualquer import do bot
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="finfacil_testes_")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from storage import SECOES, LedgerStore
+
+@pytest.fixture
+def caminhos(tmp_path):
+    # Um conjunto de arquivos por teste; abrir dois LedgerStore nos mesmos caminhos simula um reinício
+    return {secao: str(tmp_path / os.path.basename(caminho)) for secao, caminho in SECOES.items()}
+
+@pytest.fixture
+def abrir(caminhos):
+    abertos = []
+
+    def _abrir():
+        novo = LedgerStore(caminhos)
+        novo.carregar()
+        abertos.append(novo)
+        return novo
+
+    yield _abrir
+    for aberto in abertos:
+        for journal in aberto.journais.values():
+            journal.fechar()
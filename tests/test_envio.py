@@ -0,0 +1,125 @@
+import asyncio
+from datetime import timedelta
+import pytest
+from telegram.error import RetryAfter
+from envio import FilaEnvio
+
+# Fila de saída contra um callback falso que registra cada chamada à "Bot API"
+
+class BotApi:
+    def __init__(self, falhas: int = 0, espera: float = 0.05):
+        self.chamadas = []
+        self.falhas = falhas
+        self.espera = espera
+
+    async def __call__(self, endpoint, data):
+        if self.falhas:
+            self.falhas -= 1
+            raise RetryAfter(timedelta(seconds=self.espera))
+        self.chamadas.append((endpoint, dict(data), asyncio.get_running_loop().time()))
+        return len(self.chamadas)
+
+async def _fila(**opcoes):
+    # Uma ficha por chat, reposta em 50 ms: a partir da segunda mensagem os textos esperam na fila
+    fila = FilaEnvio(**{"global_por_segundo": 1000, "por_chat": 20, "rajada_chat": 1, **opcoes})
+    await fila.initialize()
+    return fila
+
+def _enviar(fila, api, texto: str, chat_id=1, endpoint="sendMessage", opcoes=None, **campos):
+    data = {"chat_id": chat_id, "text": texto, **campos}
+    return asyncio.ensure_future(fila.process_request(api, (endpoint, data), {}, endpoint, data, opcoes))
+
+def test_textos_na_fila_do_chat_sao_unidos():
+    async def cenario():
+        fila, api = await _fila(), BotApi()
+        envios = [_enviar(fila, api, texto) for texto in ("a", "b", "c")]
+        envios.append(_enviar(fila, api, "d", reply_markup="teclado"))
+        envios.append(_enviar(fila, api, "e"))
+        envios.append(_enviar(fila, api, "f", opcoes={"agrupar": False}))
+        resultados = await asyncio.gather(*envios)
+        await fila.shutdown()
+        return api, resultados
+
+    api, resultados = asyncio.run(cenario())
+    # O teclado fica na última mensagem do grupo; depois dele e com agrupar=False não se une nada
+    assert [data["text"] for _, data, _ in api.chamadas] == ["a\n\nb\n\nc\n\nd", "e", "f"]
+    assert api.chamadas[0][1]["reply_markup"] == "teclado"
+    assert resultados == [1, 1, 1, 1, 2, 3]
+
+def test_ordem_e_ritmo_por_chat_com_chats_independentes():
+    async def cenario():
+        fila, api = await _fila(), BotApi()
+        await asyncio.gather(
+            _enviar(fila, api, "1", opcoes={"agrupar": False}),
+            _enviar(fila, api, "2", opcoes={"agrupar": False}),
+            _enviar(fila, api, "x", chat_id=2),
+        )
+        await fila.shutdown()
+        return api
+
+    api = asyncio.run(cenario())
+    por_chat = {}
+    for _, data, momento in api.chamadas:
+        por_chat.setdefault(data["chat_id"], []).append((data["text"], momento))
+    assert [texto for texto, _ in por_chat[1]] == ["1", "2"]
+    assert por_chat[1][1][1] - por_chat[1][0][1] >= 0.04
+    assert por_chat[2][0][1] < por_chat[1][1][1]
+
+def test_retry_after_pausa_todos_os_envios_e_repete():
+    async def cenario():
+        fila, api = await _fila(), BotApi(falhas=1, espera=0.1)
+        inicio = asyncio.get_running_loop().time()
+        resultados = await asyncio.gather(_enviar(fila, api, "a"), _enviar(fila, api, "b", chat_id=2))
+        await fila.shutdown()
+        return api, resultados, inicio
+
+    api, resultados, inicio = asyncio.run(cenario())
+    assert sorted(data["text"] for _, data, _ in api.chamadas) == ["a", "b"]
+    assert sorted(resultados) == [1, 2]
+    assert all(momento - inicio >= 0.1 for _, _, momento in api.chamadas)
+
+def test_retry_after_persistente_chega_ao_chamador():
+    async def cenario():
+        fila, api = await _fila(tentativas=1), BotApi(falhas=5, espera=0.01)
+        with pytest.raises(RetryAfter):
+            await _enviar(fila, api, "a")
+        await fila.shutdown()
+        return api
+
+    assert asyncio.run(cenario()).chamadas == []
+
+def test_pedido_cancelado_nao_e_enviado():
+    async def cenario():
+        fila, api = await _fila(), BotApi()
+        primeiro = _enviar(fila, api, "a")
+        cancelado = _enviar(fila, api, "b")
+        terceiro = _enviar(fila, api, "c", opcoes={"agrupar": False})
+        await asyncio.sleep(0)
+        cancelado.cancel()
+        await asyncio.gather(primeiro, terceiro)
+        await fila.shutdown()
+        return api
+
+    assert [data["text"] for _, data, _ in asyncio.run(cenario()).chamadas] == ["a", "c"]
+
+def test_sem_chat_id_passa_direto():
+    async def cenario():
+        fila, api = await _fila(), BotApi()
+        data = {"callback_query_id": "1"}
+        resultado = await fila.process_request(api, ("answerCallbackQuery", data), {}, "answerCallbackQuery", data, None)
+        return fila, resultado
+
+    fila, resultado = asyncio.run(cenario())
+    assert resultado == 1 and fila._chats == {}
+
+def test_balde_ocioso_e_descartado_depois_de_cheio():
+    async def cenario():
+        fila, api = await _fila(), BotApi()
+        await _enviar(fila, api, "a")
+        await asyncio.sleep(0)
+        ativo = 1 in fila._chats
+        await asyncio.sleep(0.15)
+        return ativo, dict(fila._chats)
+
+    ativo, chats = asyncio.run(cenario())
+    assert ativo and chats == {}
@@ -0,0 +1,32 @@
+import io
+import csv
+import codecs
+import pytest
+from exportacao import exportar, XLSX_DISPONIVEL
+from modelos import Despesa, Entrada
+
+DESPESAS = [
+    Despesa(centavos=1250, categoria="MERCADO", data="01/02/2024", observacao="pão; leite", id=1),
+    Despesa(centavos=5, categoria="Lazer", data="02/02/2024", comprovante="arquivo", id=2),
+]
+
+def test_csv_com_bom_e_ponto_e_virgula():
+    with exportar("despesas", iter(DESPESAS), "csv") as arquivo:
+        bruto = arquivo.read()
+    assert bruto.startswith(codecs.BOM_UTF8)
+    assert list(csv.reader(io.StringIO(bruto.decode("utf-8-sig"), newline=""), delimiter=";")) == [
+        ["ID", "Data", "Valor", "Categoria", "Observação", "Comprovante"],
+        ["1", "01/02/2024", "12.50", "MERCADO", "pão; leite", "Não"],
+        ["2", "02/02/2024", "0.05", "Lazer", "", "Sim"],
+    ]
+
+@pytest.mark.skipif(not XLSX_DISPONIVEL, reason="openpyxl não instalado")
+def test_xlsx():
+    from openpyxl import load_workbook
+    entradas = [Entrada(centavos=100000, categoria="SALARIO", data="05/02/2024", id=1)]
+    with exportar("entradas", entradas, "xlsx") as arquivo:
+        planilha = load_workbook(arquivo).active
+        assert [list(linha) for linha in planilha.iter_rows(values_only=True)] == [
+            ["ID", "Data", "Valor", "Categoria", "Observação"],
+            [1, "05/02/2024", 1000.0, "SALARIO", None],
+        ]
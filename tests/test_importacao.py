@@ -0,0 +1,85 @@
+import io
+import pytest
+from importacao import ler_csv, ler_ofx, converter, valor_extrato
+
+CATEGORIAS_DESPESA = {"MERCADO": "MERCADO"}
+CATEGORIAS_ENTRADA = {"SALARIO": "Salário"}
+
+def test_ler_csv_com_bom_e_ponto_e_virgula():
+    texto = "\ufeffData;Valor;Categoria;Descrição\n01/02/2024;-12,50;Mercado;pão\n\n03/02/2024;1.000,00;Salario;\n"
+    assert list(ler_csv(io.StringIO(texto))) == [
+        (2, {"data": "01/02/2024", "valor": "-12,50", "categoria": "Mercado", "observacao": "pão"}),
+        (4, {"data": "03/02/2024", "valor": "1.000,00", "categoria": "Salario", "observacao": ""}),
+    ]
+
+def test_ler_csv_sem_colunas_obrigatorias():
+    with pytest.raises(ValueError):
+        list(ler_csv(io.StringIO("categoria,observacao\nMERCADO,x\n")))
+
+def test_ler_ofx_sgml_sem_fechamento():
+    texto = (
+        "OFXHEADER:100\n<OFX><BANKTRANLIST>\n"
+        "<STMTTRN>\n<DTPOSTED>20240201\n<TRNAMT>-12.50\n<MEMO>Padaria\n"
+        "<STMTTRN>\n<DTPOSTED>20240203120000\n<TRNAMT>1000.00\n<NAME>Empresa\n"
+        "</BANKTRANLIST></OFX>\n"
+    )
+    assert list(ler_ofx(io.StringIO(texto))) == [
+        (3, {"data": "01/02/2024", "valor": "-12.50", "observacao": "Padaria"}),
+        (7, {"data": "03/02/2024", "valor": "1000.00", "observacao": "Empresa"}),
+    ]
+
+def test_ler_ofx_xml_em_uma_linha():
+    texto = (
+        "<OFX><BANKTRANLIST>"
+        "<STMTTRN><DTPOSTED>20240201</DTPOSTED><TRNAMT>-1.00</TRNAMT></STMTTRN>"
+        "<STMTTRN><DTPOSTED>20240202</DTPOSTED><TRNAMT>-2.00</TRNAMT></STMTTRN>"
+        "</BANKTRANLIST></OFX>"
+    )
+    assert [campos["valor"] for _, campos in ler_ofx(io.StringIO(texto))] == ["-1.00", "-2.00"]
+
+def test_converter_tudo_ou_nada():
+    linhas = [
+        (2, {"data": "01/02/2024", "valor": "-12,50", "categoria": "mercado"}),
+        (3, {"data": "03/02/2024", "valor": "1000", "categoria": "salário"}),
+    ]
+    despesas, entradas, erros = converter(linhas, CATEGORIAS_DESPESA.get, CATEGORIAS_ENTRADA.get)
+    assert erros == []
+    assert [(d.centavos, d.categoria) for d in despesas] == [(1250, "MERCADO")]
+    assert [(e.centavos, e.categoria) for e in entradas] == [(100000, "Salário")]
+
+    linhas.append((4, {"data": "31/12/2999", "valor": "-1", "categoria": "MERCADO"}))
+    linhas.append((5, {"data": "01/02/2024", "valor": "-1", "categoria": "LAZER"}))
+    _, _, erros = converter(linhas, CATEGORIAS_DESPESA.get, CATEGORIAS_ENTRADA.get)
+    assert [erro.split(":")[0] for erro in erros] == ["linha 4", "linha 5"]
+
+@pytest.mark.parametrize("texto, centavos", [
+    ("R$ 1.234,56", 123456),
+    ("1,234.56", 123456),
+    ("1.234.567,8", 123456780),
+    ("1234.56", 123456),
+    ("-12,50", -1250),
+])
+def test_valor_extrato_usa_o_ultimo_separador_como_decimal(texto, centavos):
+    assert valor_extrato(texto) == centavos
+
+def test_erros_do_arquivo_vao_escapados_no_html():
+    import asyncio
+    from types import SimpleNamespace
+    from benchmark.falsos import Aplicacao, Contexto, criar_update
+    from handlers.importacao import receber_importacao
+
+    conteudo = "data;valor;categoria\n01/02/2024;<1&2>;MERCADO\n".encode("utf-8")
+
+    async def baixar(out):
+        out.write(conteudo)
+
+    async def obter_arquivo():
+        return SimpleNamespace(download_to_memory=baixar)
+
+    envios = []
+    update = criar_update(303, "", envios)
+    update.message.document = SimpleNamespace(file_name="extrato.csv", file_size=len(conteudo), get_file=obter_arquivo)
+    update.message.caption = None
+    asyncio.run(receber_importacao(update, Contexto(Aplicacao(), envios)))
+    texto = envios[-1][1][0]
+    assert "&lt;1&amp;2&gt;" in texto and "<1&2>" not in texto
@@ -0,0 +1,58 @@
+import time
+import asyncio
+from journal import Journal
+from modelos import Despesa
+
+def test_reproduzir_na_ordem_e_ignora_linha_incompleta(tmp_path):
+    journal = Journal(str(tmp_path / "d.journal"))
+    journal.registrar({"n": 1})
+    journal.registrar({"n": 2})
+    journal.fechar()
+    with open(journal.caminho, "a", encoding="utf-8") as file:
+        file.write('{"n": 3')
+    assert [evento["n"] for evento in journal.reproduzir()] == [1, 2]
+
+def test_descartar_ate_preserva_o_que_veio_depois(tmp_path):
+    journal = Journal(str(tmp_path / "d.journal"))
+    journal.registrar({"n": 1})
+    posicao = journal.tamanho()
+    journal.registrar({"n": 2})
+    journal.descartar_ate(posicao)
+    journal.registrar({"n": 3})
+    journal.fechar()
+    assert [evento["n"] for evento in journal.reproduzir()] == [2, 3]
+
+def test_reproduzir_sobre_snapshot_ja_atualizado_e_idempotente(abrir):
+    store = abrir()
+    store.adicionar_despesa("1", Despesa(centavos=1000, categoria="MERCADO", data="01/02/2024"))
+    store.adicionar_despesas("1", [Despesa(centavos=250, categoria="ROUPAS", data="02/02/2024")])
+    store.ajustar_saldo("1", -1250)
+    store.set_categorias("categorias_despesas", "1", ["MERCADO", "ROUPAS"])
+    # Queda entre gravar o snapshot e limpar o diário: os eventos ficam nos dois lugares
+    for secao in store.journais:
+        store._gravar(secao, store._copiar(secao))
+    reaberto = abrir()
+    assert [d.id for d in reaberto.listar_despesas("1")] == [1, 2]
+    assert reaberto.get_saldo("1") == -1250
+    assert reaberto.get_categorias("categorias_despesas", "1") == ["MERCADO", "ROUPAS"]
+
+def test_compactacao_mantem_eventos_gravados_durante_a_troca(abrir, monkeypatch):
+    store = abrir()
+    store.adicionar_despesa("1", Despesa(centavos=100, categoria="MERCADO", data="01/02/2024"))
+    gravar = store._gravar
+
+    def gravar_devagar(secao, copia):
+        time.sleep(0.2)
+        gravar(secao, copia)
+
+    monkeypatch.setattr(store, "_gravar", gravar_devagar)
+
+    async def cenario():
+        compactacao = asyncio.create_task(store.compactar_async(forcar=True))
+        await asyncio.sleep(0.05)
+        # Fora do snapshot que está sendo gravado: só o diário guarda esta despesa
+        store.adicionar_despesa("1", Despesa(centavos=200, categoria="MERCADO", data="02/02/2024"))
+        await compactacao
+
+    asyncio.run(cenario())
+    assert [d.centavos for d in abrir().listar_despesas("1")] == [100, 200]
@@ -0,0 +1,52 @@
+import time
+import threading
+from metricas import Contador, Histograma
+
+def test_texto_do_contador_e_do_histograma():
+    contador = Contador("teste_total", "Ajuda", ("metodo",))
+    contador.inc(metodo="b")
+    contador.inc(2, metodo="a")
+    assert list(contador.linhas()) == [
+        "# HELP teste_total Ajuda", "# TYPE teste_total counter",
+        'teste_total{metodo="a"} 2', 'teste_total{metodo="b"} 1',
+    ]
+    histograma = Histograma("teste_segundos", "Ajuda", buckets=(0.1, 1))
+    histograma.observar(0.05)
+    histograma.observar(0.5)
+    assert list(histograma.linhas())[2:] == [
+        'teste_segundos_bucket{le="0.1"} 1', 'teste_segundos_bucket{le="1"} 2', 'teste_segundos_bucket{le="+Inf"} 2',
+        "teste_segundos_sum 0.55", "teste_segundos_count 2",
+    ]
+
+def _contagens(linhas) -> list:
+    return [int(linha.rsplit(" ", 1)[1]) for linha in linhas if "_bucket" in linha or "_count" in linha]
+
+def test_leitura_consistente_durante_gravacoes_de_outras_threads():
+    contador = Contador("concorrente_total", "Ajuda", ("chave",))
+    histograma = Histograma("concorrente_segundos", "Ajuda", buckets=(0.1, 1))
+    parar = threading.Event()
+
+    def gravar():
+        n = 0
+        while not parar.is_set():
+            n += 1
+            # Chave nova no contador (o dicionário cresce) e as mesmas listas de contagem no histograma
+            contador.inc(chave=n % 5000)
+            histograma.observar(0.05)
+
+    thread = threading.Thread(target=gravar)
+    thread.start()
+    try:
+        for _ in range(20):
+            list(contador.linhas())
+            linhas = histograma.linhas()
+            # Consome devagar: entre uma linha e outra a thread continua observando
+            lidas = []
+            for linha in linhas:
+                lidas.append(linha)
+                time.sleep(0)
+            menor, maior, infinito, total = _contagens(lidas)
+            assert menor <= maior <= infinito == total
+    finally:
+        parar.set()
+        thread.join()
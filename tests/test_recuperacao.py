@@ -0,0 +1,60 @@
+import json
+import asyncio
+from datetime import datetime
+from agregados import Agregados
+from modelos import Despesa, Entrada
+
+# Queda do processo: nada de flush nem compactação, só o que já está no diário
+
+def test_saldo_confere_com_registros_apos_queda(abrir):
+    store = abrir()
+    agregados = Agregados(store)
+    agregados.registrar("7", "entradas", [store.adicionar_entrada("7", Entrada(centavos=500000, categoria="SALARIO", data="05/03/2024"))])
+    agregados.registrar("7", "despesas", [store.adicionar_despesa("7", Despesa(centavos=12345, categoria="MERCADO", data="06/03/2024"))])
+    lote = store.adicionar_despesas("7", [Despesa(centavos=999, categoria="TRANSPORTE", data="07/03/2024")])
+    agregados.registrar_lote("7", {"despesas": lote})
+    asyncio.run(store.sincronizar())
+
+    reaberto = abrir()
+    assert reaberto.get_saldo("7") == 500000 - 12345 - 999
+    assert Agregados(reaberto).verificar() == []
+
+def test_queda_depois_de_compactar(abrir):
+    store = abrir()
+    agregados = Agregados(store)
+    agregados.registrar("8", "despesas", [store.adicionar_despesa("8", Despesa(centavos=100, categoria="MERCADO", data="01/01/2024"))])
+    store.compactar(forcar=True)
+    removidas = store.remover_despesas_categoria("8", "MERCADO")
+    agregados.registrar("8", "despesas", removidas, sinal=-1)
+    agregados.registrar("8", "entradas", [store.adicionar_entrada("8", Entrada(centavos=300, categoria="EXTRAS", data="02/01/2024"))])
+
+    reaberto = abrir()
+    assert reaberto.listar_despesas("8") == []
+    assert reaberto.get_saldo("8") == 300
+    assert Agregados(reaberto).verificar() == []
+
+def test_dados_antigos_sem_diario_carregam_e_encerram(caminhos, abrir):
+    # Formato anterior: valor em reais (float), sem data_ord e ainda sem nenhum .journal
+    with open(caminhos["despesas"], "w", encoding="utf-8") as file:
+        json.dump({"9": [{"id": 1, "valor": 12.5, "categoria": "MERCADO", "data": "01/02/2024"}]}, file)
+    with open(caminhos["dados"], "w", encoding="utf-8") as file:
+        json.dump({"9": -12.5}, file)
+    store = abrir()
+    asyncio.run(store.parar())
+
+    reaberto = abrir()
+    assert [(d.centavos, d.data_ord) for d in reaberto.listar_despesas("9")] == [(1250, datetime(2024, 2, 1).toordinal())]
+    assert reaberto.get_saldo("9") == -1250
+    with open(caminhos["despesas"], encoding="utf-8") as file:
+        assert "valor" not in json.load(file)["9"][0]
+
+def test_verificar_saldos_corrigir_grava_no_disco():
+    from storage import LedgerStore, store
+    from verificar_saldos import verificar
+    store.carregar()
+    store.ajustar_saldo("404", 999)
+    assert ("404", 999, 0) in verificar(corrigir=True)
+    reaberto = LedgerStore(store.caminhos)
+    reaberto.carregar()
+    assert reaberto.get_saldo("404") == 0
+    assert all(journal.tamanho() == 0 for journal in reaberto.journais.values())
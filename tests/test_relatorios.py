@@ -0,0 +1,90 @@
+import re
+import asyncio
+from types import SimpleNamespace
+from benchmark.falsos import Aplicacao, Contexto, criar_update
+from config import LIMITE_MENSAGEM
+from data_manager import add_user_despesa, query_user_despesas, remove_user_despesas_categoria
+from handlers.reports import enviar_relatorio, navegar_relatorio
+from modelos import Despesa
+from paginacao import paginar
+
+# Paginação dos relatórios: botões rel:<serial>:<página> com o cursor guardado em user_data
+
+class Consulta:
+    def __init__(self, user_id: int, data: str, envios: list):
+        self.data = data
+        self.from_user = SimpleNamespace(id=user_id)
+        self.envios = envios
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+    async def edit_message_text(self, texto, parse_mode=None, reply_markup=None):
+        self.envios.append(("edit_message_text", texto, reply_markup))
+
+    async def edit_message_reply_markup(self, reply_markup=None):
+        self.envios.append(("edit_message_reply_markup", None, reply_markup))
+
+def _botoes(markup) -> dict:
+    return {botao.text: botao.callback_data for linha in markup.inline_keyboard for botao in linha}
+
+def _ids(texto: str) -> list:
+    return [int(i) for i in re.findall(r"• ID: (\d+)", texto)]
+
+def _relatorio(user_id: int, registros: list, contexto=None):
+    envios = []
+    contexto = contexto or Contexto(Aplicacao(), envios)
+    asyncio.run(enviar_relatorio(criar_update(user_id, "", envios), contexto, "despesas", registros, None, None, None))
+    _, (texto,), kwargs = envios[-1]
+    return contexto, envios, texto, kwargs["reply_markup"]
+
+def _navegar(contexto, user_id: int, data: str):
+    envios = []
+    update = SimpleNamespace(callback_query=Consulta(user_id, data, envios))
+    asyncio.run(navegar_relatorio(update, contexto))
+    return envios[-1]
+
+def _popular(user_id: str, quantidade: int):
+    for n in range(quantidade):
+        categoria = "LAZER" if n >= quantidade - 10 else "MERCADO"
+        add_user_despesa(user_id, Despesa(centavos=100 + n, categoria=categoria, data="01/02/2024", observacao="x" * 40))
+    return query_user_despesas(user_id)
+
+def test_paginar_respeita_o_limite():
+    blocos = [f"bloco {n} " + "y" * 300 + "\n" for n in range(100)]
+    paginas = list(paginar(iter(blocos), "cabeçalho\n"))
+    assert all(len(texto) <= LIMITE_MENSAGEM for texto, _ in paginas)
+    assert sum(quantidade for _, quantidade in paginas) == 100
+
+def test_navegar_por_todas_as_paginas_e_voltar():
+    registros = _popular("606", 150)
+    contexto, _, texto, markup = _relatorio(606, registros)
+    vistos = [_ids(texto)]
+    serial = contexto.user_data["relatorio"]["serial"]
+    assert "Anterior ▶️" not in _botoes(markup) and _botoes(markup)["Próxima ▶️"] == f"rel:{serial}:1"
+    while "Próxima ▶️" in _botoes(markup):
+        _, texto, markup = _navegar(contexto, 606, _botoes(markup)["Próxima ▶️"])
+        assert len(texto) <= LIMITE_MENSAGEM
+        vistos.append(_ids(texto))
+    assert len(vistos) > 1
+    assert sum(vistos, []) == [r.id for r in registros]
+    assert _botoes(markup)["◀️ Anterior"] == f"rel:{serial}:{len(vistos) - 2}"
+    _, texto, _ = _navegar(contexto, 606, f"rel:{serial}:0")
+    assert _ids(texto) == vistos[0]
+
+def test_serial_antigo_ou_pagina_nao_visitada_remove_os_botoes():
+    registros = _popular("607", 150)
+    contexto = _relatorio(607, registros)[0]
+    _relatorio(607, registros, contexto)
+    serial = contexto.user_data["relatorio"]["serial"]
+    assert _navegar(contexto, 607, f"rel:{serial - 1}:1") == ("edit_message_reply_markup", None, None)
+    assert _navegar(contexto, 607, f"rel:{serial}:5") == ("edit_message_reply_markup", None, None)
+
+def test_pagina_que_deixou_de_existir_expira():
+    registros = _popular("608", 150)
+    contexto, _, _, markup = _relatorio(608, registros)
+    proxima = _botoes(markup)["Próxima ▶️"]
+    remove_user_despesas_categoria("608", "MERCADO")
+    metodo, texto, _ = _navegar(contexto, 608, proxima)
+    assert metodo == "edit_message_text" and "expirou" in texto
+    assert "relatorio" not in contexto.user_data
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime
+import pytest
+from storage import LedgerStore
+from sqlite_store import SqliteStore
+from modelos import Despesa, Entrada
+
+# O mesmo contrato de Repositorio para os dois backends; reabrir simula um reinício do bot
+
+@pytest.fixture(params=["json", "sqlite"])
+def abrir_backend(request, caminhos, tmp_path):
+    abertos = []
+
+    def _abrir():
+        for aberto in abertos:
+            asyncio.run(aberto.parar())
+        novo = LedgerStore(caminhos) if request.param == "json" else SqliteStore(str(tmp_path / "finfacil.db"))
+        novo.carregar()
+        abertos.append(novo)
+        return novo
+
+    yield _abrir
+    asyncio.run(abertos[-1].parar())
+
+def _despesa(centavos, data, categoria="MERCADO", **campos):
+    return Despesa(centavos=centavos, categoria=categoria, data=data, **campos)
+
+def test_saldo(abrir_backend):
+    repo = abrir_backend()
+    assert not repo.usuario_existe("1") and repo.get_saldo("1") == 0
+    assert repo.ajustar_saldo("1", 500) == 500
+    assert repo.ajustar_saldo("1", -750) == -250
+    repo = abrir_backend()
+    assert repo.usuario_existe("1") and repo.get_saldo("1") == -250
+
+def test_despesas_ids_consultas_e_remocao(abrir_backend):
+    repo = abrir_backend()
+    primeira = repo.adicionar_despesa("1", _despesa(100, "10/03/2024", observacao="pão"))
+    lote = repo.adicionar_despesas("1", [_despesa(200, "01/03/2024", "Lazer"), _despesa(300, "20/03/2024")])
+    repo.adicionar_despesa("2", _despesa(999, "10/03/2024"))
+    assert [primeira.id] + [d.id for d in lote] == [1, 2, 3]
+    repo.definir_comprovante_local("1", 2, "ab/cd.jpg")
+
+    repo = abrir_backend()
+    assert [(d.id, d.centavos) for d in repo.listar_despesas("1")] == [(1, 100), (2, 200), (3, 300)]
+    assert repo.listar_despesas("1")[0].observacao == "pão"
+    assert repo.obter_despesas("1", [2, 7])[2].comprovante_local == "ab/cd.jpg"
+    assert list(repo.obter_despesas("1", [2, 7])) == [2]
+    intervalo = repo.consultar_despesas("1", datetime(2024, 3, 1), datetime(2024, 3, 15))
+    assert [d.id for d in intervalo] == [2, 1]
+    assert [d.id for d in repo.consultar_despesas("1", categoria="MERCADO")] == [1, 3]
+    assert [d.id for d in repo.consultar_despesas("1", inicio=datetime(2024, 3, 11), categoria="MERCADO")] == [3]
+
+    removidas = repo.remover_despesas_categoria("1", "MERCADO")
+    assert sorted(d.id for d in removidas) == [1, 3]
+    assert repo.remover_despesas_categoria("1", "MERCADO") == []
+    repo = abrir_backend()
+    assert [d.id for d in repo.listar_despesas("1")] == [2]
+    assert [d.centavos for d in repo.listar_despesas("2")] == [999]
+    assert repo.listar_usuarios() == ["1", "2"]
+
+def test_entradas(abrir_backend):
+    repo = abrir_backend()
+    repo.adicionar_entrada("1", Entrada(centavos=5000, categoria="Salário", data="05/01/2024"))
+    repo.adicionar_entradas("1", [Entrada(centavos=700, categoria="EXTRAS", data="02/01/2024")])
+    repo = abrir_backend()
+    assert [(e.id, e.categoria) for e in repo.listar_entradas("1")] == [(1, "Salário"), (2, "EXTRAS")]
+    assert [e.id for e in repo.consultar_entradas("1", fim=datetime(2024, 1, 3))] == [2]
+    assert [e.id for e in repo.consultar_entradas("1", categoria="SALARIO")] == [1]
+
+def test_categorias(abrir_backend):
+    repo = abrir_backend()
+    assert repo.get_categorias("categorias_despesas", "1") is None
+    repo.set_categorias("categorias_despesas", "1", ["MERCADO", "Lazer"])
+    repo.set_categorias("categorias_entrada", "2", ["SALARIO"])
+    repo = abrir_backend()
+    assert repo.get_categorias("categorias_despesas", "1") == ["MERCADO", "Lazer"]
+    assert repo.todas_categorias("categorias_entrada") == {"2": ["SALARIO"]}
+
+def test_importar_substitui_tudo(abrir_backend):
+    repo = abrir_backend()
+    repo.ajustar_saldo("velho", 1)
+    repo.adicionar_despesa("velho", _despesa(1, "01/01/2024"))
+    repo.importar(
+        saldos={"1": -100},
+        despesas={"1": [_despesa(100, "01/01/2024", id=1)]},
+        entradas={},
+        categorias={"categorias_despesas": {"1": ["MERCADO"]}, "categorias_entrada": {}},
+    )
+    repo = abrir_backend()
+    assert repo.listar_usuarios() == ["1"]
+    assert repo.get_saldo("1") == -100 and [d.id for d in repo.listar_despesas("1")] == [1]
+    assert repo.get_categorias("categorias_despesas", "1") == ["MERCADO"]
+
+def test_migrar_sqlite_com_forcar(caminhos, tmp_path, monkeypatch):
+    import migrar_sqlite
+    origem = LedgerStore(caminhos)
+    origem.carregar()
+    origem.ajustar_saldo("1", 300)
+    origem.adicionar_entrada("1", Entrada(centavos=300, categoria="EXTRAS", data="02/01/2024"))
+    asyncio.run(origem.parar())
+    destino = str(tmp_path / "migrado.db")
+    banco = SqliteStore(destino)
+    banco.ajustar_saldo("antigo", 5)
+    asyncio.run(banco.parar())
+
+    monkeypatch.setattr(migrar_sqlite, "LedgerStore", lambda: LedgerStore(caminhos))
+    with pytest.raises(SystemExit):
+        migrar_sqlite.migrar(destino)
+    migrar_sqlite.migrar(destino, forcar=True)
+    banco = SqliteStore(destino)
+    assert banco.listar_usuarios() == ["1"] and banco.get_saldo("1") == 300
+    assert [e.centavos for e in banco.listar_entradas("1")] == [300]
+    asyncio.run(banco.parar())
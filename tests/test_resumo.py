@@ -0,0 +1,73 @@
+from datetime import datetime
+from modelos import Despesa
+from resumo import Colunas, ResumoCache
+
+# O cache colunar do /resumo tem de dar sempre o mesmo resultado que recalcular do zero
+
+class Carregador:
+    def __init__(self, registros: dict):
+        self.registros = registros
+        self.chamadas = 0
+
+    def __call__(self, user_id: str) -> list:
+        self.chamadas += 1
+        return self.registros.setdefault(user_id, [])
+
+def _despesa(centavos, data, categoria="MERCADO"):
+    return Despesa(centavos=centavos, categoria=categoria, data=data)
+
+def _resumo(cache, carregar, user_id, inicio=None, fim=None):
+    return cache.colunas("despesas", user_id, carregar).resumir(inicio, fim)
+
+def _do_zero(carregar, user_id, inicio=None, fim=None):
+    return Colunas(list(carregar.registros[user_id])).resumir(inicio, fim)
+
+def test_resumir_por_categoria_e_mes():
+    colunas = Colunas([
+        _despesa(100, "01/01/2024"), _despesa(250, "15/01/2024", "LAZER"), _despesa(50, "02/02/2024"), _despesa(7, None),
+    ])
+    assert colunas.resumir() == {
+        "total": 407, "quantidade": 4,
+        "por_categoria": [("LAZER", 250, 1), ("MERCADO", 157, 3)],
+        "por_mes": [("2024-01", 350, 2), ("2024-02", 50, 1)],
+    }
+    fevereiro = datetime(2024, 2, 1).toordinal()
+    assert colunas.resumir(inicio_ord=fevereiro)["por_categoria"] == [("MERCADO", 50, 1)]
+
+def test_acrescentar_e_invalidar_equivalem_a_recalcular():
+    carregar = Carregador({"1": [_despesa(100, "01/01/2024")]})
+    cache = ResumoCache(tamanho=4)
+    _resumo(cache, carregar, "1")
+
+    novas = [_despesa(30, "03/03/2024", "NOVA"), _despesa(20, "04/03/2024")]
+    carregar.registros["1"].extend(novas)
+    cache.acrescentar("despesas", "1", novas)
+    assert _resumo(cache, carregar, "1") == _do_zero(carregar, "1")
+    marco = datetime(2024, 3, 1).toordinal()
+    assert _resumo(cache, carregar, "1", inicio=marco) == _do_zero(carregar, "1", inicio=marco)
+    assert carregar.chamadas == 1
+
+    carregar.registros["1"] = [r for r in carregar.registros["1"] if r.categoria_norm != "MERCADO"]
+    cache.invalidar("despesas", "1")
+    assert _resumo(cache, carregar, "1") == _do_zero(carregar, "1")
+    assert carregar.chamadas == 2
+
+def test_acrescentar_fora_do_cache_nao_guarda_nada():
+    carregar = Carregador({"1": [_despesa(100, "01/01/2024")]})
+    cache = ResumoCache(tamanho=4)
+    cache.acrescentar("despesas", "1", carregar.registros["1"])
+    assert _resumo(cache, carregar, "1")["quantidade"] == 1
+
+def test_lru_descarta_o_menos_usado():
+    carregar = Carregador({user_id: [_despesa(100, "01/01/2024")] for user_id in "abc"})
+    cache = ResumoCache(tamanho=2)
+    _resumo(cache, carregar, "a")
+    _resumo(cache, carregar, "b")
+    _resumo(cache, carregar, "a")
+    cache.acrescentar("despesas", "b", [_despesa(1, "02/01/2024")])
+    _resumo(cache, carregar, "c")
+    assert list(cache._colunas) == [("despesas", "a"), ("despesas", "c")]
+    assert cache._pendentes == {}
+    assert carregar.chamadas == 3
+    _resumo(cache, carregar, "b")
+    assert carregar.chamadas == 4
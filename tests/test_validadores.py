@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from telegram.ext import ConversationHandler
+import validadores as v
+from validadores import Invalido
+from config import ASK_VALOR, ASK_CAT_ENTRADA, ASK_OBS_ENTRADA, ASK_DATA_ENTRADA
+from data_manager import get_user_saldo, get_user_entradas, update_user_categories
+from benchmark.falsos import Aplicacao, Contexto, criar_update
+
+def _motivo(validar, texto, user_id="1"):
+    with pytest.raises(Invalido) as erro:
+        validar(texto, user_id)
+    return erro.value.motivo
+
+def test_valor():
+    assert v.valor(" 12,34 ") == 1234
+    assert _motivo(v.valor, "doze") == "formato"
+    assert _motivo(v.valor, "0") == "nao_positivo"
+    assert _motivo(v.valor, "-3") == "nao_positivo"
+
+def test_data():
+    assert v.data("29/02/2024") == datetime(2024, 2, 29)
+    assert _motivo(v.data, "30/02/2024") == "formato"
+    assert _motivo(v.data, (datetime.now() + timedelta(days=2)).strftime("%d/%m/%Y")) == "futura"
+    assert v.data_ou_sem_filtro("sem filtros") is None
+
+def test_texto_e_sim_nao():
+    assert v.observacao("nada") == ""
+    assert v.sim_nao("Não") is False
+    assert v.sim_nao("s") is True
+    assert _motivo(v.sim_nao, "talvez") == "formato"
+    assert _motivo(v.texto, "   ") == "formato"
+    assert v.tipo_resumo("Entradas") == "entradas"
+
+def test_categorias():
+    update_user_categories("101", ["LAZER"])
+    assert v.categoria_despesa("lazer", "101") == "LAZER"
+    assert v.categoria_despesa_ou_geral("geral", "101") == "GERAL"
+    assert _motivo(v.categoria_despesa, "viagem", "101") == "inexistente"
+    assert _motivo(v.categoria_despesa, "123", "101") == "formato"
+    assert _motivo(v.nova_categoria_despesa, "Geral", "101") == "geral"
+    assert v.categoria_entrada("salário", "101") == "SALARIO"
+
+def test_fluxo_compilado_adicionar_saldo():
+    from fluxos import ADICIONAR_SALDO
+    handler = ADICIONAR_SALDO.compilar()
+    envios, user_data = [], {}
+    contexto = Contexto(Aplicacao(), envios, user_data)
+
+    async def enviar(callback, texto):
+        return await callback(criar_update(202, texto, envios), contexto)
+
+    def passo(estado):
+        return handler.states[estado][0].callback
+
+    async def conversa():
+        assert await enviar(handler.entry_points[0].callback, "/adicionar_saldo") == ASK_VALOR
+        assert await enviar(passo(ASK_VALOR), "abc") == ASK_VALOR
+        assert "inválido" in envios[-1][1][0]
+        assert await enviar(passo(ASK_VALOR), "300,50") == ASK_CAT_ENTRADA
+        assert await enviar(passo(ASK_CAT_ENTRADA), "salario") == ASK_OBS_ENTRADA
+        assert await enviar(passo(ASK_OBS_ENTRADA), "NADA") == ASK_DATA_ENTRADA
+        return await enviar(passo(ASK_DATA_ENTRADA), "01/01/2024")
+
+    assert asyncio.run(conversa()) == ConversationHandler.END
+    assert get_user_saldo("202") == 30050
+    [entrada] = get_user_entradas("202")
+    assert (entrada.categoria, entrada.data, entrada.observacao) == ("SALARIO", "01/01/2024", "")
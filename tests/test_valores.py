@@ -0,0 +1,23 @@
+import pytest
+from utils import parse_valor, formatar_valor
+
+@pytest.mark.parametrize("texto, centavos", [
+    ("10", 1000),
+    ("10,5", 1050),
+    ("0,005", 1),
+    ("0,004", 0),
+    ("2,675", 268),
+    ("-1,005", -101),
+    (" 1.10 ", 110),
+])
+def test_parse_valor_arredonda_meio_para_cima(texto, centavos):
+    assert parse_valor(texto) == centavos
+
+@pytest.mark.parametrize("texto", ["", "abc", "1,2,3", "NaN", "inf"])
+def test_parse_valor_invalido(texto):
+    with pytest.raises(ValueError):
+        parse_valor(texto)
+
+@pytest.mark.parametrize("centavos, texto", [(0, "0.00"), (5, "0.05"), (123456, "1234.56"), (-5, "-0.05"), (-100, "-1.00")])
+def test_formatar_valor(centavos, texto):
+    assert formatar_valor(centavos) == texto
@@ -0,0 +1,75 @@
+import json
+import asyncio
+from types import SimpleNamespace
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from telegram import Bot
+import webhook
+from config import WEBHOOK_PATH
+
+# Updates gravados enviados por POST, como o Telegram faz
+UPDATE = {
+    "update_id": 10,
+    "message": {
+        "message_id": 1, "date": 1700000000, "text": "/start",
+        "from": {"id": 42, "is_bot": False, "first_name": "Ana"},
+        "chat": {"id": 42, "type": "private"},
+    },
+}
+
+def _app():
+    return SimpleNamespace(bot=Bot("123:abc"), update_queue=asyncio.Queue(), running=True)
+
+def _conversar(app, pedidos, segredo="s3gredo"):
+    async def cenario():
+        async with TestClient(TestServer(webhook.criar_servidor(webhook.entregador(app), webhook.estado_app(app)))) as cliente:
+            respostas = []
+            for metodo, caminho, corpo, cabecalhos in pedidos:
+                resposta = await cliente.request(metodo, caminho, data=corpo, headers=cabecalhos)
+                respostas.append((resposta.status, await resposta.text()))
+            return respostas
+    return asyncio.run(cenario())
+
+@pytest.fixture(autouse=True)
+def segredo(monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_SECRET", "s3gredo")
+
+def _post(corpo, segredo="s3gredo"):
+    cabecalhos = {"X-Telegram-Bot-Api-Secret-Token": segredo} if segredo is not None else {}
+    return "POST", WEBHOOK_PATH, corpo, cabecalhos
+
+def test_segredo_errado_ou_ausente_responde_403():
+    app = _app()
+    respostas = _conversar(app, [_post(json.dumps(UPDATE), "outro"), _post(json.dumps(UPDATE), None)])
+    assert [status for status, _ in respostas] == [403, 403]
+    assert app.update_queue.empty()
+
+def test_update_valido_vai_para_a_fila():
+    app = _app()
+    assert _conversar(app, [_post(json.dumps(UPDATE))]) == [(200, "")]
+    update = app.update_queue.get_nowait()
+    assert (update.update_id, update.effective_user.id, update.message.text) == (10, 42, "/start")
+
+@pytest.mark.parametrize("corpo", ["{nao e json", "[1, 2]", json.dumps({"update_id": 1, "message": {"text": "sem campos"}})])
+def test_corpo_invalido_responde_400(corpo):
+    app = _app()
+    [(status, _)] = _conversar(app, [_post(corpo)])
+    assert status == 400
+    assert app.update_queue.empty()
+
+def test_saude():
+    app = _app()
+    [(status, corpo)] = _conversar(app, [("GET", "/saude", None, {})])
+    assert status == 200 and json.loads(corpo) == {"ok": True, "fila": 0}
+    app.running = False
+    [(status, _)] = _conversar(app, [("GET", "/saude", None, {})])
+    assert status == 503
+
+def test_sem_segredo_so_ouve_no_localhost(monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_SECRET", "")
+    webhook.conferir_seguranca("127.0.0.1")
+    with pytest.raises(SystemExit):
+        webhook.conferir_seguranca("0.0.0.0")
+    monkeypatch.setattr(webhook, "WEBHOOK_URL", "https://exemplo.com")
+    with pytest.raises(SystemExit):
+        webhook.conferir_seguranca("127.0.0.1")
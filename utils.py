@@ -1,20 +1,138 @@
 import os
 import json
+import time
+import shutil
+import logging
+import tempfile
 import unicodedata
+from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+from config import BACKUP_COUNT, BACKUP_INTERVALO, CATEGORIA_CACHE_SIZE
+from metricas import json_segundos, json_bytes
+
+logger = logging.getLogger(__name__)
+
+def _snapshot_path(caminho, n):
+    # Snapshots ficam em 'backups/' ao lado do próprio arquivo
+    diretorio = os.path.join(os.path.dirname(os.path.abspath(caminho)), "backups")
+    return os.path.join(diretorio, f"{os.path.basename(caminho)}.{n}")
+
+def _ler_json(caminho):
+    # Leitura e parse medidos separadamente (finfacil_json_segundos)
+    inicio = time.perf_counter()
+    with open(caminho, "rb") as file:
+        bruto = file.read()
+    lido = time.perf_counter()
+    dados = json.loads(bruto.decode("utf-8"))
+    json_segundos.observar(lido - inicio, etapa="leitura")
+    json_segundos.observar(time.perf_counter() - lido, etapa="parse")
+    json_bytes.inc(len(bruto), operacao="leitura")
+    return dados
 
 def carregar_json(caminho):
     if not os.path.exists(caminho):
         return {}
-    with open(caminho, "r", encoding="utf-8") as file:
-        return json.load(file)
+    try:
+        return _ler_json(caminho)
+    except (ValueError, UnicodeDecodeError) as erro:
+        logger.error("Arquivo %s corrompido (%s), tentando recuperar de snapshot", caminho, erro)
+        for n in range(1, BACKUP_COUNT + 1):
+            snapshot = _snapshot_path(caminho, n)
+            if not os.path.exists(snapshot):
+                continue
+            try:
+                dados = _ler_json(snapshot)
+            except (ValueError, UnicodeDecodeError):
+                logger.error("Snapshot %s também está corrompido", snapshot)
+                continue
+            logger.warning("Arquivo %s recuperado a partir de %s", caminho, snapshot)
+            salvar_json(caminho, dados, rotacionar=False)
+            return dados
+        raise
+
+def _rotacionar_snapshots(caminho):
+    # Só gira se o snapshot mais recente já for mais velho que o intervalo configurado
+    mais_recente = _snapshot_path(caminho, 1)
+    if os.path.exists(mais_recente) and time.time() - os.path.getmtime(mais_recente) < BACKUP_INTERVALO:
+        return
+    os.makedirs(os.path.dirname(mais_recente), exist_ok=True)
+    for n in range(BACKUP_COUNT - 1, 0, -1):
+        origem = _snapshot_path(caminho, n)
+        if os.path.exists(origem):
+            os.replace(origem, _snapshot_path(caminho, n + 1))
+    if os.path.exists(mais_recente):
+        os.remove(mais_recente)
+    # Hard link preserva a versão atual sem copiar o arquivo inteiro
+    try:
+        os.link(caminho, mais_recente)
+    except OSError:
+        shutil.copy2(caminho, mais_recente)
+
+def _fsync_dir(diretorio):
+    try:
+        fd = os.open(diretorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
-def salvar_json(caminho, dados):
-    with open(caminho, "w", encoding="utf-8") as file:
-        json.dump(dados, file, indent=4)
+def salvar_json(caminho, dados, rotacionar=True):
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(caminho)}.", suffix=".tmp", dir=diretorio)
+    try:
+        inicio = time.perf_counter()
+        texto = json.dumps(dados, indent=4)
+        serializado = time.perf_counter()
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(texto)
+            file.flush()
+            os.fsync(file.fileno())
+        json_segundos.observar(serializado - inicio, etapa="serializacao")
+        json_segundos.observar(time.perf_counter() - serializado, etapa="escrita")
+        json_bytes.inc(len(texto), operacao="escrita")
+        if rotacionar and BACKUP_COUNT > 0 and os.path.exists(caminho):
+            _rotacionar_snapshots(caminho)
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    _fsync_dir(diretorio)
 
+@lru_cache(maxsize=CATEGORIA_CACHE_SIZE)
 def normalize_category(cat: str) -> str:
     norm = ''.join(c for c in unicodedata.normalize('NFD', cat) if unicodedata.category(c) != 'Mn').upper()
     return norm
 
 def is_valid_category(cat: str) -> bool:
     return not cat.replace(',', '').replace('.', '').isdigit()
+
+# Valores monetários são sempre inteiros em centavos
+def parse_valor(texto: str) -> int:
+    try:
+        valor = Decimal(texto.strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {texto!r}")
+    if not valor.is_finite():
+        raise ValueError(f"Valor inválido: {texto!r}")
+    return int((valor * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def reais_para_centavos(valor) -> int:
+    return int((Decimal(str(valor)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def formatar_valor(centavos: int) -> str:
+    sinal = "-" if centavos < 0 else ""
+    centavos = abs(centavos)
+    return f"{sinal}{centavos // 100}.{centavos % 100:02d}"
+
+def data_ordinal(data_str):
+    # "dd/mm/yyyy" -> ordinal do dia (None se inválida)
+    try:
+        return datetime.strptime(data_str or "", "%d/%m/%Y").toordinal()
+    except ValueError:
+        return None
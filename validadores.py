@@ -0,0 +1,118 @@
+from datetime import datetime
+from functools import lru_cache
+from utils import normalize_category, is_valid_category, parse_valor
+from data_manager import user_has_category, find_user_cat_entrada
+from config import VALIDACAO_CACHE_SIZE
+
+# Validadores compartilhados pelos fluxos de conversa: recebem o texto digitado e o user_id e devolvem
+# o valor já convertido, ou lançam Invalido com o motivo (cada passo do fluxo escolhe a mensagem).
+# Os que só dependem do texto são cacheados; os de categoria consultam as visões de data_manager.
+
+SEM_FILTROS = "SEM FILTROS"
+GERAL = "GERAL"
+
+class Invalido(ValueError):
+    # motivo: "formato", "nao_positivo", "futura", "inexistente", "geral", "existente"
+    def __init__(self, motivo: str = "formato"):
+        super().__init__(motivo)
+        self.motivo = motivo
+
+# Texto
+def texto(texto: str, user_id: str = None) -> str:
+    texto = texto.strip()
+    if not texto:
+        raise Invalido()
+    return texto
+
+def observacao(texto: str, user_id: str = None) -> str:
+    texto = texto.strip()
+    return "" if texto.upper() == "NADA" else texto
+
+def sim_nao(texto: str, user_id: str = None) -> bool:
+    resposta = normalize_category(texto.strip())
+    if resposta in ("SIM", "S"):
+        return True
+    if resposta in ("NAO", "N"):
+        return False
+    raise Invalido()
+
+def tipo_resumo(texto: str, user_id: str = None) -> str:
+    tipo = normalize_category(texto.strip())
+    if tipo not in ("DESPESAS", "ENTRADAS"):
+        raise Invalido()
+    return tipo.lower()
+
+# Valor em centavos
+@lru_cache(maxsize=VALIDACAO_CACHE_SIZE)
+def _centavos(texto: str):
+    # None para texto inválido: lru_cache não guarda exceções
+    try:
+        return parse_valor(texto)
+    except ValueError:
+        return None
+
+def valor(texto: str, user_id: str = None) -> int:
+    centavos = _centavos(texto.strip())
+    if centavos is None:
+        raise Invalido()
+    if centavos <= 0:
+        raise Invalido("nao_positivo")
+    return centavos
+
+# Datas (dd/mm/yyyy, nunca no futuro)
+@lru_cache(maxsize=VALIDACAO_CACHE_SIZE)
+def _data(texto: str):
+    try:
+        return datetime.strptime(texto, "%d/%m/%Y")
+    except ValueError:
+        return None
+
+def data(texto: str, user_id: str = None) -> datetime:
+    data_obj = _data(texto.strip())
+    if data_obj is None:
+        raise Invalido()
+    # Fora do cache: "hoje" muda enquanto o processo roda
+    if data_obj > datetime.now():
+        raise Invalido("futura")
+    return data_obj
+
+def data_ou_sem_filtro(texto: str, user_id: str = None):
+    # None = "SEM FILTROS"
+    if texto.strip().upper() == SEM_FILTROS:
+        return None
+    return data(texto, user_id)
+
+# Categorias
+def _nome_categoria(texto: str) -> str:
+    if not is_valid_category(texto.strip()):
+        raise Invalido()
+    return normalize_category(texto.strip())
+
+def categoria_despesa(texto: str, user_id: str) -> str:
+    cat_norm = _nome_categoria(texto)
+    if not user_has_category(user_id, cat_norm):
+        raise Invalido("inexistente")
+    return cat_norm
+
+def categoria_despesa_ou_geral(texto: str, user_id: str) -> str:
+    cat_norm = normalize_category(texto.strip())
+    return cat_norm if cat_norm == GERAL else categoria_despesa(texto, user_id)
+
+def nova_categoria_despesa(texto: str, user_id: str) -> str:
+    cat_norm = normalize_category(texto.strip())
+    if cat_norm == GERAL:
+        raise Invalido("geral")
+    return cat_norm
+
+def categoria_entrada(texto: str, user_id: str) -> str:
+    # Devolve o nome como o usuário cadastrou
+    original = find_user_cat_entrada(user_id, _nome_categoria(texto))
+    if original is None:
+        raise Invalido("inexistente")
+    return original
+
+def categoria_entrada_ou_geral(texto: str, user_id: str) -> str:
+    cat_norm = normalize_category(texto.strip())
+    if cat_norm != GERAL and find_user_cat_entrada(user_id, cat_norm) is None:
+        raise Invalido("inexistente")
+    return cat_norm
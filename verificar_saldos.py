@@ -0,0 +1,41 @@
+import ambiente
+
+# Executado como script: o .env entra no ambiente antes de config ser importado
+if __name__ == "__main__":
+    ambiente.carregar()
+
+import asyncio
+import argparse
+import logging
+import logger_config
+from storage import store
+from agregados import agregados
+from utils import formatar_valor
+from config import preparar_diretorios
+
+logger = logging.getLogger(__name__)
+
+# Recalcula os saldos a partir dos registros brutos (entradas - despesas)
+def verificar(corrigir: bool = False) -> list:
+    store.carregar()
+    divergencias = agregados.verificar(corrigir=corrigir)
+    for user_id, armazenado, calculado in divergencias:
+        logger.warning(
+            "Usuário %s: saldo armazenado R$ %s, calculado R$ %s",
+            user_id, formatar_valor(armazenado), formatar_valor(calculado)
+        )
+    if corrigir:
+        # Os saldos vão para o diário: parar() faz o fsync, compacta no snapshot e fecha os arquivos
+        asyncio.run(store.parar())
+    logger.info(
+        "%d saldo(s) divergente(s)%s", len(divergencias), " corrigido(s)" if corrigir and divergencias else ""
+    )
+    return divergencias
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica e reconstrói os saldos a partir dos registros.")
+    parser.add_argument("--corrigir", action="store_true", help="Grava os saldos recalculados")
+    args = parser.parse_args()
+    preparar_diretorios()
+    if verificar(args.corrigir) and not args.corrigir:
+        raise SystemExit(1)
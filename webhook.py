@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+from ciclo_vida import iniciar_app, encerrar_app, sinal_de_parada
+from config import WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORTA, WEBHOOK_SECRET
+
+logger = logging.getLogger(__name__)
+
+# Servidor HTTP próprio para o modo webhook: POST em WEBHOOK_PATH recebe updates do Telegram,
+# GET /saude responde ao balanceador. Para testar localmente, deixe WEBHOOK_URL vazia e envie
+# um update gravado:  curl -H "X-Telegram-Bot-Api-Secret-Token: $WEBHOOK_SECRET" -d @update.json \
+#                          http://localhost:8080/telegram
+
+# Sem segredo qualquer um que alcance a porta injeta updates: só se aceita ouvir no localhost
+LOCAIS = ("127.0.0.1", "localhost", "::1")
+
+def conferir_seguranca(host: str):
+    if WEBHOOK_SECRET:
+        return
+    if WEBHOOK_URL:
+        raise SystemExit("WEBHOOK_SECRET é obrigatório para registrar WEBHOOK_URL no Telegram.")
+    if host not in LOCAIS:
+        raise SystemExit(f"WEBHOOK_SECRET é obrigatório para ouvir em {host}; defina-o ou use WEBHOOK_HOST=127.0.0.1.")
+
+async def _receber(request: web.Request) -> web.Response:
+    if WEBHOOK_SECRET and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+        return web.Response(status=403)
+    try:
+        dados = await request.json()
+    except ValueError:
+        return web.Response(status=400, text="JSON inválido")
+    if not isinstance(dados, dict):
+        return web.Response(status=400, text="Update inválido")
+    try:
+        await request.app["entregar"](dados)
+    except ValueError:
+        return web.Response(status=400, text="Update inválido")
+    return web.Response()
+
+async def _saude(request: web.Request) -> web.Response:
+    estado = request.app["estado"]()
+    return web.json_response(estado, status=200 if estado["ok"] else 503)
+
+def criar_servidor(entregar, estado) -> web.Application:
+    # entregar: corrotina que recebe o update em JSON (ValueError = update inválido, responde 400);
+    # estado: função que devolve {"ok": bool, ...}
+    servidor = web.Application()
+    servidor["entregar"] = entregar
+    servidor["estado"] = estado
+    servidor.router.add_post(WEBHOOK_PATH, _receber)
+    servidor.router.add_get("/saude", _saude)
+    return servidor
+
+async def registrar_webhook(bot):
+    if WEBHOOK_URL:
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=Update.ALL_TYPES,
+        )
+
+async def ouvir(servidor: web.Application, host: str, porta: int) -> web.AppRunner:
+    # Quem chama já passou por conferir_seguranca(), antes de registrar o webhook
+    runner = web.AppRunner(servidor)
+    await runner.setup()
+    await web.TCPSite(runner, host, porta).start()
+    logger.info("Webhook ouvindo em %s:%d%s", host, porta, WEBHOOK_PATH)
+    return runner
+
+
+def entregador(app: Application):
+    async def entregar(dados: dict):
+        try:
+            update = Update.de_json(dados, app.bot)
+        except Exception as erro:
+            raise ValueError("Update inválido") from erro
+        await app.update_queue.put(update)
+    return entregar
+
+def estado_app(app: Application):
+    def estado() -> dict:
+        return {"ok": app.running, "fila": app.update_queue.qsize()}
+    return estado
+
+async def servir(app: Application, host: str = WEBHOOK_HOST, porta: int = WEBHOOK_PORTA):
+    conferir_seguranca(host)
+    parar = sinal_de_parada()
+    await iniciar_app(app)
+    await registrar_webhook(app.bot)
+    runner = await ouvir(criar_servidor(entregador(app), estado_app(app)), host, porta)
+    try:
+        await parar.wait()
+    finally:
+        # Para de aceitar requisições, processa o que já está na fila e só então grava e encerra
+        logger.info("Encerrando o webhook...")
+        await runner.cleanup()
+        await encerrar_app(app)
+
+def run_webhook(app: Application):
+    asyncio.run(servir(app))